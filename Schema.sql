@@ -12,6 +12,8 @@ CREATE DATABASE IF NOT EXISTS myanimelist_db_v2;
 USE myanimelist_db_v2;
 SET FOREIGN_KEY_CHECKS = 0;
 -- Drop relationship tables first
+DROP TABLE IF EXISTS EtlCheckpoint;
+DROP TABLE IF EXISTS EntrySearch;
 DROP TABLE IF EXISTS EntrySynonym;
 DROP TABLE IF EXISTS LanguageEntry;
 DROP TABLE IF EXISTS EntrySerialization;
@@ -366,5 +368,74 @@ CREATE TABLE EntrySynonym (
         ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 -- =========================================================
+-- Search projection (denormalized, derived data)
+-- One row per Entry holding everything /api/search filters or displays, so a
+-- search is a single-table indexed scan instead of a 7-way join + subqueries.
+-- Maintained by python_scripts/search_projection.py (ETL + web write routes).
+-- M2M ids are packed into JSON arrays with multi-valued indexes (MySQL 8.0.17+),
+-- queried with: CAST(? AS UNSIGNED) MEMBER OF (genre_ids)
+-- =========================================================
+CREATE TABLE EntrySearch (
+    entry_id INT UNSIGNED PRIMARY KEY,
+    title_name TEXT NOT NULL,
+    score DECIMAL(4,2),
+    ranked INT UNSIGNED,
+    popularity INT UNSIGNED,
+    item_type_id INT UNSIGNED,
+    type_name VARCHAR(100),
+    medium_type VARCHAR(50),
+    status_id INT UNSIGNED,
+    status_name VARCHAR(100),
+    source_id INT UNSIGNED,
+    age_rating_id INT UNSIGNED,
+    age_rating VARCHAR(10),
+    premier_date_season ENUM('Winter','Spring','Summer','Fall') NULL,
+    premier_date_year SMALLINT UNSIGNED NULL,
+    episodes INT UNSIGNED,
+    volumes INT UNSIGNED,
+    genre_ids JSON NOT NULL,
+    theme_ids JSON NOT NULL,
+    demographic_ids JSON NOT NULL,
+    studio_ids JSON NOT NULL,
+    producer_ids JSON NOT NULL,
+    licensor_ids JSON NOT NULL,
+    author_ids JSON NOT NULL,
+    serialization_ids JSON NOT NULL,
+    INDEX idx_search_popularity (popularity),
+    INDEX idx_search_medium_popularity (medium_type, popularity),
+    INDEX idx_search_year_season (premier_date_year, premier_date_season, popularity),
+    INDEX idx_search_score (score),
+    INDEX idx_search_item_type (item_type_id, popularity),
+    INDEX idx_search_status (status_id),
+    INDEX idx_search_genres ((CAST(genre_ids AS UNSIGNED ARRAY))),
+    INDEX idx_search_themes ((CAST(theme_ids AS UNSIGNED ARRAY))),
+    INDEX idx_search_demographics ((CAST(demographic_ids AS UNSIGNED ARRAY))),
+    INDEX idx_search_studios ((CAST(studio_ids AS UNSIGNED ARRAY))),
+    INDEX idx_search_producers ((CAST(producer_ids AS UNSIGNED ARRAY))),
+    INDEX idx_search_licensors ((CAST(licensor_ids AS UNSIGNED ARRAY))),
+    INDEX idx_search_authors ((CAST(author_ids AS UNSIGNED ARRAY))),
+    INDEX idx_search_serializations ((CAST(serialization_ids AS UNSIGNED ARRAY))),
+    CONSTRAINT fk_entrysearch_entry
+        FOREIGN KEY (entry_id)
+        REFERENCES Entry (entry_id)
+        ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+-- =========================================================
+-- ETL checkpoints (load bookkeeping, not catalog data)
+-- One row per committed batch of python_scripts/complete_etl.py, written in the
+-- same transaction as the batch, so a rerun on the same CSVs (same run_key, a
+-- hash of their contents) skips the batches that are already in with the same rows.
+-- =========================================================
+CREATE TABLE EtlCheckpoint (
+    run_key CHAR(40) NOT NULL,
+    stage VARCHAR(64) NOT NULL, -- e.g. 'anime.entries', 'manga.EntryGenre'
+    batch_no INT UNSIGNED NOT NULL,
+    digest CHAR(40) NOT NULL, -- sha1 of the batch's rows; a rerun redoes the batch if they differ
+    rows_loaded INT UNSIGNED NOT NULL,
+    rows_failed INT UNSIGNED NOT NULL DEFAULT 0, -- rows sent to the dead-letter file
+    committed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (run_key, stage, batch_no)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+-- =========================================================
 -- Done
 -- =========================================================
\ No newline at end of file
@@ -4,46 +4,65 @@
 
 USE myanimelist_db_v2;
 
+-- Helper: MySQL has no CREATE/DROP INDEX IF [NOT] EXISTS, so check information_schema.
+-- Makes this file safe to run on a fresh schema and to re-run.
+DELIMITER //
+DROP PROCEDURE IF EXISTS CreateIndexIfMissing //
+CREATE PROCEDURE CreateIndexIfMissing(IN p_table VARCHAR(64), IN p_index VARCHAR(64), IN p_columns VARCHAR(255))
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = p_table AND index_name = p_index
+    ) THEN
+        SET @ddl = CONCAT('CREATE INDEX ', p_index, ' ON ', p_table, ' (', p_columns, ')');
+        PREPARE stmt FROM @ddl;
+        EXECUTE stmt;
+        DEALLOCATE PREPARE stmt;
+    END IF;
+END //
+DELIMITER ;
+
 -- -----------------------------------------------------------------------------
 -- 1. Index on Entry Title
 -- Reason: Essential for search functionality (Partial string matching).
 -- -----------------------------------------------------------------------------
--- Dropping first to avoid errors if re-running
-DROP INDEX idx_entry_title_prefix ON Entry;
-CREATE INDEX idx_entry_title_prefix ON Entry (title_name(50));
+CALL CreateIndexIfMissing('Entry', 'idx_entry_title_prefix', 'title_name(50)');
 
 -- -----------------------------------------------------------------------------
 -- 2. Index on Anime Premier Year
 -- Reason: Very common filter ("best anime of 2023").
 -- -----------------------------------------------------------------------------
-DROP INDEX idx_anime_year ON AnimeDetails;
-CREATE INDEX idx_anime_year ON AnimeDetails (premier_date_year);
+CALL CreateIndexIfMissing('AnimeDetails', 'idx_anime_year', 'premier_date_year');
 
 -- -----------------------------------------------------------------------------
 -- 3. Index on Lookup Names (Genre)
 -- Reason: Lookup tables are joined often. Indexing name speeds up "Give me Action anime" queries.
 -- -----------------------------------------------------------------------------
-DROP INDEX idx_genre_name ON Genre;
-CREATE INDEX idx_genre_name ON Genre (name);
+CALL CreateIndexIfMissing('Genre', 'idx_genre_name', 'name');
 
 -- -----------------------------------------------------------------------------
 -- 4. Index on Studio Name
 -- Reason: Optimizes "View_StudioPerformance" and studio-based searches.
 -- -----------------------------------------------------------------------------
-DROP INDEX idx_studio_name ON Studio;
-CREATE INDEX idx_studio_name ON Studio (name);
+CALL CreateIndexIfMissing('Studio', 'idx_studio_name', 'name');
 
 -- -----------------------------------------------------------------------------
 -- 5. Composite Index on Entry (Type + Score)
 -- Reason: Optimizes queries like "Show me the top rated TV Series".
 -- Used when filtering by Item Type AND sorting by Score.
 -- -----------------------------------------------------------------------------
-DROP INDEX idx_entry_type_score ON Entry;
-CREATE INDEX idx_entry_type_score ON Entry (item_type_id, score);
+CALL CreateIndexIfMissing('Entry', 'idx_entry_type_score', 'item_type_id, score');
 
 -- -----------------------------------------------------------------------------
 -- 6. Index on ItemType Name
 -- Reason: Optimizes filtering by type (e.g., "All Movies") regardless of Medium.
 -- -----------------------------------------------------------------------------
-DROP INDEX idx_itemtype_name ON ItemType;
-CREATE INDEX idx_itemtype_name ON ItemType (type_name);
+CALL CreateIndexIfMissing('ItemType', 'idx_itemtype_name', 'type_name');
+
+-- -----------------------------------------------------------------------------
+-- Further indexes should come from the workload, not guesswork:
+--   python python_scripts/index_advisor.py capture --reset
+--   ... run the app / ETL ...
+--   python python_scripts/index_advisor.py capture -o workload.json
+--   python python_scripts/index_advisor.py --host <copy-host> --database <copy-db> advise workload.json -o index_migration.sql
+-- -----------------------------------------------------------------------------
@@ -145,6 +145,11 @@ BEGIN
     SELECT score INTO p_score
     FROM Entry
     WHERE entry_id = p_entry_id;
+
+    -- keep the /api/search projection (EntrySearch, Schema.sql) in step
+    UPDATE EntrySearch
+    SET score = p_score
+    WHERE entry_id = p_entry_id;
 END //
 
 
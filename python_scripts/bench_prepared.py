@@ -0,0 +1,100 @@
+import argparse
+import random
+import time
+import mysql.connector
+import prepared
+from complete_etl import DB_CONFIG, ENTRY_UPSERT, ENTRY_ID_QUERY, MANGA_DETAILS_UPSERT
+from bench_snapshot import SEARCHES, db_entry, timed, report
+from queries import (ENTRY_QUERY, DETAILS_QUERIES, JUNCTION_IDS_QUERIES, COMMON_JUNCTIONS,
+                     ANIME_JUNCTIONS, MANGA_JUNCTIONS, build_search_query)
+
+# Benchmark: text protocol vs server-side prepared statements (prepared.py) for
+#   - ETL row throughput: the per-row upsert / id lookup / details upsert of complete_etl.py
+#     (synthetic manga rows inside one transaction that is rolled back at the end;
+#     only AUTO_INCREMENT values are consumed)
+#   - /api/search and /api/entry/<id> latency on one long-lived connection, running the same
+#     SQL the routes run (the routes themselves use the text protocol: the pool resets each
+#     session per request, so there a statement would be prepared for a single execution)
+#     python python_scripts/bench_prepared.py --rows 5000 --iterations 300
+
+ETL_MAL_ID_BASE = 4_000_000_000  # far above real MAL ids
+
+def etl_rows(conn, item_type_id, rows, use_prepared):
+    cursor = conn.cursor()
+    rng = random.Random(0)
+    start = time.perf_counter()
+    for i in range(rows):
+        mal_id = ETL_MAL_ID_BASE + i
+        entry = (mal_id, f'https://myanimelist.net/manga/{mal_id}', f'Bench title {i}', round(rng.uniform(1, 10), 2),
+                 'description', '', item_type_id, rng.randint(0, 10 ** 5), i + 1, i + 1, rng.randint(0, 10 ** 6), 0)
+        if use_prepared:
+            prepared.execute(conn, ENTRY_UPSERT, entry)
+            entry_id = prepared.fetchone(conn, ENTRY_ID_QUERY, (mal_id, item_type_id))[0]
+            prepared.execute(conn, MANGA_DETAILS_UPSERT, (entry_id, '2001-01-01', None, 10, 100, None))
+        else:
+            cursor.execute(ENTRY_UPSERT, entry)
+            cursor.execute(ENTRY_ID_QUERY, (mal_id, item_type_id))
+            entry_id = cursor.fetchone()[0]
+            cursor.execute(MANGA_DETAILS_UPSERT, (entry_id, '2001-01-01', None, 10, 100, None))
+    elapsed = time.perf_counter() - start
+    conn.rollback()
+    return rows / elapsed
+
+def prepared_entry(conn, entry_id):
+    entry = prepared.fetchone(conn, ENTRY_QUERY, (entry_id,), dictionary=True)
+    if not entry: return None
+    medium = 'anime' if entry['medium_type'] == 'anime' else 'manga'
+    entry.update(prepared.fetchone(conn, DETAILS_QUERIES[medium], (entry_id,), dictionary=True) or {})
+    junctions = COMMON_JUNCTIONS + (ANIME_JUNCTIONS if medium == 'anime' else MANGA_JUNCTIONS)
+    for key, tbl, col in junctions:
+        entry[key] = [x[0] for x in prepared.fetchall(conn, JUNCTION_IDS_QUERIES[tbl], (entry_id,))]
+    return entry
+
+def text_search(cursor, args):
+    query, params = build_search_query(args)
+    cursor.execute(query, params)
+    return cursor.fetchall()
+
+def prepared_search(conn, args):
+    query, params = build_search_query(args)
+    return prepared.fetchall(conn, query, params, dictionary=True)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare text-protocol and prepared-statement execution.')
+    parser.add_argument('--rows', type=int, default=2000, help='Synthetic ETL rows per run')
+    parser.add_argument('--iterations', type=int, default=200, help='Requests per read benchmark')
+    args = parser.parse_args()
+
+    conn = mysql.connector.connect(**DB_CONFIG)
+    print(f"Connection: {type(conn).__name__} (C extension available: {mysql.connector.HAVE_CEXT})")
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("""
+        SELECT it.item_type_id FROM ItemType it JOIN Medium m ON it.medium_id = m.medium_id
+        WHERE m.name = 'manga' LIMIT 1
+    """)
+    row = cursor.fetchone()
+    cursor.execute("SELECT entry_id FROM Entry")
+    all_ids = [r['entry_id'] for r in cursor.fetchall()]
+    conn.rollback()
+
+    if row:
+        text_rate = etl_rows(conn, row['item_type_id'], args.rows, use_prepared=False)
+        prep_rate = etl_rows(conn, row['item_type_id'], args.rows, use_prepared=True)
+        print(f"  etl rows   text      {text_rate:9.0f} rows/s")
+        print(f"  etl rows   prepared  {prep_rate:9.0f} rows/s   ({prep_rate / text_rate:.2f}x)")
+    else:
+        print("  etl rows   skipped: no manga item type loaded")
+
+    if all_ids:
+        ids = random.Random(0).choices(all_ids, k=args.iterations)
+        searches = [SEARCHES[i % len(SEARCHES)] for i in range(args.iterations)]
+        # Warm both paths once so the comparison excludes first-use prepares and cold pages
+        for a in SEARCHES:
+            text_search(cursor, a)
+            prepared_search(conn, a)
+        report('search', 'text', timed(lambda a: text_search(cursor, a), searches))
+        report('search', 'prepared', timed(lambda a: prepared_search(conn, a), searches))
+        report('entry', 'text', timed(lambda i: db_entry(cursor, i), ids))
+        report('entry', 'prepared', timed(lambda i: prepared_entry(conn, i), ids))
+    print(f"Statements prepared on the connection: {prepared.stats(conn)['prepared']}")
+    conn.close()
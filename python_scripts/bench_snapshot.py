@@ -0,0 +1,97 @@
+import argparse
+import random
+import statistics
+import time
+import mysql.connector
+from complete_etl import DB_CONFIG
+from catalog_snapshot import CatalogSnapshot, build_metadata
+from queries import (ENTRY_QUERY, COMMON_JUNCTIONS, ANIME_JUNCTIONS, MANGA_JUNCTIONS,
+                     build_search_query)
+
+# Benchmark: catalog snapshot (mmap) vs MySQL for the three read routes.
+# Runs the same work the routes do, in-process, so HTTP overhead doesn't hide the gap:
+#   python python_scripts/catalog_snapshot.py catalog.snap
+#   python python_scripts/bench_snapshot.py catalog.snap --iterations 200
+# For end-to-end numbers, run one app with SNAPSHOT_PATH set and one without and compare
+# them with python_scripts/load_test.py.
+
+SEARCHES = [
+    {},
+    {'title': 'one'},
+    {'medium': 'anime', 'score_min': '8'},
+    {'genre_id': '1', 'limit': '100'},
+    {'year': '2020', 'season': 'Fall'},
+    {'medium': 'manga', 'status_id': '1', 'theme_id': '2'},
+]
+
+def rss_mb():
+    """(private anonymous, file-backed) resident MB; file-backed pages are shared between workers."""
+    with open('/proc/self/status') as f:
+        fields = dict(line.split(':', 1) for line in f)
+    return int(fields['RssAnon'].split()[0]) / 1e3, int(fields['RssFile'].split()[0]) / 1e3
+
+def rss_delta(before):
+    anon, file = rss_mb()
+    return f"anon +{anon - before[0]:.1f} MB, file-backed +{file - before[1]:.1f} MB"
+
+def db_entry(cursor, entry_id):
+    cursor.execute(ENTRY_QUERY, (entry_id,))
+    entry = cursor.fetchone()
+    if not entry: return None
+    table = 'AnimeDetails' if entry['medium_type'] == 'anime' else 'MangaDetails'
+    cursor.execute(f"SELECT * FROM {table} WHERE entry_id=%s", (entry_id,))
+    entry.update(cursor.fetchone() or {})
+    junctions = COMMON_JUNCTIONS + (ANIME_JUNCTIONS if entry['medium_type'] == 'anime' else MANGA_JUNCTIONS)
+    for key, tbl, col in junctions:
+        cursor.execute(f"SELECT {col} FROM {tbl} WHERE entry_id=%s", (entry_id,))
+        entry[key] = [x[col] for x in cursor.fetchall()]
+    return entry
+
+def db_search(cursor, args):
+    query, params = build_search_query(args)
+    cursor.execute(query, params)
+    return cursor.fetchall()
+
+def timed(fn, calls):
+    times = []
+    for args in calls:
+        start = time.perf_counter()
+        fn(args)
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return statistics.median(times), times[int(len(times) * 0.95) - 1]
+
+def report(route, backend, stats):
+    print(f"  {route:<10} {backend:<9} median {stats[0]:8.3f} ms   p95 {stats[1]:8.3f} ms")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare snapshot-backed and MySQL-backed read routes.')
+    parser.add_argument('snapshot')
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--no-db', action='store_true', help='Only measure the snapshot')
+    args = parser.parse_args()
+
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    catalog = CatalogSnapshot(args.snapshot)
+    snap = catalog.current()
+    print(f"Snapshot open: {(time.perf_counter() - start) * 1000:.2f} ms, "
+          f"{snap.rows} entries, RSS {rss_delta(rss_before)}")
+
+    ids = [int(x) for x in random.Random(0).choices(snap.entry_ids, k=args.iterations)]
+    searches = [SEARCHES[i % len(SEARCHES)] for i in range(args.iterations)]
+    metas = [None] * max(args.iterations // 10, 1)
+
+    report('search', 'snapshot', timed(catalog.search, searches))
+    report('entry', 'snapshot', timed(catalog.entry, ids))
+    report('metadata', 'snapshot', timed(lambda _: catalog.metadata(), metas))
+    print(f"RSS after workload: {rss_delta(rss_before)}")
+
+    if not args.no_db:
+        conn = mysql.connector.connect(**DB_CONFIG)
+        cursor = conn.cursor(dictionary=True)
+        report('search', 'mysql', timed(lambda a: db_search(cursor, a), searches))
+        report('entry', 'mysql', timed(lambda i: db_entry(cursor, i), ids))
+        plain = conn.cursor()
+        report('metadata', 'mysql', timed(lambda _: build_metadata(plain), metas))
+        conn.close()
@@ -0,0 +1,146 @@
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+import mysql.connector
+from scipy import sparse
+from complete_etl import DB_CONFIG
+
+# Offline "more like this" index.
+# Every entry becomes a sparse feature vector (IDF-weighted one-hot blocks from the
+# junction tables + scaled score / popularity). Top-K cosine neighbours are found
+# block by block (block x N sparse product), so the full N x N matrix never exists.
+# Output is a small .npz served by /api/entry/<id>/similar.
+#   python python_scripts/build_similar_index.py --top-k 20
+
+OUTPUT_PATH = 'similar_index.npz'
+
+# (junction table, id column, block weight)
+FEATURE_BLOCKS = [
+    ('EntryGenre', 'genre_id', 1.0),
+    ('EntryTheme', 'theme_id', 1.0),
+    ('EntryDemographic', 'demographic_id', 0.5),
+    ('EntryStudio', 'studio_id', 0.8),
+    ('EntryAuthor', 'author_id', 1.2),
+    ('EntrySerialization', 'serialization_id', 0.5)
+]
+SCORE_WEIGHT = 0.3
+POPULARITY_WEIGHT = 0.3
+
+# Rows per block are chosen so one block's similarities stay under this budget: per row
+# and entry ~20 bytes (sparse product, its dense copy, argpartition's int64 indices)
+BLOCK_MEMORY_BYTES = 256 * 1024 * 1024
+
+def load_entries(cursor):
+    cursor.execute("SELECT entry_id, score, popularity FROM Entry ORDER BY entry_id")
+    rows = cursor.fetchall()
+    entry_ids = np.array([r[0] for r in rows], dtype=np.int64)
+    score = np.array([r[1] if r[1] is not None else np.nan for r in rows], dtype=np.float64)
+    popularity = np.array([r[2] if r[2] is not None else np.nan for r in rows], dtype=np.float64)
+    return entry_ids, score, popularity
+
+def junction_block(cursor, entry_ids, table, col, weight):
+    """IDF-weighted one-hot block (n_entries x n_distinct_ids), rows L2-normalized, times weight."""
+    cursor.execute(f"SELECT entry_id, {col} FROM {table}")
+    pairs = np.array(cursor.fetchall(), dtype=np.int64).reshape(-1, 2)
+    n = len(entry_ids)
+    if len(pairs) == 0:
+        return sparse.csr_matrix((n, 0), dtype=np.float32)
+
+    rows = np.searchsorted(entry_ids, pairs[:, 0])
+    keep = (rows < n) & (entry_ids[np.minimum(rows, n - 1)] == pairs[:, 0])
+    rows = rows[keep]
+    feat_ids, cols = np.unique(pairs[keep, 1], return_inverse=True)
+
+    df = np.bincount(cols, minlength=len(feat_ids))
+    idf = np.log((1 + n) / (1 + df)) + 1.0
+    block = sparse.csr_matrix((idf[cols].astype(np.float32), (rows, cols)), shape=(n, len(feat_ids)))
+    block.sum_duplicates()
+    return sparse.diags(weight / np.maximum(row_norms(block), 1e-12)) @ block
+
+def numeric_block(score, popularity):
+    n = len(score)
+    # Score on 0..1, popularity as a percentile (1 = most popular); unknowns contribute nothing
+    s = np.nan_to_num(score / 10.0, nan=0.0)
+    pop_rank = np.argsort(np.argsort(np.nan_to_num(popularity, nan=np.inf)))
+    p = np.where(np.isnan(popularity), 0.0, 1.0 - pop_rank / max(n - 1, 1))
+    return sparse.csr_matrix(np.column_stack([s * SCORE_WEIGHT, p * POPULARITY_WEIGHT]).astype(np.float32))
+
+def row_norms(m):
+    return np.sqrt(np.asarray(m.multiply(m).sum(axis=1)).ravel())
+
+def build_features(cursor):
+    entry_ids, score, popularity = load_entries(cursor)
+    blocks = [junction_block(cursor, entry_ids, tbl, col, w) for tbl, col, w in FEATURE_BLOCKS]
+    blocks.append(numeric_block(score, popularity))
+    X = sparse.hstack(blocks, format='csr', dtype=np.float32)
+    # Unit rows -> dot product == cosine similarity
+    X = sparse.diags(1.0 / np.maximum(row_norms(X), 1e-12)).astype(np.float32) @ X
+    return entry_ids, X.tocsr()
+
+def block_rows(n):
+    return max(1, min(n, BLOCK_MEMORY_BYTES // (20 * max(n, 1))))
+
+def top_k_neighbours(X, k, block_size=None):
+    """Row numbers and cosine similarities of each row's k nearest rows, best first.
+    Slots without a neighbour sharing any feature (similarity <= 0, e.g. all-zero rows)
+    hold -1 / 0.0 and come last."""
+    n = X.shape[0]
+    k = min(k, n - 1)
+    if k <= 0:
+        return np.empty((n, 0), dtype=np.int32), np.empty((n, 0), dtype=np.float32)
+    block_size = block_size or block_rows(n)
+    neighbours = np.empty((n, k), dtype=np.int32)
+    sims = np.empty((n, k), dtype=np.float32)
+    XT = X.T.tocsc()
+
+    for start in range(0, n, block_size):
+        end = min(start + block_size, n)
+        S = (X[start:end] @ XT).toarray()            # (block x n) dense, never n x n
+        S[np.arange(end - start), np.arange(start, end)] = -np.inf  # drop self
+        part = np.argpartition(S, -k, axis=1)[:, -k:]
+        part_sims = np.take_along_axis(S, part, axis=1)
+        order = np.argsort(-part_sims, axis=1)
+        neighbours[start:end] = np.take_along_axis(part, order, axis=1)
+        sims[start:end] = np.take_along_axis(part_sims, order, axis=1)
+    unrelated = ~(sims > 0)
+    neighbours[unrelated] = -1
+    sims[unrelated] = 0.0
+    return neighbours, sims
+
+def write_index(path, **arrays):
+    """np.savez to a temp file next to `path`, then rename it over `path`, so the web app
+    (which reloads on mtime change) never reads a half-written index."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.npz.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:  # a file object keeps savez from appending '.npz'
+            np.savez(f, **arrays)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the similar-titles index.')
+    parser.add_argument('--top-k', type=int, default=20)
+    parser.add_argument('--block-size', type=int, default=None,
+                        help=f'Rows per block (default: sized to {BLOCK_MEMORY_BYTES >> 20} MB)')
+    parser.add_argument('--output', default=OUTPUT_PATH)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    conn = mysql.connector.connect(**DB_CONFIG)
+    entry_ids, X = build_features(conn.cursor())
+    conn.close()
+    print(f"Features: {X.shape[0]} entries x {X.shape[1]} dims, {X.nnz} non-zeros")
+
+    neighbours, sims = top_k_neighbours(X, args.top_k, args.block_size)
+    write_index(args.output,
+                entry_ids=entry_ids.astype(np.uint32),
+                # entry ids, not row numbers; 0 marks an empty slot (entry ids start at 1)
+                neighbours=np.where(neighbours >= 0, entry_ids[neighbours], 0).astype(np.uint32),
+                similarity=sims.astype(np.float16))
+    print(f"Wrote {args.output} in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,67 @@
+import argparse
+import time
+import mysql.connector
+
+# --- Chunked bulk delete of Entry rows ---
+# Deleting one Entry lets ON DELETE CASCADE walk ~13 child tables row by row inside one
+# statement; deleting thousands that way holds InnoDB locks long enough to stall searches.
+# Here each chunk of ids is one short transaction: set-based DELETEs on the child tables
+# first, then Entry itself, then a pause so queued readers / writers get the locks.
+# Used by the web app (POST /api/delete/bulk) and from the command line:
+#   python python_scripts/bulk_delete.py --ids-file bad_batch.txt
+
+CHUNK_SIZE = 500
+PAUSE_SECONDS = 0.05
+
+# Every table with an entry_id FK to Entry (Schema.sql), children before the parent
+ENTRY_CHILD_TABLES = [
+    'EntryGenre', 'EntryTheme', 'EntryDemographic', 'EntryProducer', 'EntryLicensor',
+    'EntryStudio', 'EntryAuthor', 'EntrySerialization', 'EntrySynonym',
+    'LanguageEntry', 'AnimeDetails', 'MangaDetails', 'EntrySearch'
+]
+
+def delete_entries(conn, entry_ids, chunk_size=CHUNK_SIZE, pause=PAUSE_SECONDS):
+    """Delete entry_ids chunk by chunk; yields a progress dict after each committed chunk."""
+    entry_ids = sorted(set(int(x) for x in entry_ids))  # ascending ids: stable lock order
+    total, deleted, start = len(entry_ids), 0, time.perf_counter()
+    cursor = conn.cursor()
+    for i in range(0, total, chunk_size):
+        chunk = entry_ids[i:i + chunk_size]
+        placeholders = ', '.join(['%s'] * len(chunk))
+        try:
+            for table in ENTRY_CHILD_TABLES:
+                cursor.execute(f"DELETE FROM {table} WHERE entry_id IN ({placeholders})", chunk)
+            cursor.execute(f"DELETE FROM Entry WHERE entry_id IN ({placeholders})", chunk)
+            deleted += cursor.rowcount
+            conn.commit()
+        except mysql.connector.Error:
+            conn.rollback()
+            raise
+        yield {'processed': min(i + chunk_size, total), 'total': total, 'deleted': deleted,
+               'elapsed_seconds': round(time.perf_counter() - start, 3)}
+        if pause and i + chunk_size < total: time.sleep(pause)
+
+if __name__ == '__main__':
+    from complete_etl import DB_CONFIG, notify_cache_invalidate
+    from recompute_ranks import recompute_ranks
+    parser = argparse.ArgumentParser(description='Delete Entry rows (and their child rows) in chunks.')
+    parser.add_argument('--ids', nargs='*', type=int, default=[], help='entry_id values')
+    parser.add_argument('--ids-file', help='File with one entry_id per line')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--pause', type=float, default=PAUSE_SECONDS)
+    args = parser.parse_args()
+
+    ids = list(args.ids)
+    if args.ids_file:
+        with open(args.ids_file) as f:
+            ids += [int(line) for line in f if line.strip()]
+    if not ids:
+        print("No entry ids given; nothing to delete.")
+        raise SystemExit(0)
+    conn = mysql.connector.connect(**DB_CONFIG)
+    for progress in delete_entries(conn, ids, args.chunk_size, args.pause):
+        print(f"{progress['processed']}/{progress['total']} processed, {progress['deleted']} deleted "
+              f"({progress['elapsed_seconds']}s)")
+    recompute_ranks(conn)
+    conn.close()
+    notify_cache_invalidate(ids)
@@ -0,0 +1,356 @@
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import unicodedata
+from datetime import date, timedelta
+import numpy as np
+from search_projection import PACKED_ID_SETS
+from queries import (LOOKUP_TABLES, ITEM_TYPE_QUERY, AUTHOR_QUERY,
+                     COMMON_JUNCTIONS, ANIME_JUNCTIONS, MANGA_JUNCTIONS)
+
+# --- Read-only catalog snapshot ---
+# One binary file holding the catalog for DB-free mirrors (app.py with SNAPSHOT_PATH set):
+#   - fixed-width column arrays for Entry, AnimeDetails, MangaDetails (one row per entry,
+#     sorted by entry_id; NULL = -1 / NaN / INT32_MIN depending on the type)
+#   - CSR arrays (offsets, values) for every junction table
+#   - a string heap (+ offsets) per text column, and a casefolded title heap for search
+#   - the /api/metadata payload as JSON
+# Readers mmap the file and wrap the arrays with np.frombuffer, so opening is O(1) and all
+# worker processes share the same page-cache pages.
+#   python python_scripts/catalog_snapshot.py catalog.snap       (or SNAPSHOT_PATH in complete_etl.py)
+#
+# Layout: b'MALSNAP1' | u64 header offset | u64 header length | arrays (64-byte aligned) | JSON header
+
+MAGIC = b'MALSNAP1'
+ALIGN = 64
+DATE_NULL = np.iinfo(np.int32).min
+EPOCH = date(1970, 1, 1)
+
+# (group, column, SQL expression, kind). 'entry' = Entry.* (+ medium_type), 'anime' /
+# 'manga' = SELECT * of the details table, 'search' = extra /api/search card fields.
+COLUMNS = [
+    ('entry', 'entry_id', 'e.entry_id', 'int'),
+    ('entry', 'mal_id', 'e.mal_id', 'int'),
+    ('entry', 'link', 'e.link', 'str'),
+    ('entry', 'title_name', 'e.title_name', 'str'),
+    ('entry', 'score', 'e.score', 'dec'),
+    ('entry', 'scored_by', 'e.scored_by', 'int'),
+    ('entry', 'ranked', 'e.ranked', 'int'),
+    ('entry', 'popularity', 'e.popularity', 'int'),
+    ('entry', 'members', 'e.members', 'int'),
+    ('entry', 'favorited', 'e.favorited', 'int'),
+    ('entry', 'item_type_id', 'e.item_type_id', 'int'),
+    ('entry', 'description', 'e.description', 'str'),
+    ('entry', 'background', 'e.background', 'str'),
+    ('entry', 'medium_type', 'm.name', 'enum'),
+    ('anime', 'entry_id', 'ad.entry_id', 'int'),
+    ('anime', 'episodes', 'ad.episodes', 'int'),
+    ('anime', 'status_id', 'ad.status_id', 'int'),
+    ('anime', 'from_airing_date', 'ad.from_airing_date', 'date'),
+    ('anime', 'to_airing_date', 'ad.to_airing_date', 'date'),
+    ('anime', 'premier_date_season', 'ad.premier_date_season', 'enum'),
+    ('anime', 'premier_date_year', 'ad.premier_date_year', 'int'),
+    ('anime', 'broadcast_date_day', 'ad.broadcast_date_day', 'enum'),
+    ('anime', 'broadcast_date_time', 'ad.broadcast_date_time', 'time'),
+    ('anime', 'broadcast_date_timezone', 'ad.broadcast_date_timezone', 'enum'),
+    ('anime', 'duration_minutes', 'ad.duration_minutes', 'int'),
+    ('anime', 'age_rating_id', 'ad.age_rating_id', 'int'),
+    ('anime', 'source_id', 'ad.source_id', 'int'),
+    ('manga', 'entry_id', 'md.entry_id', 'int'),
+    ('manga', 'volumes', 'md.volumes', 'int'),
+    ('manga', 'chapters', 'md.chapters', 'int'),
+    ('manga', 'status_id', 'md.status_id', 'int'),
+    ('manga', 'from_publishing_date', 'md.from_publishing_date', 'date'),
+    ('manga', 'to_publishing_date', 'md.to_publishing_date', 'date'),
+    ('search', 'type_name', 'it.type_name', 'enum'),
+    ('search', 'status_id', 'st.status_id', 'int'),
+    ('search', 'status_name', 'st.status_name', 'enum'),
+    ('search', 'age_rating', 'ar.code', 'enum'),
+]
+
+SNAPSHOT_QUERY = """
+    SELECT {cols}
+    FROM Entry e
+    LEFT JOIN ItemType it ON e.item_type_id = it.item_type_id
+    LEFT JOIN Medium m ON it.medium_id = m.medium_id
+    LEFT JOIN AnimeDetails ad ON e.entry_id = ad.entry_id
+    LEFT JOIN MangaDetails md ON e.entry_id = md.entry_id
+    LEFT JOIN StatusType st ON st.status_id = COALESCE(ad.status_id, md.status_id)
+    LEFT JOIN AgeRating ar ON ad.age_rating_id = ar.age_rating_id
+    ORDER BY e.entry_id
+""".format(cols=', '.join(sql for _, _, sql, _ in COLUMNS))
+
+# /api/search card, in the order of build_search_query's SELECT: (field, stored column)
+SEARCH_CARD = [
+    ('entry_id', 'entry.entry_id'), ('title_name', 'entry.title_name'), ('score', 'entry.score'),
+    ('medium_type', 'entry.medium_type'), ('type_name', 'search.type_name'),
+    ('episodes', 'anime.episodes'), ('volumes', 'manga.volumes'), ('ranked', 'entry.ranked'),
+    ('popularity', 'entry.popularity'), ('status_name', 'search.status_name'),
+    ('age_rating', 'search.age_rating'), ('premier_date_season', 'anime.premier_date_season'),
+    ('premier_date_year', 'anime.premier_date_year')
+]
+
+# /api/search equality filters: (request arg, stored column)
+EQUALITY_FILTERS = [
+    ('item_type_id', 'entry.item_type_id'), ('year', 'anime.premier_date_year'),
+    ('status_id', 'search.status_id'), ('source_id', 'anime.source_id'),
+    ('age_rating_id', 'anime.age_rating_id')
+]
+
+def fold_title(s):
+    """Approximates utf8mb4_unicode_ci for LIKE: accents stripped, casefolded."""
+    s = unicodedata.normalize('NFKD', s or '')
+    return ''.join(c for c in s if not unicodedata.combining(c)).casefold()
+
+# --- Writer ---
+
+def _encode(kind, values):
+    """Column values -> (arrays by suffix, extra header info)."""
+    if kind == 'int':
+        return {'data': np.array([-1 if v is None else v for v in values], dtype=np.int64)}, {}
+    if kind == 'dec':
+        return {'data': np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)}, {}
+    if kind == 'date':
+        return {'data': np.array([DATE_NULL if v is None else (v - EPOCH).days for v in values], dtype=np.int32)}, {}
+    if kind == 'time':
+        return {'data': np.array([-1 if v is None else int(v.total_seconds()) for v in values], dtype=np.int32)}, {}
+    if kind == 'enum':
+        labels = sorted({v for v in values if v is not None})
+        index = {v: i for i, v in enumerate(labels)}
+        return {'data': np.array([-1 if v is None else index[v] for v in values], dtype=np.int32)}, {'labels': labels}
+    # str: each value followed by b'\0', so a substring search never spans two rows
+    encoded = [b'' if v is None else str(v).encode('utf-8') for v in values]
+    lengths = np.array([len(b) + 1 for b in encoded], dtype=np.int64)
+    return {'offsets': np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64),
+            'heap': np.frombuffer(b''.join(b + b'\0' for b in encoded), dtype=np.uint8),
+            'null': np.array([v is None for v in values], dtype=np.uint8)}, {}
+
+def build_metadata(cursor):
+    """Same payload as /api/metadata."""
+    data = {}
+    for tbl, col in LOOKUP_TABLES.items():
+        cursor.execute(f"SELECT * FROM {tbl} ORDER BY {col}")
+        names = [d[0] for d in cursor.description]
+        data[tbl] = [dict(zip(names, row)) for row in cursor.fetchall()]
+    for key, query in (('ItemType', ITEM_TYPE_QUERY), ('Author', AUTHOR_QUERY)):
+        cursor.execute(query)
+        names = [d[0] for d in cursor.description]
+        data[key] = [dict(zip(names, row)) for row in cursor.fetchall()]
+    return data
+
+def write_snapshot(conn, path):
+    cursor = conn.cursor()
+    cursor.execute(SNAPSHOT_QUERY)
+    rows = cursor.fetchall()
+    print(f"Snapshot: {len(rows)} entries")
+
+    arrays, columns = {}, {}
+    for i, (group, name, _, kind) in enumerate(COLUMNS):
+        values = [r[i] for r in rows]
+        encoded, info = _encode(kind, values)
+        key = f'{group}.{name}'
+        columns[key] = dict(info, kind=kind)
+        for suffix, arr in encoded.items():
+            arrays[f'{key}.{suffix}'] = arr
+        if key == 'entry.title_name':
+            folded, _ = _encode('str', [fold_title(v) for v in values])
+            arrays['search.title_folded.offsets'] = folded['offsets']
+            arrays['search.title_folded.heap'] = folded['heap']
+    del rows
+    # Search result order (ORDER BY popularity ASC; MySQL puts NULL, here -1, first)
+    arrays['search.popularity_order'] = np.argsort(arrays['entry.popularity.data'], kind='stable')
+
+    entry_ids = arrays['entry.entry_id.data']
+    for _, tbl, id_col in PACKED_ID_SETS:
+        cursor.execute(f"SELECT entry_id, {id_col} FROM {tbl} ORDER BY entry_id, {id_col}")
+        pairs = np.array(cursor.fetchall(), dtype=np.int64).reshape(-1, 2)
+        pos = np.searchsorted(entry_ids, pairs[:, 0])
+        found = pos < len(entry_ids)
+        found[found] = entry_ids[pos[found]] == pairs[found, 0]
+        counts = np.bincount(pos[found], minlength=len(entry_ids))
+        arrays[f'junction.{tbl}.offsets'] = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        arrays[f'junction.{tbl}.values'] = pairs[found, 1]
+
+    metadata = json.dumps(build_metadata(cursor), default=str).encode('utf-8')
+    arrays['metadata'] = np.frombuffer(metadata, dtype=np.uint8)
+
+    tmp = path + '.tmp'
+    directory = {}
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC + b'\0' * 16)
+        for name, arr in arrays.items():
+            arr = np.ascontiguousarray(arr)
+            f.write(b'\0' * (-f.tell() % ALIGN))
+            directory[name] = {'offset': f.tell(), 'dtype': arr.dtype.str, 'length': int(arr.size)}
+            f.write(arr.tobytes())
+        header = json.dumps({'version': 1, 'rows': int(len(entry_ids)), 'columns': columns,
+                             'arrays': directory}).encode('utf-8')
+        header_offset = f.tell()
+        f.write(header)
+        f.seek(len(MAGIC))
+        f.write(struct.pack('<QQ', header_offset, len(header)))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)  # readers pick up the new file on their next request
+    print(f"Snapshot written to {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+# --- Reader ---
+
+# One UTF-8 encoded character other than the NUL separating titles in the heap
+UTF8_CHAR = rb'(?:[\x01-\x7f]|[\xc0-\xdf][\x80-\xbf]|[\xe0-\xef][\x80-\xbf]{2}|[\xf0-\xf7][\x80-\xbf]{3})'
+
+class SnapshotMissing(Exception):
+    """SNAPSHOT_PATH is set but the file has not been written (yet)."""
+
+class SnapshotFile:
+    """One mapped snapshot file; every array is a read-only view into the mapping."""
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a catalog snapshot")
+        offset, length = struct.unpack_from('<QQ', self.mm, len(MAGIC))
+        header = json.loads(self.mm[offset:offset + length])
+        self.rows = header['rows']
+        self.columns = header['columns']
+        self.arrays = {name: np.frombuffer(self.mm, dtype=a['dtype'], count=a['length'], offset=a['offset'])
+                       for name, a in header['arrays'].items()}
+        self.heap_offsets = {name[:-len('.heap')]: header['arrays'][name]['offset']
+                             for name in header['arrays'] if name.endswith('.heap')}
+        self.entry_ids = self.arrays['entry.entry_id.data']
+        self.metadata = json.loads(self.arrays['metadata'].tobytes())
+
+    def value(self, col, row):
+        kind = self.columns[col]['kind']
+        if kind == 'str':
+            if self.arrays[col + '.null'][row]: return None
+            offsets = self.arrays[col + '.offsets']
+            return self.arrays[col + '.heap'][offsets[row]:offsets[row + 1] - 1].tobytes().decode('utf-8')
+        v = self.arrays[col + '.data'][row]
+        if kind == 'int': return None if v == -1 else int(v)
+        if kind == 'dec': return None if np.isnan(v) else f'{v:.2f}'  # DECIMAL(4,2) rendered like str(Decimal)
+        if kind == 'date': return None if v == DATE_NULL else (EPOCH + timedelta(days=int(v))).isoformat()
+        if kind == 'time': return None if v == -1 else str(timedelta(seconds=int(v)))
+        return None if v == -1 else self.columns[col]['labels'][v]  # enum
+
+    def junction(self, tbl, row):
+        offsets = self.arrays[f'junction.{tbl}.offsets']
+        return self.arrays[f'junction.{tbl}.values'][offsets[row]:offsets[row + 1]].tolist()
+
+    def row_of(self, entry_id):
+        row = int(np.searchsorted(self.entry_ids, entry_id))
+        return row if row < self.rows and self.entry_ids[row] == entry_id else None
+
+    def enum_matches(self, col, value):
+        labels = self.columns[col]['labels']
+        codes = [i for i, label in enumerate(labels) if label.lower() == str(value).lower()]
+        return np.isin(self.arrays[col + '.data'], codes)
+
+    def title_matches(self, text):
+        # LIKE %text%: '%' and '_' keep their wildcard meaning. The text is split at '%' and
+        # the pieces are found left to right inside each title; every piece is a fixed-length
+        # pattern (escaped literals, '_' = one UTF-8 character), so no input can backtrack
+        pieces = [re.compile(b''.join(UTF8_CHAR if c == '_' else re.escape(c.encode('utf-8')) for c in piece))
+                  for piece in fold_title(text).split('%') if piece]
+        mask = np.zeros(self.rows, bool)
+        if not pieces:  # only '%': every title (NULL never matches LIKE)
+            return self.arrays['entry.title_name.null'] == 0
+        start = self.heap_offsets['search.title_folded']
+        end = start + len(self.arrays['search.title_folded.heap'])
+        offsets = self.arrays['search.title_folded.offsets']
+        pos = start
+        while True:
+            m = pieces[0].search(self.mm, pos, end)  # leftmost hit in the next matching title
+            if not m: break
+            row = int(np.searchsorted(offsets, m.start() - start, side='right')) - 1
+            pos, title_end = m.end(), start + int(offsets[row + 1])
+            for piece in pieces[1:]:
+                m = piece.search(self.mm, pos, title_end)
+                if not m: break
+                pos = m.end()
+            else:
+                mask[row] = True
+            pos = title_end  # on to the next title
+        return mask
+
+class CatalogSnapshot:
+    """Serves /api/search, /api/entry/<id> and /api/metadata from a snapshot file.
+    The file is re-mapped when the ETL replaces it."""
+    def __init__(self, path):
+        self.path = path
+        self._mtime = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            if self._file is not None: return self._file  # removed after start: keep serving it
+            raise SnapshotMissing(f"Catalog snapshot {self.path} not found")
+        if mtime != self._mtime:
+            with self._lock:
+                if mtime != self._mtime:
+                    self._file = SnapshotFile(self.path)  # in-flight requests keep the old mapping
+                    self._mtime = mtime
+        return self._file
+
+    def metadata(self):
+        return self.current().metadata
+
+    def entry(self, entry_id):
+        """Same fields and string formats as the MySQL-backed /api/entry/<id>, or None."""
+        snap = self.current()
+        row = snap.row_of(entry_id)
+        if row is None: return None
+        entry = {name: snap.value(f'entry.{name}', row) for g, name, _, _ in COLUMNS if g == 'entry'}
+        medium = 'anime' if entry['medium_type'] == 'anime' else 'manga'
+        if snap.value(f'{medium}.entry_id', row) is not None:
+            entry.update({name: snap.value(f'{medium}.{name}', row) for g, name, _, _ in COLUMNS if g == medium})
+        for key, tbl, _ in COMMON_JUNCTIONS + (ANIME_JUNCTIONS if medium == 'anime' else MANGA_JUNCTIONS):
+            entry[key] = snap.junction(tbl, row)
+        return entry
+
+    def search(self, args):
+        """The /api/search filters over the snapshot columns; raises ValueError on bad numbers."""
+        snap = self.current()
+        a = snap.arrays
+        mask = np.ones(snap.rows, bool)
+        if args.get('title'):
+            mask &= snap.title_matches(args.get('title'))
+        if args.get('score_min'):
+            mask &= a['entry.score.data'] >= float(args.get('score_min'))
+        medium = args.get('medium')
+        if medium and medium != 'all':
+            mask &= snap.enum_matches('entry.medium_type', medium)
+        if args.get('season'):
+            mask &= snap.enum_matches('anime.premier_date_season', args.get('season'))
+        for param, col in EQUALITY_FILTERS:
+            if args.get(param):
+                mask &= a[col + '.data'] == int(args.get(param))
+        for _, tbl, id_col in PACKED_ID_SETS:
+            if args.get(id_col):
+                offsets = a[f'junction.{tbl}.offsets']
+                hits = np.flatnonzero(a[f'junction.{tbl}.values'] == int(args.get(id_col)))
+                member = np.zeros(snap.rows, bool)
+                member[np.searchsorted(offsets, hits, side='right') - 1] = True
+                mask &= member
+
+        try:
+            limit = max(int(args.get('limit', 50)), 0)
+        except (ValueError, TypeError):
+            limit = 50
+        order = a['search.popularity_order']
+        rows = order[mask[order]][:limit]
+        return [{field: snap.value(col, row) for field, col in SEARCH_CARD} for row in rows.tolist()]
+
+if __name__ == '__main__':
+    import mysql.connector
+    from complete_etl import DB_CONFIG
+    conn = mysql.connector.connect(**DB_CONFIG)
+    write_snapshot(conn, sys.argv[1] if len(sys.argv) > 1 else 'catalog.snap')
+    conn.close()
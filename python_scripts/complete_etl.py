@@ -1,10 +1,20 @@
+import argparse
 import pandas as pd
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, InterfaceError, OperationalError
 import ast
+import json
 import re
 from datetime import datetime
 import numpy as np
+import urllib.request
+from search_projection import refresh_entry_search
+from recompute_ranks import recompute_ranks
+from entity_resolution import resolve_csvs, expand_lookup, split_author_name
+from catalog_snapshot import write_snapshot
+from etl_checkpoint import (EtlCheckpoint, run_key, run_batches, write_dead_letter,
+                            take_dead_letters, finish_dead_letters)
+import prepared
 
 # Configuration
 DB_CONFIG = {
@@ -15,11 +25,41 @@ DB_CONFIG = {
     'raise_on_warnings': False
 }
 
+# Read replicas for reporting queries (run_reports.py); the ETL itself always writes to DB_CONFIG
+REPLICA_CONFIGS = [
+    # {'host': 'localhost', 'port': 3307, 'database': 'myanimelist_db_v2', 'user': 'root', 'password': ''},
+]
+MAX_REPLICA_LAG_SECONDS = 300
+
 CSV_PATHS = {
     'anime': 'raw_data/anime_entries.csv',
     'manga': 'raw_data/manga_entries.csv'
 }
 
+# Recompute Entry.ranked / Entry.popularity from the loaded scores and members
+# (False keeps the values copied from the CSV)
+RECOMPUTE_RANKS = True
+
+# Merge spelling / Unicode / romanization variants of Author, Studio and Producer names
+# before ids are assigned. The mapping is resolved over both CSVs and shared with
+# export_csv_etl.py (entity_resolution.MAPPING_PATH); merges are listed in ENTITY_REPORT_PATH
+RESOLVE_ENTITIES = True
+ENTITY_REPORT_PATH = 'entity_resolution_report.csv'
+entity_map = {}  # table -> {raw: canonical}, loaded in __main__
+
+# Write a catalog snapshot for read-only mirrors after each load (None to skip)
+SNAPSHOT_PATH = None  # e.g. 'catalog.snap'
+
+# Checkpointed loading: each stage commits in numbered batches recorded in EtlCheckpoint,
+# so a rerun on the same CSVs resumes at the first uncommitted batch (--reset starts over).
+# Rows that fail to load are appended to DEAD_LETTER_PATH (--retry-dead-letters reloads them).
+ENTRY_BATCH_SIZE = 1000
+JUNCTION_BATCH_SIZE = 5000
+DEAD_LETTER_PATH = 'etl_dead_letter.jsonl'
+
+# Web app endpoint that drops cached /api/search results (None to disable)
+CACHE_INVALIDATE_URL = 'http://127.0.0.1:5000/api/cache/invalidate'
+
 # --- Parsing Helpers ---
 
 def parse_date_range(date_str):
@@ -57,6 +97,11 @@ def parse_list(col_val):
         except: return []
     return [val_str] # Plain string case
 
+def parse_synonyms(syn_val):
+    syns_raw = str(syn_val if syn_val is not None else '')
+    if not syns_raw or syns_raw.lower() in ['nan', 'none', '']: return []
+    return [s.strip() for s in syns_raw.split(',') if s.strip()]
+
 def parse_premier(prem_str):
     # Input: "Fall 2023"
     if pd.isna(prem_str) or prem_str in ['Unknown', '?']: return None, None
@@ -76,9 +121,62 @@ def parse_broadcast(broad_str):
 
 # --- Database Logic ---
 
+# Per-row statements of process_medium(), run as server-side prepared statements
+# (prepared once per load, then only the parameters go over the wire; see prepared.py)
+ENTRY_UPSERT = """
+    INSERT INTO Entry (
+        mal_id, link, title_name, score, description, background, item_type_id,
+        scored_by, ranked, popularity, members, favorited
+    )
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE 
+        title_name=VALUES(title_name), item_type_id=VALUES(item_type_id),
+        score=VALUES(score), scored_by=VALUES(scored_by), ranked=VALUES(ranked),
+        popularity=VALUES(popularity), members=VALUES(members), favorited=VALUES(favorited)
+"""
+
+ENTRY_ID_QUERY = "SELECT entry_id FROM Entry WHERE mal_id=%s AND item_type_id=%s"
+
+ANIME_DETAILS_UPSERT = """
+    INSERT INTO AnimeDetails (
+        entry_id, duration_minutes, from_airing_date, to_airing_date, episodes, status_id, source_id, age_rating_id,
+        premier_date_season, premier_date_year, broadcast_date_day, broadcast_date_time, broadcast_date_timezone
+    )
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE 
+        status_id=VALUES(status_id),
+        premier_date_season=VALUES(premier_date_season), premier_date_year=VALUES(premier_date_year),
+        broadcast_date_day=VALUES(broadcast_date_day), broadcast_date_time=VALUES(broadcast_date_time), broadcast_date_timezone=VALUES(broadcast_date_timezone),
+        duration_minutes=VALUES(duration_minutes)
+"""
+
+MANGA_DETAILS_UPSERT = """
+    INSERT INTO MangaDetails (entry_id, from_publishing_date, to_publishing_date, volumes, chapters, status_id)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE from_publishing_date=VALUES(from_publishing_date), status_id=VALUES(status_id)
+"""
+
 def connect_db():
     return mysql.connector.connect(**DB_CONFIG)
 
+def notify_cache_invalidate(entry_ids=None):
+    # The web app may not be running during a load; that's fine, its cache TTL covers it.
+    # entry_ids (the loaded / deleted entries) let its trend cube patch just those.
+    if not CACHE_INVALIDATE_URL: return
+    try:
+        body = json.dumps({'entry_ids': sorted(entry_ids)} if entry_ids is not None else {}).encode()
+        req = urllib.request.Request(CACHE_INVALIDATE_URL, data=body, method='POST',
+                                     headers={'Content-Type': 'application/json'})
+        urllib.request.urlopen(req, timeout=5).close()
+        print("Search cache invalidated.")
+    except Exception as e:
+        print(f"Could not invalidate search cache: {e}")
+
+def resolve_entities(kind, values):
+    """values: list of lists of raw names -> {raw: canonical} (identity when disabled)."""
+    mapping = entity_map.get(kind, {})
+    return {v: mapping.get(v, v) for sublist in values for v in sublist if v}
+
 def get_lookup_map(cursor, table, col_name, values, medium_type=None, id_col=None):
     unique_vals = sorted(list(set(v for sublist in values for v in sublist if v)))
     if not unique_vals: return {}
@@ -104,11 +202,16 @@ def get_lookup_map(cursor, table, col_name, values, medium_type=None, id_col=Non
         
     return {row[0]: row[1] for row in cursor.fetchall()}
 
-def process_medium(medium_type, file_path, conn):
-    print(f"\nProcessing {medium_type} from {file_path}...")
+def load_csv(file_path):
     df = pd.read_csv(file_path).replace({np.nan: None})
     if 'id' in df.columns:
         df = df.sort_values('id')
+    return df
+
+def process_medium(medium_type, df, conn, checkpoint=None):
+    """Load one medium's rows; with a checkpoint, batches committed by an earlier run are skipped.
+    Returns the entry ids of the rows (including ones an earlier, interrupted run loaded)."""
+    print(f"\nProcessing {len(df)} {medium_type} rows...")
     cursor = conn.cursor()
 
     # 1. Prepare Data & Generic Lookups
@@ -140,8 +243,10 @@ def process_medium(medium_type, file_path, conn):
         studios = df['studios'].dropna().apply(parse_list).tolist()
         licensors = df['licensors'].dropna().apply(parse_list).tolist()
         
-        producer_map = get_lookup_map(cursor, 'Producer', 'name', producers)
-        studio_map = get_lookup_map(cursor, 'Studio', 'name', studios)
+        producer_res = resolve_entities('Producer', producers)
+        studio_res = resolve_entities('Studio', studios)
+        producer_map = expand_lookup(get_lookup_map(cursor, 'Producer', 'name', [producer_res.values()]), producer_res)
+        studio_map = expand_lookup(get_lookup_map(cursor, 'Studio', 'name', [studio_res.values()]), studio_res)
         licensor_map = get_lookup_map(cursor, 'Licensor', 'name', licensors)
         
         sources = df['source'].dropna().unique()
@@ -161,16 +266,11 @@ def process_medium(medium_type, file_path, conn):
     else: # Manga
         # Authors
         authors = df['authors'].dropna().apply(parse_list).tolist()
-        valid_authors = set(a for sublist in authors for a in sublist if a)
-        print(f"Upserting {len(valid_authors)} Authors...")
-        auth_tuples = []
-        raw_to_parsed = {}
-        for auth in valid_authors:
-             parts = auth.split(',')
-             if len(parts) == 2: lname, fname = parts[0].strip(), parts[1].strip()
-             else: lname, fname = auth.strip(), None
-             auth_tuples.append((fname, lname))
-             raw_to_parsed[auth] = (fname, lname)
+        author_res = resolve_entities('Author', authors)
+        # Every raw variant parses from its canonical spelling, so variants share one row
+        raw_to_parsed = {raw: split_author_name(canonical) for raw, canonical in author_res.items()}
+        auth_tuples = sorted(set(raw_to_parsed.values()), key=str)
+        print(f"Upserting {len(auth_tuples)} Authors...")
 
         cursor.executemany("INSERT IGNORE INTO Author (first_name, last_name) VALUES (%s, %s)", auth_tuples)
         conn.commit()
@@ -196,9 +296,76 @@ def process_medium(medium_type, file_path, conn):
     cursor.execute("SELECT language_name, language_id FROM Language")
     lang_map = {row[0]: row[1] for row in cursor.fetchall()}
 
-    # 4. Process Entries
+    # 4. Process Entries (checkpointed batches; a failed row rolls back to its savepoint
+    #    and goes to the dead-letter file instead of leaving a half-loaded entry)
     print(f"Inserting {medium_type} entries...")
-    
+
+    def load_entries(batch):
+        failed = []  # dead-lettered by run_batches once the batch has committed
+        for idx, row in batch:
+            cursor.execute("SAVEPOINT etl_row")
+            try:
+                mal_id = row['id']
+                # Entry Info
+                t_id = type_map.get(row.get('item_type'))
+
+                prepared.execute(conn, ENTRY_UPSERT, (mal_id, row['link'], row['title_name'], row.get('score'), 
+                      row.get('description', ''), row.get('background', ''), t_id,
+                      row.get('scored_by'), row.get('ranked'), row.get('popularity'), row.get('members'), row.get('favorited')))
+
+                res = prepared.fetchone(conn, ENTRY_ID_QUERY, (mal_id, t_id))
+                if not res: continue
+                entry_id = res[0]
+
+                # Subtype Details
+                stat_id = status_map.get(row.get('status'))
+
+                if medium_type == 'anime':
+                    dur_raw = row.get('duration', '')
+                    dur_min = parse_duration(dur_raw)
+                    s_date, e_date = parse_date_range(row.get('airing_date', ''))
+
+                    # New Parsing
+                    p_season, p_year = parse_premier(row.get('premier_date'))
+                    b_day, b_time, b_tz = parse_broadcast(row.get('broadcast_date'))
+
+                    src_id = source_map.get(row.get('source'))
+                    rat_id = rating_map.get(row.get('age_rating'))
+
+                    prepared.execute(conn, ANIME_DETAILS_UPSERT, (entry_id, dur_min, s_date, e_date, 
+                          row.get('episodes') if str(row.get('episodes')).isdigit() else None,
+                          stat_id, src_id, rat_id,
+                          p_season, p_year, b_day, b_time, b_tz))
+
+                    # Entry_Duration block removed
+
+                else: # Manga
+                    s_date, e_date = parse_date_range(row.get('publishing_date', ''))
+                    prepared.execute(conn, MANGA_DETAILS_UPSERT, (entry_id, s_date, e_date,
+                          row.get('volumes') if str(row.get('volumes')).isdigit() else None,
+                          row.get('chapters') if str(row.get('chapters')).isdigit() else None,
+                          stat_id))
+            except (InterfaceError, OperationalError):
+                raise  # lost connection etc.: fail the batch, the rerun resumes at it
+            except Exception as e:  # SQL errors on this row, and values the parsers choke on
+                cursor.execute("ROLLBACK TO SAVEPOINT etl_row")
+                print(f"Error on row {idx}: {e}")
+                failed.append((row, e))
+        return failed
+
+    def dead_letter(failures):
+        for row, e in failures:
+            write_dead_letter(DEAD_LETTER_PATH, medium_type, row, e)
+
+    run_batches(conn, checkpoint, f'{medium_type}.entries', list(df.iterrows()), ENTRY_BATCH_SIZE, load_entries,
+                content=lambda item: repr(tuple(item[1].items())),  # Series repr truncates long text
+                on_failed=dead_letter)
+
+    # 5. Junction / synonym / language rows, from the CSV and the entry ids now in the DB
+    #    (a batch whose derived rows differ from the committed run's is loaded again)
+    cursor.execute("SELECT mal_id, item_type_id, entry_id FROM Entry")
+    entry_ids = {(m_id, t_id): e_id for m_id, t_id, e_id in cursor.fetchall()}
+
     junctions = {
         'Genre': [], 'Theme': [], 'Demographic': [], 'Synonym': [],
         'Producer': [], 'Studio': [], 'Licensor': [], 'Author': [], 'Serialization': []
@@ -206,127 +373,57 @@ def process_medium(medium_type, file_path, conn):
     language_entries = [] # (entry_id, lang_id, text)
     synonyms_to_insert = set()
 
+    loaded_ids = set()
     for idx, row in df.iterrows():
-        try:
-            mal_id = row['id']
-            # Entry Info
-            t_id = type_map.get(row.get('item_type'))
-            
-            cursor.execute("""
-                INSERT INTO Entry (
-                    mal_id, link, title_name, score, description, background, item_type_id,
-                    scored_by, ranked, popularity, members, favorited
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON DUPLICATE KEY UPDATE 
-                    title_name=VALUES(title_name), item_type_id=VALUES(item_type_id),
-                    score=VALUES(score), scored_by=VALUES(scored_by), ranked=VALUES(ranked),
-                    popularity=VALUES(popularity), members=VALUES(members), favorited=VALUES(favorited)
-            """, (mal_id, row['link'], row['title_name'], row.get('score'), 
-                  row.get('description', ''), row.get('background', ''), t_id,
-                  row.get('scored_by'), row.get('ranked'), row.get('popularity'), row.get('members'), row.get('favorited')))
-            
-            cursor.execute("SELECT entry_id FROM Entry WHERE mal_id=%s AND item_type_id=%s", (mal_id, t_id))
-            res = cursor.fetchone()
-            if not res: continue
-            entry_id = res[0]
-            
-            # Subtype Details
-            stat_id = status_map.get(row.get('status'))
-            
-            if medium_type == 'anime':
-                dur_raw = row.get('duration', '')
-                dur_min = parse_duration(dur_raw)
-                s_date, e_date = parse_date_range(row.get('airing_date', ''))
-                
-                # New Parsing
-                p_season, p_year = parse_premier(row.get('premier_date'))
-                b_day, b_time, b_tz = parse_broadcast(row.get('broadcast_date'))
-                
-                src_id = source_map.get(row.get('source'))
-                rat_id = rating_map.get(row.get('age_rating'))
-                
-                cursor.execute("""
-                    INSERT INTO AnimeDetails (
-                        entry_id, duration_minutes, from_airing_date, to_airing_date, episodes, status_id, source_id, age_rating_id,
-                        premier_date_season, premier_date_year, broadcast_date_day, broadcast_date_time, broadcast_date_timezone
-                    )
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON DUPLICATE KEY UPDATE 
-                        status_id=VALUES(status_id),
-                        premier_date_season=VALUES(premier_date_season), premier_date_year=VALUES(premier_date_year),
-                        broadcast_date_day=VALUES(broadcast_date_day), broadcast_date_time=VALUES(broadcast_date_time), broadcast_date_timezone=VALUES(broadcast_date_timezone),
-                        duration_minutes=VALUES(duration_minutes)
-                """, (entry_id, dur_min, s_date, e_date, 
-                      row.get('episodes') if str(row.get('episodes')).isdigit() else None,
-                      stat_id, src_id, rat_id,
-                      p_season, p_year, b_day, b_time, b_tz))
-                      
-                # Entry_Duration block removed
-                      
-            else: # Manga
-                s_date, e_date = parse_date_range(row.get('publishing_date', ''))
-                cursor.execute("""
-                    INSERT INTO MangaDetails (entry_id, from_publishing_date, to_publishing_date, volumes, chapters, status_id)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                    ON DUPLICATE KEY UPDATE from_publishing_date=VALUES(from_publishing_date), status_id=VALUES(status_id)
-                """, (entry_id, s_date, e_date,
-                      row.get('volumes') if str(row.get('volumes')).isdigit() else None,
-                      row.get('chapters') if str(row.get('chapters')).isdigit() else None,
-                      stat_id))
-            
-            # Junctions Helper
-            def add_junc(col, map_obj, target_list):
-                vals = parse_list(row.get(col))
-                for v in vals:
-                    if v in map_obj: target_list.append((entry_id, map_obj[v]))
-
-            add_junc('genres', genre_map, junctions['Genre'])
-            add_junc('themes', theme_map, junctions['Theme'])
-            add_junc('demographic', demo_map, junctions['Demographic'])
-            
-            if medium_type == 'anime':
-                add_junc('producers', producer_map, junctions['Producer'])
-                add_junc('studios', studio_map, junctions['Studio'])
-                add_junc('licensors', licensor_map, junctions['Licensor'])
-            else:
-                add_junc('authors', author_map, junctions['Author'])
-                add_junc('serialization', serialization_map, junctions['Serialization'])
-
-            # Synonyms
-            syns_raw = str(row.get('synonymns', ''))
-            if syns_raw and syns_raw.lower() not in ['nan', 'none', '']:
-                syn_list = [s.strip() for s in syns_raw.split(',') if s.strip()]
-                for s in syn_list:
-                    synonyms_to_insert.add(s)
-                    junctions['Synonym'].append((entry_id, s))
-
-            # Languages (Japanese/English/German/French/Spanish columns)
-            lang_cols = {
-                'japanese_name': 'Japanese',
-                'english_name': 'English',
-                'german_name': 'German',
-                'french_name': 'French',
-                'spanish_name': 'Spanish'
-            }
-            
-            for col, l_name in lang_cols.items():
-                if col in row and row[col] and str(row[col]).lower() not in ['nan', 'none', '']:
-                    language_entries.append((entry_id, lang_map[l_name], str(row[col])))
-
-        except Error as e:
-            print(f"Error on row {idx}: {e}")
+        entry_id = entry_ids.get((row['id'], type_map.get(row.get('item_type'))))
+        if entry_id is None: continue  # dead-lettered (or no item type)
+        loaded_ids.add(entry_id)
 
-    conn.commit()
-    
-    # 5. Batch Insert Junctions
+        # Junctions Helper
+        def add_junc(col, map_obj, target_list):
+            vals = parse_list(row.get(col))
+            for v in vals:
+                if v in map_obj: target_list.append((entry_id, map_obj[v]))
+
+        add_junc('genres', genre_map, junctions['Genre'])
+        add_junc('themes', theme_map, junctions['Theme'])
+        add_junc('demographic', demo_map, junctions['Demographic'])
+        
+        if medium_type == 'anime':
+            add_junc('producers', producer_map, junctions['Producer'])
+            add_junc('studios', studio_map, junctions['Studio'])
+            add_junc('licensors', licensor_map, junctions['Licensor'])
+        else:
+            add_junc('authors', author_map, junctions['Author'])
+            add_junc('serialization', serialization_map, junctions['Serialization'])
+
+        # Synonyms
+        for s in parse_synonyms(row.get('synonymns')):
+            synonyms_to_insert.add(s)
+            junctions['Synonym'].append((entry_id, s))
+
+        # Languages (Japanese/English/German/French/Spanish columns)
+        lang_cols = {
+            'japanese_name': 'Japanese',
+            'english_name': 'English',
+            'german_name': 'German',
+            'french_name': 'French',
+            'spanish_name': 'Spanish'
+        }
+        
+        for col, l_name in lang_cols.items():
+            if col in row and row[col] and str(row[col]).lower() not in ['nan', 'none', '']:
+                language_entries.append((entry_id, lang_map[l_name], str(row[col])))
+
+    # 6. Batch Insert Junctions
     print("Inserting Junctions...")
-    
+
     def batch_ins(tbl, col_fk1, col_fk2, data):
         if not data: return
-        data = list(set(data))
-        cursor.executemany(f"INSERT IGNORE INTO {tbl} ({col_fk1}, {col_fk2}) VALUES (%s, %s)", data)
-        conn.commit()
+        data = sorted(set(data))  # sorted: unchanged batches keep their number (and digest) on reruns
+        sql = f"INSERT IGNORE INTO {tbl} ({col_fk1}, {col_fk2}) VALUES (%s, %s)"
+        run_batches(conn, checkpoint, f'{medium_type}.{tbl}', data, JUNCTION_BATCH_SIZE,
+                    lambda batch: cursor.executemany(sql, batch))
 
     batch_ins('EntryGenre', 'entry_id', 'genre_id', junctions['Genre'])
     batch_ins('EntryTheme', 'entry_id', 'theme_id', junctions['Theme'])
@@ -342,8 +439,9 @@ def process_medium(medium_type, file_path, conn):
     # Synonyms
     if synonyms_to_insert:
         print(f"Processing {len(synonyms_to_insert)} unique synonyms...")
-        cursor.executemany("INSERT IGNORE INTO Synonym (synonym_text) VALUES (%s)", [(s,) for s in synonyms_to_insert])
-        conn.commit()
+        run_batches(conn, checkpoint, f'{medium_type}.Synonym', sorted(synonyms_to_insert), JUNCTION_BATCH_SIZE,
+                    lambda batch: cursor.executemany("INSERT IGNORE INTO Synonym (synonym_text) VALUES (%s)",
+                                                     [(s,) for s in batch]))
         cursor.execute("SELECT synonym_text, synonym_id FROM Synonym")
         syn_db_map = {row[0]: row[1] for row in cursor.fetchall()}
         final_syn_junc = []
@@ -355,21 +453,56 @@ def process_medium(medium_type, file_path, conn):
     if language_entries:
         print(f"Processing {len(language_entries)} language titles...")
         # Remove duplicates if any (same entry, same language)
-        language_entries = list(set(language_entries))
+        language_entries = sorted(set(language_entries))
         # Insert or update
-        cursor.executemany("""
-            INSERT INTO LanguageEntry (entry_id, language_id, title_text) 
-            VALUES (%s, %s, %s)
-            ON DUPLICATE KEY UPDATE title_text=VALUES(title_text)
-        """, language_entries)
-        conn.commit()
+        run_batches(conn, checkpoint, f'{medium_type}.LanguageEntry', language_entries, JUNCTION_BATCH_SIZE,
+                    lambda batch: cursor.executemany("""
+                        INSERT INTO LanguageEntry (entry_id, language_id, title_text) 
+                        VALUES (%s, %s, %s)
+                        ON DUPLICATE KEY UPDATE title_text=VALUES(title_text)
+                    """, batch))
 
     print(f"Finished {medium_type}.")
+    return loaded_ids
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Load the anime / manga CSVs into MySQL.')
+    parser.add_argument('--reset', action='store_true',
+                        help='Ignore committed batches of an earlier run on these CSVs and load everything')
+    parser.add_argument('--retry-dead-letters', action='store_true',
+                        help=f'Load only the rows in {DEAD_LETTER_PATH}')
+    args = parser.parse_args()
+
     conn = connect_db()
     if conn:
-        process_medium('anime', CSV_PATHS['anime'], conn)
-        process_medium('manga', CSV_PATHS['manga'], conn)
+        loaded_ids = set()  # passed to the web app so its trend cube patches just these
+        if RESOLVE_ENTITIES:
+            entity_map.update(resolve_csvs(CSV_PATHS.values(), parse_list, report_path=ENTITY_REPORT_PATH))
+        if args.retry_dead_letters:
+            letters = take_dead_letters(DEAD_LETTER_PATH)
+            if not letters:
+                print(f"No rows in {DEAD_LETTER_PATH}.")
+            for medium_type, rows in letters.items():
+                loaded_ids |= process_medium(medium_type, pd.DataFrame(rows).replace({np.nan: None}), conn)
+            finish_dead_letters(DEAD_LETTER_PATH)
+        else:
+            checkpoint = EtlCheckpoint(conn, run_key([CSV_PATHS['anime'], CSV_PATHS['manga']]))
+            if args.reset:
+                checkpoint.reset()
+            elif checkpoint.committed_before:
+                print(f"Resuming: an earlier run on these CSVs committed {checkpoint.committed_before} batches, "
+                      f"which are skipped. Use --reset to load everything again.")
+            loaded_ids |= process_medium('anime', load_csv(CSV_PATHS['anime']), conn, checkpoint)
+            loaded_ids |= process_medium('manga', load_csv(CSV_PATHS['manga']), conn, checkpoint)
+            if checkpoint.skipped and not checkpoint.recorded:
+                print("Nothing loaded: every batch was already committed by an earlier run on these CSVs. "
+                      "Use --reset to load them again.")
+        if RECOMPUTE_RANKS:
+            recompute_ranks(conn, refresh_projection=False)  # projection is rebuilt next
+        refresh_entry_search(conn.cursor())
+        conn.commit()
+        if SNAPSHOT_PATH:
+            write_snapshot(conn, SNAPSHOT_PATH)
         conn.close()
+        notify_cache_invalidate(loaded_ids)
         print("Done.")
@@ -0,0 +1,196 @@
+import csv
+import json
+import os
+import re
+import unicodedata
+import pandas as pd
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from etl_checkpoint import run_key
+
+# --- Entity resolution for lookup names (Author, Studio, Producer) ---
+# Raw strings from the CSVs are grouped into clusters of spelling / spacing / Unicode /
+# romanization variants and every variant is mapped to one canonical raw string.
+# The mapping is built once over both CSVs and saved to MAPPING_PATH; both ETL paths
+# (complete_etl.py, export_csv_etl.py) load it and apply it before ids are assigned, so
+# a studio spelled three ways becomes one Studio row, the same one in either path.
+# Synonyms are titles, not names, and are left as written.
+#
+#   1. exact match on a normalized key (NFKC, accents stripped, casefold, long vowels
+#      folded in romanized Japanese tokens, punctuation and company suffixes removed,
+#      "Last, First" authors turned around; otherwise token order is kept)
+#   2. fuzzy match (difflib ratio >= threshold, stricter for short names, and per token)
+#      only between keys that share a blocking key, so the comparison count stays
+#      near-linear instead of n^2
+
+FUZZY_THRESHOLD = 0.92
+SHORT_NAME_LENGTH = 12        # keys shorter than this need SHORT_NAME_THRESHOLD
+SHORT_NAME_THRESHOLD = 0.97
+MAX_BLOCK_SIZE = 200  # oversized blocks (very common prefixes) are skipped, not compared n^2
+
+# Name columns resolved by both ETLs (table -> CSV column)
+ENTITY_COLUMNS = {'Producer': 'producers', 'Studio': 'studios', 'Author': 'authors'}
+MAPPING_PATH = 'entity_resolution_map.json'
+
+COMPANY_SUFFIXES = {'inc', 'ltd', 'co', 'llc', 'corp', 'corporation', 'company', 'kk', 'gk'}
+# Long vowels written differently across romanization systems (Ōtomo / Ootomo / Outomo / Otomo)
+ROMANIZATION = [('ou', 'o'), ('oo', 'o'), ('uu', 'u')]
+# A token made only of Japanese syllables (Hepburn / kunrei, with doubled consonants and
+# syllabic n); only such tokens are folded, so English words like "soul" keep their vowels
+ROMAJI_TOKEN = re.compile(r'(?:(?:kk|ss|tt|pp|cch|tch)?(?:sh|ch|ts|[kgnhbpmrj]y|[kgsztdnhbpmrywjf])?[aeiou]|n)+')
+
+def clean_text(s):
+    """NFKC + whitespace collapse; what gets stored for display."""
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFKC', str(s))).strip()
+
+def fold_romanization(token):
+    if not ROMAJI_TOKEN.fullmatch(token): return token
+    for a, b in ROMANIZATION:
+        token = token.replace(a, b)
+    return token
+
+def normalize_name(s, person=False):
+    """Matching key; person=True reads "Last, First" as "First Last"."""
+    s = clean_text(s)
+    if person:
+        parts = s.split(',', 1)
+        if len(parts) == 2 and parts[1].strip():
+            s = f'{parts[1]} {parts[0]}'
+    s = unicodedata.normalize('NFKD', s)
+    s = ''.join(c for c in s if not unicodedata.combining(c)).casefold()
+    s = re.sub(r"[^\w\s]|_", ' ', s)
+    return ' '.join(fold_romanization(t) for t in s.split() if t not in COMPANY_SUFFIXES)
+
+def is_fuzzy_match(a, b, threshold=FUZZY_THRESHOLD):
+    """Keys a and b differ only by spacing or small typos: same numbers, every token pair
+    similar, and the whole key similar (stricter when short)."""
+    # Never merge names that differ in numbers ("Season 2" vs "Season 3")
+    if re.findall(r'\d+', a) != re.findall(r'\d+', b): return False
+    ta, tb = a.split(), b.split()
+    if len(ta) != len(tb):
+        return ''.join(ta) == ''.join(tb)  # spacing only: "Production I.G" / "Production IG"
+    # "Sato Masaki" / "Saito Masaki": one differing short token is a different name
+    if any(x != y and SequenceMatcher(None, x, y).ratio() < threshold for x, y in zip(ta, tb)):
+        return False
+    if min(len(a), len(b)) < SHORT_NAME_LENGTH:
+        threshold = max(threshold, SHORT_NAME_THRESHOLD)
+    return SequenceMatcher(None, a, b).ratio() >= threshold
+
+def split_author_name(raw):
+    """'Last, First' -> (first_name, last_name); anything else is kept whole as last_name."""
+    parts = clean_text(raw).split(',', 1)
+    if len(parts) == 2 and parts[1].strip():
+        return parts[1].strip(), parts[0].strip()
+    return None, clean_text(raw).strip(', ')
+
+def blocking_keys(key):
+    compact = key.replace(' ', '')
+    yield 'p:' + compact[:4]                              # shared prefix
+    yield 's:' + re.sub(r'[aeiou]', '', compact)[:5]      # consonant skeleton (vowel typos)
+    for t in key.split():
+        if len(t) >= 4: yield 't:' + t                    # shared full token
+
+class UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, x):
+        self.parent.setdefault(x, x)
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb: self.parent[rb] = ra
+
+def resolve_names(raw_names, threshold=FUZZY_THRESHOLD, person=False):
+    """Cluster raw name occurrences (duplicates allowed, they count as votes).
+
+    Returns (mapping raw -> canonical raw, clusters) where clusters lists only the groups
+    that merged more than one distinct raw string: [(canonical, {raw: count}), ...].
+    """
+    counts = Counter(n for n in raw_names if n)
+    by_key = defaultdict(list)
+    for raw in counts:
+        by_key[normalize_name(raw, person)].append(raw)
+
+    uf = UnionFind()
+    blocks = defaultdict(list)
+    for key in by_key:
+        uf.find(key)
+        for b in blocking_keys(key):
+            blocks[b].append(key)
+
+    compared = set()
+    for members in blocks.values():
+        if len(members) < 2 or len(members) > MAX_BLOCK_SIZE: continue
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                if (a, b) in compared: continue
+                compared.add((a, b))
+                if is_fuzzy_match(a, b, threshold):
+                    uf.union(a, b)
+
+    groups = defaultdict(list)
+    for key, raws in by_key.items():
+        groups[uf.find(key)].extend(raws)
+
+    mapping, clusters = {}, []
+    for raws in groups.values():
+        # Most frequent spelling wins; ties go to the shorter, then alphabetical
+        canonical = clean_text(min(raws, key=lambda r: (-counts[r], len(r), r)))
+        for r in raws:
+            mapping[r] = canonical
+        if len(raws) > 1:
+            clusters.append((canonical, {r: counts[r] for r in raws}))
+    return mapping, clusters
+
+def expand_lookup(lookup_map, mapping):
+    """Extend a {canonical: id} map so every raw variant resolves to the canonical id."""
+    expanded = dict(lookup_map)
+    for raw, canonical in mapping.items():
+        if canonical in lookup_map:
+            expanded[raw] = lookup_map[canonical]
+    return expanded
+
+def resolve_csvs(csv_paths, parse, mapping_path=MAPPING_PATH, report_path=None):
+    """{table: {raw: canonical}} for ENTITY_COLUMNS over all csv_paths (parse: cell -> names).
+    The result is saved to mapping_path with a hash of the CSVs and reused while they are
+    unchanged, so both ETLs and every rerun map names the same way. A fresh resolution
+    writes its merged clusters to report_path."""
+    csv_paths = list(csv_paths)
+    inputs = run_key(csv_paths)
+    if os.path.exists(mapping_path):
+        with open(mapping_path, encoding='utf-8') as f:
+            saved = json.load(f)
+        if saved.get('inputs') == inputs:
+            print(f"Entity resolution: using {mapping_path}")
+            return saved['mapping']
+    mapping, report = {}, []
+    for table, col in ENTITY_COLUMNS.items():
+        names = []
+        for path in csv_paths:
+            df = pd.read_csv(path, usecols=lambda c: c == col)
+            if col not in df.columns: continue
+            for val in df[col].dropna():
+                names.extend(parse(val))
+        mapping[table], clusters = resolve_names(names, person=(table == 'Author'))
+        report.extend((table, c, variants) for c, variants in clusters)
+        print(f"{table}: {len(mapping[table])} distinct names -> {len(set(mapping[table].values()))} after resolution")
+    with open(mapping_path, 'w', encoding='utf-8') as f:
+        json.dump({'inputs': inputs, 'mapping': mapping}, f, ensure_ascii=False, indent=1)
+    if report_path:
+        write_report(report_path, report)
+    return mapping
+
+def write_report(path, report):
+    """report: [(kind, canonical, {raw: count}), ...] -> one CSV row per merged variant."""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        w = csv.writer(f)
+        w.writerow(['kind', 'canonical', 'variant', 'occurrences'])
+        for kind, canonical, variants in report:
+            for raw, n in sorted(variants.items(), key=lambda x: -x[1]):
+                w.writerow([kind, canonical, raw, n])
+    print(f"Entity resolution: {len(report)} merged clusters written to {path}")
@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+
+# --- Checkpointed ETL batches ---
+# complete_etl.py splits each stage (entries, every junction table, synonyms, language titles)
+# into numbered batches. A batch's rows and its EtlCheckpoint row (Schema.sql) commit in one
+# transaction, so after a crash the rerun skips exactly the committed batches. Batches must be
+# idempotent (upserts / INSERT IGNORE). The run key is a hash of the input CSVs: a changed
+# dataset starts over instead of resuming. Each checkpoint also stores a digest of its batch's
+# rows, so a batch only counts as done when the rerun derives the same rows for it (the junction
+# stages are built from the entry ids in the database, which a rerun may see differently).
+#
+# Rows the ETL can't load go to a dead-letter file (JSON lines) instead of being skipped with
+# a print; `python python_scripts/complete_etl.py --retry-dead-letters` loads just those.
+
+def run_key(paths):
+    """sha1 over the contents of the input files."""
+    digest = hashlib.sha1()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+def batch_digest(batch, content=repr):
+    """sha1 over content(item) of every item in the batch."""
+    digest = hashlib.sha1()
+    for item in batch:
+        digest.update(content(item).encode('utf-8', 'surrogatepass') + b'\0')
+    return digest.hexdigest()
+
+class EtlCheckpoint:
+    def __init__(self, conn, key):
+        self.conn = conn
+        self.key = key
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = 'EtlCheckpoint' AND column_name = 'digest'
+        """)
+        if not cursor.fetchone()[0]:
+            # Table created before batches were hashed: its rows get '' and are simply redone
+            cursor.execute("ALTER TABLE EtlCheckpoint ADD COLUMN digest CHAR(40) NOT NULL DEFAULT '' AFTER batch_no")
+        cursor.execute("SELECT stage, batch_no, digest FROM EtlCheckpoint WHERE run_key=%s", (key,))
+        self._done = {(stage, batch_no): digest for stage, batch_no, digest in cursor.fetchall()}
+        conn.commit()
+        self.committed_before = len(self._done)  # batches an earlier run committed
+        self.skipped = self.recorded = 0          # this run
+
+    def done(self, stage, batch_no, digest):
+        if self._done.get((stage, batch_no)) != digest: return False
+        self.skipped += 1
+        return True
+
+    def record(self, stage, batch_no, digest, rows_loaded, rows_failed=0):
+        """Mark a batch committed; call inside the batch's transaction, before commit()."""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            INSERT INTO EtlCheckpoint (run_key, stage, batch_no, digest, rows_loaded, rows_failed)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE digest=VALUES(digest), rows_loaded=VALUES(rows_loaded),
+                                    rows_failed=VALUES(rows_failed), committed_at=CURRENT_TIMESTAMP
+        """, (self.key, stage, batch_no, digest, rows_loaded, rows_failed))
+        self._done[(stage, batch_no)] = digest
+        self.recorded += 1
+
+    def reset(self):
+        """Forget this input's progress so the next run loads everything again."""
+        cursor = self.conn.cursor()
+        cursor.execute("DELETE FROM EtlCheckpoint WHERE run_key=%s", (self.key,))
+        self.conn.commit()
+        self._done = {}
+        self.committed_before = 0
+
+def run_batches(conn, checkpoint, stage, items, batch_size, load, content=repr, on_failed=None):
+    """load(batch) -> rows it could not load, as [(row, error)] (None = none); each batch
+    commits with its checkpoint row, and only then are its failures passed to on_failed
+    (so a batch that rolls back and is redone doesn't report them twice).
+    A batch is skipped only if its rows hash (content(item) per item) to what was committed.
+    checkpoint=None runs every batch (dead-letter retries)."""
+    batch_count = (len(items) + batch_size - 1) // batch_size
+    skipped = failed = 0
+    for batch_no in range(batch_count):
+        batch = items[batch_no * batch_size:(batch_no + 1) * batch_size]
+        digest = batch_digest(batch, content) if checkpoint else None
+        if checkpoint and checkpoint.done(stage, batch_no, digest):
+            skipped += 1
+            continue
+        try:
+            failures = load(batch) or []
+            if checkpoint:
+                checkpoint.record(stage, batch_no, digest, len(batch) - len(failures), len(failures))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            print(f"  {stage}: batch {batch_no}/{batch_count} failed; rerun to resume from it")
+            raise
+        if failures and on_failed:
+            on_failed(failures)
+        failed += len(failures)
+    if batch_count:
+        resumed = f", {skipped} already committed" if skipped else ""
+        dead = f", {failed} rows dead-lettered" if failed else ""
+        print(f"  {stage}: {batch_count} batches{resumed}{dead}")
+
+# --- Dead letters ---
+
+def _json_value(v):
+    if hasattr(v, 'item'): return v.item()  # NumPy scalars
+    return v.isoformat() if hasattr(v, 'isoformat') else str(v)
+
+def write_dead_letter(path, medium_type, row, error):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'medium': medium_type, 'error': str(error),
+                            'failed_at': datetime.now().isoformat(timespec='seconds'),
+                            'row': dict(row)}, default=_json_value, ensure_ascii=False) + '\n')
+
+def take_dead_letters(path):
+    """Move the dead-letter file aside and return its rows grouped by medium. The file is
+    reused for rows that fail again; the moved copy is removed by finish_dead_letters()."""
+    retrying = path + '.retrying'
+    if os.path.exists(path):
+        if os.path.exists(retrying):  # an earlier retry died: keep both sets
+            with open(path, encoding='utf-8') as src, open(retrying, 'a', encoding='utf-8') as dst:
+                dst.write(src.read())
+            os.remove(path)
+        else:
+            os.replace(path, retrying)
+    rows = {}
+    if os.path.exists(retrying):
+        with open(retrying, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    letter = json.loads(line)
+                    rows.setdefault(letter['medium'], []).append(letter['row'])
+    return rows
+
+def finish_dead_letters(path):
+    if os.path.exists(path + '.retrying'):
+        os.remove(path + '.retrying')
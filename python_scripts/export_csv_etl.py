@@ -5,6 +5,8 @@ from datetime import datetime
 import csv
 import os
 import numpy as np
+from entity_resolution import resolve_csvs, split_author_name
+from validate_exports import validate_exports
 
 OUTPUT_DIR = 'csv_exports'
 CSV_PATHS = {
@@ -12,6 +14,10 @@ CSV_PATHS = {
     'manga': 'raw_data/manga_entries.csv'
 }
 
+# Merge spelling / Unicode / romanization variants before ids are assigned; uses the same
+# saved mapping as complete_etl.py (see entity_resolution.py)
+RESOLVE_ENTITIES = True
+
 # --- Data Stores ---
 maps = {
     'Genre': {}, 'Theme': {}, 'Demographic': {}, 
@@ -26,6 +32,7 @@ counters = {k: 0 for k in maps}
 counters['Entry'] = 0
 
 lookup_rows = {k: [] for k in maps}
+resolved = {}  # table -> {raw: canonical}
 
 # --- Parsing Helpers ---
 def parse_date_range(date_str):
@@ -75,6 +82,11 @@ def parse_broadcast(broad_str):
         return m.group(1), m.group(2), m.group(3)
     return None, None, None
 
+def parse_synonyms(syn_val):
+    syns = str(syn_val if syn_val is not None else '')
+    if not syns or syns.lower() in ['nan','none','']: return []
+    return [x.strip() for x in syns.split(',') if x.strip()]
+
 # --- ID Management ---
 def register_lookup(table, key, row_data_func):
     if key in maps[table]: return maps[table][key]
@@ -84,6 +96,9 @@ def register_lookup(table, key, row_data_func):
     lookup_rows[table].append(row_data_func(new_id))
     return new_id
 
+def canonical(table, raw):
+    return resolved.get(table, {}).get(raw, raw)
+
 # --- Main Processing ---
 def run():
     print("Initializing CSV Export...")
@@ -94,6 +109,10 @@ def run():
     register_lookup('Language', 'German', lambda i: [i, 'German'])
     register_lookup('Language', 'French', lambda i: [i, 'French'])
     register_lookup('Language', 'Spanish', lambda i: [i, 'Spanish'])
+
+    if RESOLVE_ENTITIES:
+        resolved.update(resolve_csvs(CSV_PATHS.values(), parse_list,
+                                     report_path=f'{OUTPUT_DIR}/entity_resolution_report.csv'))
     
     # File pointers
     f_entry = open(f'{OUTPUT_DIR}/Entry.csv', 'w', newline='', encoding='utf-8')
@@ -160,8 +179,10 @@ def run():
                 ])
                 
                 for p in parse_list(row.get('producers')):
+                    p = canonical('Producer', p)
                     junctions['EntryProducer'].append([e_id, register_lookup('Producer', p, lambda i: [i, p])])
                 for s in parse_list(row.get('studios')):
+                    s = canonical('Studio', s)
                     junctions['EntryStudio'].append([e_id, register_lookup('Studio', s, lambda i: [i, s])])
                 for l in parse_list(row.get('licensors')):
                     junctions['EntryLicensor'].append([e_id, register_lookup('Licensor', l, lambda i: [i, l])])
@@ -171,9 +192,8 @@ def run():
                 w_manga.writerow([e_id, s_date, e_date, row.get('volumes'), row.get('chapters'), stat_id])
                 
                 for auth in parse_list(row.get('authors')):
-                    parts = auth.split(',')
-                    if len(parts) == 2: lname, fname = parts[0].strip(), parts[1].strip()
-                    else: lname, fname = auth.strip(), None
+                    auth = canonical('Author', auth)
+                    fname, lname = split_author_name(auth)
                     junctions['EntryAuthor'].append([e_id, register_lookup('Author', auth, lambda i: [i, fname, lname, auth])])
                     
                 for ser in parse_list(row.get('serialization')):
@@ -187,10 +207,8 @@ def run():
             for d in parse_list(row.get('demographic')):
                 junctions['EntryDemographic'].append([e_id, register_lookup('Demographic', d, lambda i: [i, d])])
                 
-            syns = str(row.get('synonymns',''))
-            if syns and syns.lower() not in ['nan','none','']:
-                for s in [x.strip() for x in syns.split(',') if x.strip()]:
-                    junctions['EntrySynonym'].append([e_id, register_lookup('Synonym', s, lambda i: [i, s])])
+            for s in parse_synonyms(row.get('synonymns')):
+                junctions['EntrySynonym'].append([e_id, register_lookup('Synonym', s, lambda i: [i, s])])
                     
             # Language Entries
             lang_cols = {
@@ -230,6 +248,10 @@ def run():
     write_csv('StatusType', ['status_id','medium_type','status_name'], lookup_rows['StatusType'])
     write_csv('ItemType', ['item_type_id','medium_type','type_name'], lookup_rows['ItemType'])
     
+    # Same pair listed twice in a source row (the DB path drops these in batch_ins)
+    for k in junctions:
+        junctions[k] = list(dict.fromkeys(map(tuple, junctions[k])))
+
     write_csv('EntryGenre', ['entry_id','genre_id'], junctions['EntryGenre'])
     write_csv('EntryTheme', ['entry_id','theme_id'], junctions['EntryTheme'])
     write_csv('EntryDemographic', ['entry_id','demographic_id'], junctions['EntryDemographic'])
@@ -241,6 +263,8 @@ def run():
     write_csv('EntrySynonym', ['entry_id','synonym_id'], junctions['EntrySynonym'])
     
     print(f"Export Complete. Files saved in {OUTPUT_DIR}/")
+    # Reject a bad export before anyone spends an hour loading it
+    return validate_exports(OUTPUT_DIR)
 
 if __name__ == '__main__':
-    run()
+    if not run(): raise SystemExit(1)
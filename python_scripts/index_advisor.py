@@ -0,0 +1,262 @@
+import argparse
+import json
+import os
+import re
+import statistics
+import time
+import mysql.connector
+from mysql.connector import Error
+from complete_etl import DB_CONFIG, REPLICA_CONFIGS
+
+# Workload-driven index advisor.
+#
+# 1. capture: pull the normalized statement workload (web app + ETL alike) from
+#    performance_schema.events_statements_summary_by_digest into a JSON file.
+#       python python_scripts/index_advisor.py capture --reset    # start a fresh window
+#       ... exercise the app / run the ETL ...
+#       python python_scripts/index_advisor.py capture -o workload.json
+# 2. advise: EXPLAIN each captured SELECT against a LOCAL COPY of the database, derive
+#    composite / covering index candidates from the plans, create each candidate, keep it
+#    only if the measured workload latency improves, and write an idempotent migration.
+#       python python_scripts/index_advisor.py --host 127.0.0.1 --port 3307 --database copy_db \
+#           advise workload.json -o index_migration.sql
+#    advise needs an explicit --host/--database and refuses the configured primary / replicas.
+
+MIN_GAIN = 0.10   # keep an index only if the weighted workload time drops by >= 10%
+RUNS = 5          # timing runs per query (median is used)
+TOP_QUERIES = 25  # most expensive digests considered
+
+# Tables whose primary key is (entry_id, <x>_id): filtering by <x>_id alone can't use the PK
+JUNCTION_TABLES = {
+    'EntryGenre': 'genre_id', 'EntryTheme': 'theme_id', 'EntryDemographic': 'demographic_id',
+    'EntryStudio': 'studio_id', 'EntryProducer': 'producer_id', 'EntryLicensor': 'licensor_id',
+    'EntryAuthor': 'author_id', 'EntrySerialization': 'serialization_id', 'EntrySynonym': 'synonym_id',
+    'LanguageEntry': 'language_id'
+}
+
+# The migration reuses the CreateIndexIfMissing helper defined in SQL_Indexes.sql
+INDEXES_SQL = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'advanced_features', 'SQL_Indexes.sql')
+
+def create_if_missing_proc():
+    """The DELIMITER block defining CreateIndexIfMissing, as written in SQL_Indexes.sql."""
+    with open(INDEXES_SQL, encoding='utf-8') as f:
+        match = re.search(r'DELIMITER //\n.*?CreateIndexIfMissing.*?DELIMITER ;\n', f.read(), re.S)
+    return match.group(0)
+
+def same_server(a, b):
+    local = ('localhost', '127.0.0.1', '::1')
+    host_a, host_b = (h if h not in local else 'localhost' for h in (a.get('host'), b.get('host')))
+    return host_a == host_b and a.get('port', 3306) == b.get('port', 3306)
+
+def is_live_database(config):
+    """True if config points at the configured primary or a replica of it."""
+    return any(same_server(config, live) and config.get('database') == live.get('database')
+               for live in [DB_CONFIG] + REPLICA_CONFIGS)
+
+# --- 1. Workload capture ---
+
+def capture(conn, output, reset):
+    cursor = conn.cursor(dictionary=True)
+    if reset:
+        cursor.execute("TRUNCATE TABLE performance_schema.events_statements_summary_by_digest")
+        print("Digest statistics reset; run the workload, then capture again.")
+        return
+    cursor.execute("""
+        SELECT DIGEST, DIGEST_TEXT, QUERY_SAMPLE_TEXT, COUNT_STAR,
+               SUM_TIMER_WAIT / 1e12 AS total_seconds, SUM_ROWS_EXAMINED
+        FROM performance_schema.events_statements_summary_by_digest
+        WHERE SCHEMA_NAME = DATABASE() AND DIGEST_TEXT IS NOT NULL
+        ORDER BY SUM_TIMER_WAIT DESC
+    """)
+    workload = [{
+        'digest': r['DIGEST'], 'normalized': r['DIGEST_TEXT'], 'sample': r['QUERY_SAMPLE_TEXT'],
+        'count': int(r['COUNT_STAR']), 'total_seconds': float(r['total_seconds']),
+        'rows_examined': int(r['SUM_ROWS_EXAMINED'])
+    } for r in cursor.fetchall()]
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(workload, f, indent=2)
+    print(f"Captured {len(workload)} statement digests into {output}")
+
+def load_workload(path):
+    with open(path, encoding='utf-8') as f:
+        workload = json.load(f)
+    # Only complete SELECT samples can be EXPLAINed / re-timed safely
+    usable = [w for w in workload if w['sample'] and re.match(r'\s*SELECT\b', w['sample'], re.I)
+              and not w['sample'].rstrip().endswith('...')]
+    return sorted(usable, key=lambda w: -w['total_seconds'])[:TOP_QUERIES]
+
+# --- 2. Plan analysis ---
+
+def alias_map(sql):
+    aliases = {}
+    for table, alias in re.findall(r'\b(?:FROM|JOIN)\s+`?(\w+)`?(?:\s+(?:AS\s+)?`?(\w+)`?)?', sql, re.I):
+        aliases[table] = table
+        if alias and alias.upper() not in ('WHERE', 'ON', 'JOIN', 'LEFT', 'INNER', 'ORDER', 'GROUP', 'LIMIT'):
+            aliases[alias] = table
+    return aliases
+
+def table_accesses(plan):
+    """Yield every 'table' node of an EXPLAIN FORMAT=JSON plan."""
+    if isinstance(plan, dict):
+        if 'table_name' in plan and 'access_type' in plan:
+            yield plan
+        for v in plan.values():
+            yield from table_accesses(v)
+    elif isinstance(plan, list):
+        for v in plan:
+            yield from table_accesses(v)
+
+def candidates_for(sql, plan):
+    aliases = alias_map(sql)
+    order_cols = re.findall(r'ORDER BY\s+`?(\w+)`?\.`?(\w+)`?', sql, re.I)
+    found = []
+    for node in table_accesses(plan):
+        table = aliases.get(node['table_name'])
+        if not table: continue
+        full_scan = node['access_type'] in ('ALL', 'index')
+        cond = node.get('attached_condition', '')
+        eq, rng = [], []
+        for alias, col, op in re.findall(r'`(\w+)`\.`(\w+)`\s*(=|>=|<=|>|<)\s*', cond):
+            if aliases.get(alias) != table: continue
+            (eq if op == '=' else rng).append(col)
+        eq = list(dict.fromkeys(eq))
+
+        if table in JUNCTION_TABLES and (full_scan or JUNCTION_TABLES[table] in eq):
+            # Reverse junction index: filter by the lookup id, read entry_id from the index
+            found.append((table, (JUNCTION_TABLES[table], 'entry_id')))
+        elif full_scan and (eq or rng):
+            cols = eq + rng[:1]
+            for alias, col in order_cols:
+                if aliases.get(alias) == table and not rng and col not in cols:
+                    cols.append(col)  # equality prefix + ORDER BY column avoids the filesort
+            found.append((table, tuple(cols)))
+    return found
+
+def existing_indexes(cursor):
+    cursor.execute("""
+        SELECT table_name, index_name, GROUP_CONCAT(column_name ORDER BY seq_in_index) AS cols
+        FROM information_schema.statistics WHERE table_schema = DATABASE()
+        GROUP BY table_name, index_name
+    """)
+    return {(row[0], tuple((row[2] or '').split(','))) for row in cursor.fetchall()}
+
+def is_covered(table, cols, existing):
+    # An existing index whose leading columns match the candidate already serves it
+    return any(t == table and ex[:len(cols)] == cols for t, ex in existing)
+
+def index_name(table, cols):
+    return f"idx_adv_{table.lower()}_{'_'.join(cols)}"[:64]
+
+# --- 3. Measurement ---
+
+def time_query(cursor, sql):
+    runs = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        cursor.execute(sql)
+        cursor.fetchall()
+        runs.append(time.perf_counter() - start)
+    return statistics.median(runs)
+
+def workload_cost(cursor, workload):
+    """Per-query median latencies and their total weighted by how often each query ran."""
+    latencies = [time_query(cursor, w['sample']) for w in workload]
+    return latencies, sum(lat * w['count'] for lat, w in zip(latencies, workload))
+
+def explain_analyze(cursor, sql):
+    try:
+        cursor.execute("EXPLAIN ANALYZE " + sql)
+        return cursor.fetchall()[0][0]
+    except Error:
+        return None  # MySQL < 8.0.18
+
+def advise(conn, workload_path, output, show_analyze):
+    workload = load_workload(workload_path)
+    if not workload:
+        print("No usable SELECT samples in the workload.")
+        return
+    cursor = conn.cursor()
+    existing = existing_indexes(cursor)
+
+    candidates = {}
+    usable = []
+    for w in workload:
+        try:
+            cursor.execute("EXPLAIN FORMAT=JSON " + w['sample'])
+            plan = json.loads(cursor.fetchone()[0])
+        except Error as e:
+            # e.g. a table that only exists on the live server, or a truncated sample
+            print(f"  skipped {w['normalized'][:80]!r}: {e}")
+            continue
+        usable.append(w)
+        for table, cols in candidates_for(w['sample'], plan):
+            if not is_covered(table, cols, existing):
+                candidates.setdefault((table, cols), []).append(w['digest'])
+        if show_analyze:
+            print(f"\n-- {w['normalized'][:120]}\n{explain_analyze(cursor, w['sample'])}")
+    print(f"{len(usable)} of {len(workload)} queries analysed, {len(candidates)} index candidates")
+    workload = usable  # only these are timed
+
+    _, base_total = workload_cost(cursor, workload)
+    accepted = []
+    for (table, cols), digests in candidates.items():
+        name = index_name(table, cols)
+        try:
+            cursor.execute(f"CREATE INDEX {name} ON {table} ({', '.join(cols)})")
+        except Error as e:
+            print(f"  {name}: skipped ({e})")  # e.g. TEXT columns need a prefix length
+            continue
+        _, total = workload_cost(cursor, workload)
+        gain = 1 - total / base_total if base_total else 0
+        print(f"  {name}: weighted workload {base_total * 1000:.1f} -> {total * 1000:.1f} ms ({gain:+.0%})")
+        if gain >= MIN_GAIN:
+            accepted.append((table, cols, name, base_total, total))
+            base_total = total  # later candidates must beat the improved plan
+        else:
+            cursor.execute(f"DROP INDEX {name} ON {table}")
+    write_migration(output, accepted, workload_path)
+
+def write_migration(output, accepted, workload_path):
+    with open(output, 'w', encoding='utf-8') as f:
+        f.write("-- =========================================================\n")
+        f.write(f"-- Index migration generated by index_advisor.py from {workload_path}\n")
+        f.write("-- Idempotent: each index is only created if it does not exist yet.\n")
+        f.write("-- =========================================================\n\n")
+        f.write("USE myanimelist_db_v2;\n\n" + create_if_missing_proc() + "\n")
+        for table, cols, name, before, after in accepted:
+            f.write(f"-- Weighted workload latency: {before * 1000:.1f} ms -> {after * 1000:.1f} ms\n")
+            f.write(f"CALL CreateIndexIfMissing('{table}', '{name}', '{', '.join(cols)}');\n\n")
+    print(f"Wrote {len(accepted)} indexes to {output}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Workload-driven index advisor.')
+    # capture defaults to DB_CONFIG; advise creates and drops indexes, so its target must be explicit
+    parser.add_argument('--host', help='Server to use (capture: default DB_CONFIG; advise: required)')
+    parser.add_argument('--port', type=int, default=DB_CONFIG.get('port', 3306))
+    parser.add_argument('--database', help='Database to use (capture: default DB_CONFIG; advise: required)')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_cap = sub.add_parser('capture', help='Save the performance_schema digest workload')
+    p_cap.add_argument('-o', '--output', default='workload.json')
+    p_cap.add_argument('--reset', action='store_true', help='Clear digest statistics instead')
+    p_adv = sub.add_parser('advise', help='Propose, measure and emit indexes (run on a local copy!)')
+    p_adv.add_argument('workload')
+    p_adv.add_argument('-o', '--output', default='index_migration.sql')
+    p_adv.add_argument('--analyze', action='store_true', help='Print EXPLAIN ANALYZE for each query')
+    args = parser.parse_args()
+
+    if args.command == 'advise':
+        if not args.host or not args.database:
+            parser.error('advise needs --host and --database of a local copy of the database')
+        target = dict(DB_CONFIG, host=args.host, port=args.port, database=args.database)
+        if is_live_database(target):
+            parser.error(f"refusing to advise on {args.host}:{args.port}/{args.database}: it is the "
+                         "configured primary (or a replica); restore a copy elsewhere and point at that")
+    else:
+        target = dict(DB_CONFIG, host=args.host or DB_CONFIG['host'], port=args.port,
+                      database=args.database or DB_CONFIG['database'])
+    conn = mysql.connector.connect(**target)
+    if args.command == 'capture':
+        capture(conn, args.output, args.reset)
+    else:
+        advise(conn, args.workload, args.output, args.analyze)
+    conn.close()
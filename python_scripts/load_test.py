@@ -0,0 +1,85 @@
+import argparse
+import json
+import random
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# Load test for the read API.
+# Replays a dashboard-like mix (search-as-you-type + metadata + entry detail) against
+# one or more servers and reports throughput / latency, e.g. to compare the Flask app
+# (port 5000) with the async ASGI app (port 5001):
+#   python python_scripts/load_test.py http://127.0.0.1:5000 http://127.0.0.1:5001 -c 64
+
+TITLE_PREFIXES = ['a', 'sh', 'na', 'one', 'kimi', 'attack', 'fr', 'dragon', 'gin', 'su']
+SEARCH_FILTERS = [
+    {},
+    {'medium': 'anime'},
+    {'medium': 'manga'},
+    {'genre_id': '1'},
+    {'season': 'Fall', 'year': '2023'},
+    {'score_min': '8'}
+]
+
+def discover_entry_ids(base_url, n=200):
+    with urllib.request.urlopen(f"{base_url}/api/search?limit={n}") as res:
+        return [row['entry_id'] for row in json.load(res)] or [1]
+
+def build_workload(entry_ids, total):
+    """Fixed mix: 60% search, 30% entry detail, 10% metadata."""
+    rnd = random.Random(42)
+    paths = []
+    for _ in range(total):
+        r = rnd.random()
+        if r < 0.6:
+            params = dict(rnd.choice(SEARCH_FILTERS))
+            if rnd.random() < 0.5:
+                params['title'] = rnd.choice(TITLE_PREFIXES)
+            paths.append('/api/search?' + urllib.parse.urlencode(params))
+        elif r < 0.9:
+            paths.append(f"/api/entry/{rnd.choice(entry_ids)}")
+        else:
+            paths.append('/api/metadata')
+    return paths
+
+def timed_get(url):
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=30) as res:
+            res.read()
+            ok = res.status == 200
+    except Exception:
+        ok = False
+    return time.perf_counter() - start, ok
+
+def run(base_url, paths, concurrency):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed_get, [base_url + p for p in paths]))
+    wall = time.perf_counter() - start
+
+    latencies = sorted(t for t, _ in results)
+    errors = sum(1 for _, ok in results if not ok)
+    pct = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+    print(f"{base_url}: {len(paths)} req, concurrency {concurrency}, errors {errors}")
+    print(f"  throughput {len(paths) / wall:8.1f} req/s | p50 {pct(0.50):7.1f} ms | p95 {pct(0.95):7.1f} ms | p99 {pct(0.99):7.1f} ms")
+    return len(paths) / wall
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Concurrent load test for the read API.')
+    parser.add_argument('urls', nargs='+', help='Base URLs to compare, e.g. http://127.0.0.1:5000')
+    parser.add_argument('-c', '--concurrency', type=int, default=32)
+    parser.add_argument('-n', '--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    entry_ids = discover_entry_ids(args.urls[0])
+    paths = build_workload(entry_ids, args.requests)
+
+    baseline = None
+    for url in args.urls:
+        rps = run(url.rstrip('/'), paths, args.concurrency)
+        if baseline is None:
+            baseline = rps
+        else:
+            print(f"  speedup vs {args.urls[0]}: {rps / baseline:.2f}x")
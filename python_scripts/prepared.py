@@ -0,0 +1,76 @@
+from collections import OrderedDict
+from mysql.connector import Error, HAVE_CEXT, errorcode
+
+# --- Server-side prepared statements ---
+# execute(conn, sql, params) prepares `sql` on the connection the first time it sees that
+# text and re-executes the same statement handle afterwards: the server skips the parse,
+# and parameters travel in the binary protocol instead of being escaped into the SQL.
+# The hot statements are declared once as constants (queries.py, complete_etl.py),
+# so each is prepared once per session. Handles live on the MySQL session: the cache is keyed
+# by the server's connection id, so a reconnect starts it over, and db_router calls forget()
+# when it hands a connection back to the pool (the pool resets the session, which drops every
+# handle but keeps the id). Within a session the cache is bounded by
+# MAX_STATEMENTS_PER_CONNECTION (least recently used handle is closed).
+# mysql.connector picks its C extension when it is installed (HAVE_CEXT); both share this path.
+
+MAX_STATEMENTS_PER_CONNECTION = 64
+
+def _session(conn):
+    conn = getattr(conn, '_conn', conn)  # db_router.RoutedConnection
+    return getattr(conn, '_cnx', conn)   # pooling.PooledMySQLConnection
+
+def _statements(session):
+    connection_id = getattr(session, 'connection_id', None)
+    owner, cache = getattr(session, '_prepared_statements', (None, None))
+    if cache is None or owner != connection_id:
+        # First use, or reconnected since: the server session that held the handles is gone
+        cache = OrderedDict()
+        session._prepared_statements = (connection_id, cache)
+    return cache
+
+def _prepared_cursor(session, sql, dictionary):
+    # The cursor only skips re-preparing when handed the very string object it prepared,
+    # so the cache keeps the first copy of each text and always executes that one
+    cache = _statements(session)
+    key = (sql, dictionary)
+    entry = cache.get(key)
+    if entry is None:
+        entry = cache[key] = (sql, session.cursor(prepared=True, dictionary=dictionary))
+        if len(cache) > MAX_STATEMENTS_PER_CONNECTION:
+            _, (_, oldest) = cache.popitem(last=False)
+            oldest.close()  # deallocates the statement on the server
+    else:
+        cache.move_to_end(key)
+    return entry
+
+def forget(conn):
+    """Drop the cached handles of a connection (e.g. when its session is about to be reset)."""
+    session = _session(conn)
+    if hasattr(session, '_prepared_statements'):
+        del session._prepared_statements
+
+def execute(conn, sql, params=(), dictionary=False):
+    """Run `sql` (%s placeholders) as a prepared statement on conn; returns the cursor.
+    Fetch all rows before the next statement on the same connection."""
+    session = _session(conn)
+    text, cursor = _prepared_cursor(session, sql, dictionary)
+    try:
+        cursor.execute(text, params)
+    except Error as e:
+        if e.errno != errorcode.ER_UNKNOWN_STMT_HANDLER: raise
+        # Reconnected or reset session: the server no longer knows our handles
+        forget(session)
+        text, cursor = _prepared_cursor(session, sql, dictionary)
+        cursor.execute(text, params)
+    return cursor
+
+def fetchall(conn, sql, params=(), dictionary=False):
+    return execute(conn, sql, params, dictionary).fetchall()
+
+def fetchone(conn, sql, params=(), dictionary=False):
+    rows = fetchall(conn, sql, params, dictionary)
+    return rows[0] if rows else None
+
+def stats(conn):
+    """Statements currently prepared on conn, and whether the C extension is in use."""
+    return {'prepared': len(_statements(_session(conn))), 'c_extension': HAVE_CEXT}
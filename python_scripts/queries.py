@@ -0,0 +1,155 @@
+# --- Shared SQL for the web servers (web_interface/app.py, async_app.py), the catalog
+# snapshot and the benchmarks. Lives with the scripts: web_interface imports from here,
+# never the other way round. ---
+
+# Lookup tables shown in the search / insert dropdowns (table -> ORDER BY column)
+LOOKUP_TABLES = {
+    'Genre': 'name',
+    'Theme': 'name',
+    'Demographic': 'name',
+    'Source': 'source_name',
+    'Medium': 'name',
+    'Studio': 'name',
+    'Licensor': 'name',
+    'Producer': 'name',
+    'StatusType': 'status_name',
+    'AgeRating': 'code',
+    'Serialization': 'name'
+}
+
+ITEM_TYPE_QUERY = """
+    SELECT it.item_type_id, it.type_name, m.name as medium_type
+    FROM ItemType it
+    JOIN Medium m ON it.medium_id = m.medium_id
+    ORDER BY it.type_name
+"""
+
+AUTHOR_QUERY = "SELECT author_id, CONCAT_WS(', ', last_name, first_name) as display_name FROM Author ORDER BY last_name"
+
+ENTRY_QUERY = """
+    SELECT e.*, m.name as medium_type
+    FROM Entry e
+    JOIN ItemType it ON e.item_type_id = it.item_type_id
+    JOIN Medium m ON it.medium_id = m.medium_id
+    WHERE e.entry_id = %s
+"""
+
+# Junctions returned by /api/entry/<id>: (json key, table, id column)
+COMMON_JUNCTIONS = [
+    ('genres', 'EntryGenre', 'genre_id'),
+    ('themes', 'EntryTheme', 'theme_id'),
+    ('demographics', 'EntryDemographic', 'demographic_id')
+]
+ANIME_JUNCTIONS = [
+    ('studios', 'EntryStudio', 'studio_id'),
+    ('producers', 'EntryProducer', 'producer_id'),
+    ('licensors', 'EntryLicensor', 'licensor_id')
+]
+MANGA_JUNCTIONS = [
+    ('authors', 'EntryAuthor', 'author_id'),
+    ('serializations', 'EntrySerialization', 'serialization_id')
+]
+
+# Per-table statements, built once here so app.py executes the same text every time
+# (each is prepared once per pooled connection, see prepared.py)
+DETAILS_QUERIES = {
+    'anime': "SELECT * FROM AnimeDetails WHERE entry_id=%s",
+    'manga': "SELECT * FROM MangaDetails WHERE entry_id=%s"
+}
+ALL_JUNCTIONS = COMMON_JUNCTIONS + ANIME_JUNCTIONS + MANGA_JUNCTIONS
+JUNCTION_IDS_QUERIES = {tbl: f"SELECT {col} FROM {tbl} WHERE entry_id=%s" for _, tbl, col in ALL_JUNCTIONS}
+JUNCTION_INSERTS = {tbl: f"INSERT INTO {tbl} (entry_id, {col}) VALUES (%s, %s)" for _, tbl, col in ALL_JUNCTIONS}
+JUNCTION_DELETES = {tbl: f"DELETE FROM {tbl} WHERE entry_id=%s" for _, tbl, col in ALL_JUNCTIONS}
+
+# M2M search filters: (request arg, packed id column in EntrySearch)
+M2M_FILTERS = [
+    ('genre_id', 'genre_ids'),
+    ('theme_id', 'theme_ids'),
+    ('demographic_id', 'demographic_ids'),
+    ('studio_id', 'studio_ids'),
+    ('producer_id', 'producer_ids'),
+    ('licensor_id', 'licensor_ids'),
+    ('author_id', 'author_ids'),
+    ('serialization_id', 'serialization_ids')
+]
+
+def build_search_filters(args):
+    """WHERE clauses (each starting with AND) and params for the /api/search filters."""
+    query = ""
+    params = []
+
+    # 1. Standard Filters
+    if args.get('title'):
+        query += " AND es.title_name LIKE %s"
+        params.append(f"%{args.get('title')}%")
+
+    if args.get('score_min'):
+        query += " AND es.score >= %s"
+        params.append(args.get('score_min'))
+
+    medium = args.get('medium')
+    if medium and medium != 'all':
+        query += " AND es.medium_type = %s"
+        params.append(medium)
+
+    if args.get('item_type_id'):
+        query += " AND es.item_type_id = %s"
+        params.append(args.get('item_type_id'))
+
+    if args.get('year'):
+        query += " AND es.premier_date_year = %s"
+        params.append(args.get('year'))
+
+    if args.get('season'):
+        query += " AND es.premier_date_season = %s"
+        params.append(args.get('season'))
+
+    if args.get('status_id'):
+        query += " AND es.status_id = %s"
+        params.append(args.get('status_id'))
+
+    if args.get('source_id'):
+        query += " AND es.source_id = %s"
+        params.append(args.get('source_id'))
+
+    if args.get('age_rating_id'):
+        query += " AND es.age_rating_id = %s"
+        params.append(args.get('age_rating_id'))
+
+    # 2. M2M Filters against the packed id sets (multi-valued indexes)
+    for param, col in M2M_FILTERS:
+        val = args.get(param)
+        if val:
+            query += f" AND CAST(%s AS UNSIGNED) MEMBER OF (es.{col})"
+            params.append(val)
+    return query, params
+
+def build_search_query(args):
+    """Build the /api/search SQL and params from a request.args-like mapping."""
+    # Single-table scan over the EntrySearch projection (see Schema.sql)
+    query = """
+        SELECT es.entry_id, es.title_name, es.score, es.medium_type, es.type_name,
+               es.episodes, es.volumes, es.ranked, es.popularity,
+               es.status_name, es.age_rating,
+               es.premier_date_season, es.premier_date_year
+        FROM EntrySearch es
+        WHERE 1=1
+    """
+    filters, params = build_search_filters(args)
+    query += filters
+
+    # Limit Logic
+    try:
+        limit = int(args.get('limit', 50))
+    except (ValueError, TypeError):
+        limit = 50
+
+    query += " ORDER BY es.popularity ASC LIMIT %s"
+    params.append(limit)
+    return query, params
+
+def build_search_ids_query(args):
+    """All entry ids matching the /api/search filters (no limit); None if no filter is set."""
+    filters, params = build_search_filters(args)
+    if not params: return None, []
+    return "SELECT es.entry_id FROM EntrySearch es WHERE 1=1" + filters + " ORDER BY es.entry_id", params
@@ -0,0 +1,137 @@
+import threading
+import time
+import numpy as np
+import mysql.connector
+from search_projection import refresh_entry_search
+
+# --- Rank maintenance for Entry.ranked / Entry.popularity ---
+# ranked     = dense rank by score (desc) within a medium, for entries with >= MIN_SCORED_BY votes
+# popularity = dense rank by members (desc) within a medium
+# Everything is computed with NumPy sorts; only rows whose rank changed are written back,
+# with batched multi-row UPDATE ... CASE statements.
+#   python python_scripts/recompute_ranks.py
+
+MIN_SCORED_BY = 1
+UPDATE_CHUNK = 1000
+
+def dense_rank_desc(values, groups, valid):
+    """Dense rank of values (largest = 1) restricted to rows where valid, restarting per group.
+    Returns an int64 array with 0 for rows that get no rank."""
+    ranks = np.zeros(len(values), dtype=np.int64)
+    idx = np.flatnonzero(valid)
+    if len(idx) == 0: return ranks
+    order = idx[np.lexsort((-values[idx], groups[idx]))]
+    g, v = groups[order], values[order]
+    new_group = np.r_[True, g[1:] != g[:-1]]
+    new_value = new_group | np.r_[True, v[1:] != v[:-1]]
+    dense = np.cumsum(new_value)
+    group_no = np.cumsum(new_group) - 1
+    ranks[order] = dense - dense[new_group][group_no] + 1
+    return ranks
+
+def compute_ranks(medium, score, scored_by, members):
+    ranked = dense_rank_desc(score, medium, ~np.isnan(score) & (np.nan_to_num(scored_by) >= MIN_SCORED_BY))
+    popularity = dense_rank_desc(members, medium, ~np.isnan(members))
+    return ranked, popularity
+
+def load_rank_inputs(cursor, medium_ids=None):
+    query = """
+        SELECT e.entry_id, COALESCE(it.medium_id, 0), e.score, e.scored_by, e.members, e.ranked, e.popularity
+        FROM Entry e
+        LEFT JOIN ItemType it ON e.item_type_id = it.item_type_id
+    """
+    params = []
+    if medium_ids:
+        query += f" WHERE it.medium_id IN ({', '.join(['%s'] * len(medium_ids))})"
+        params = list(medium_ids)
+    cursor.execute(query, params)
+    # None -> NaN, Decimal -> float in one conversion
+    data = np.array(cursor.fetchall(), dtype=np.float64).reshape(-1, 7)
+    return [data[:, i] for i in range(7)]
+
+def write_changed(cursor, entry_ids, ranked, popularity):
+    for i in range(0, len(entry_ids), UPDATE_CHUNK):
+        ids = entry_ids[i:i + UPDATE_CHUNK]
+        r = [int(x) or None for x in ranked[i:i + UPDATE_CHUNK]]
+        p = [int(x) or None for x in popularity[i:i + UPDATE_CHUNK]]
+        cases = ' '.join(['WHEN %s THEN %s'] * len(ids))
+        params = [x for pair in zip(ids, r) for x in pair] + [x for pair in zip(ids, p) for x in pair] + ids
+        cursor.execute(f"""
+            UPDATE Entry
+            SET ranked = CASE entry_id {cases} END,
+                popularity = CASE entry_id {cases} END
+            WHERE entry_id IN ({', '.join(['%s'] * len(ids))})
+        """, params)
+
+def recompute_ranks(conn, entry_ids=None, refresh_projection=True):
+    """Recompute ranks and commit the changed rows; returns the list of changed entry ids.
+
+    With entry_ids (e.g. the rows of a write batch), only the media those entries belong
+    to are re-ranked. Ranks are global within a medium, so that is the smallest safe scope.
+    """
+    start = time.perf_counter()
+    cursor = conn.cursor()
+    medium_ids = None
+    if entry_ids is not None:
+        entry_ids = list(entry_ids)
+        if not entry_ids: return []
+        cursor.execute(f"""
+            SELECT DISTINCT it.medium_id FROM Entry e JOIN ItemType it ON e.item_type_id = it.item_type_id
+            WHERE e.entry_id IN ({', '.join(['%s'] * len(entry_ids))})
+        """, entry_ids)
+        medium_ids = [row[0] for row in cursor.fetchall()]
+        if not medium_ids: return []
+
+    ids, medium, score, scored_by, members, old_ranked, old_pop = load_rank_inputs(cursor, medium_ids)
+    ranked, popularity = compute_ranks(medium, score, scored_by, members)
+
+    changed = (ranked != np.nan_to_num(old_ranked).astype(np.int64)) | \
+              (popularity != np.nan_to_num(old_pop).astype(np.int64))
+    changed_ids = ids[changed].astype(np.int64).tolist()
+    write_changed(cursor, changed_ids, ranked[changed], popularity[changed])
+    if refresh_projection and changed_ids:
+        refresh_entry_search(cursor, changed_ids)
+    conn.commit()
+    print(f"Ranks: {len(ids)} entries checked, {len(changed_ids)} updated in {time.perf_counter() - start:.2f}s")
+    return changed_ids
+
+class DebouncedRankRefresh:
+    """Collects entry ids from many writes and re-ranks once, `delay` seconds after the last one.
+    schedule(None) asks for a full re-rank (e.g. after a delete, when the medium is gone)."""
+    def __init__(self, get_connection, delay=5.0, on_done=None):
+        self.get_connection = get_connection
+        self.delay = delay
+        self.on_done = on_done
+        self._ids = set()
+        self._full = False
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def schedule(self, entry_ids):
+        with self._lock:
+            if entry_ids is None: self._full = True
+            else: self._ids.update(entry_ids)
+            if self._timer: self._timer.cancel()
+            self._timer = threading.Timer(self.delay, self._run)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _run(self):
+        with self._lock:
+            ids = None if self._full else self._ids
+            self._ids, self._full, self._timer = set(), False, None
+        conn = self.get_connection()
+        try:
+            changed = recompute_ranks(conn, ids)
+        except mysql.connector.Error as e:
+            print(f"Rank refresh failed: {e}")
+            return
+        finally:
+            conn.close()
+        if changed and self.on_done: self.on_done(changed)
+
+if __name__ == '__main__':
+    from complete_etl import DB_CONFIG
+    conn = mysql.connector.connect(**DB_CONFIG)
+    recompute_ranks(conn)
+    conn.close()
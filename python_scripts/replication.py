@@ -0,0 +1,37 @@
+import mysql.connector
+from mysql.connector import Error
+
+# --- Replication helpers ---
+# Shared by the web app's router (web_interface/db_router.py) and run_reports.py.
+
+def replication_lag(conn):
+    """Seconds behind the source, or None if this server isn't replicating."""
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("SHOW REPLICA STATUS")  # MySQL 8.0.22+
+        row = cursor.fetchone()
+        lag = row and row.get('Seconds_Behind_Source')
+    except Error:
+        cursor.execute("SHOW SLAVE STATUS")
+        row = cursor.fetchone()
+        lag = row and row.get('Seconds_Behind_Master')
+    cursor.close()
+    return lag
+
+def connect_to_replica(replica_configs, max_lag_seconds=None):
+    """Connection to the first reachable replica within max_lag_seconds (None = don't check)
+    and its index, or (None, None). Unknown lag counts as too far behind."""
+    for i, config in enumerate(replica_configs):
+        try:
+            conn = mysql.connector.connect(**config)
+        except Error as e:
+            print(f"Replica {i} unavailable ({e})")
+            continue
+        if max_lag_seconds is None:
+            return conn, i
+        lag = replication_lag(conn)
+        if lag is not None and lag <= max_lag_seconds:
+            return conn, i
+        print(f"Replica {i} skipped (lag: {lag})")
+        conn.close()
+    return None, None
@@ -0,0 +1,45 @@
+import os
+import re
+import sys
+import time
+import mysql.connector
+from replication import connect_to_replica
+from complete_etl import DB_CONFIG, REPLICA_CONFIGS, MAX_REPLICA_LAG_SECONDS
+
+# Runs the reporting SQL in advanced_features/ (aggregate queries + views) against a
+# read replica, so heavy analytics don't compete with ETL writes on the primary.
+#   python python_scripts/run_reports.py [file.sql ...]
+
+BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DEFAULT_REPORTS = [os.path.join(BASE_DIR, 'advanced_features', 'SQL_AggregateQueries.sql')]
+VIEW_REPORTS = ['View_TopAnimeSummary', 'View_StudioPerformance', 'View_GenreDemographics',
+                'View_CurrentSeasonAnime', 'View_MangaLongRunners']
+
+def read_statements(path):
+    with open(path, encoding='utf-8') as f:
+        sql = re.sub(r'--[^\n]*', '', f.read())
+    return [s.strip() for s in sql.split(';') if s.strip().upper().startswith('SELECT')]
+
+def run_query(cursor, label, sql):
+    start = time.perf_counter()
+    cursor.execute(sql)
+    rows = cursor.fetchall()
+    print(f"\n== {label} ({len(rows)} rows, {(time.perf_counter() - start) * 1000:.1f} ms)")
+    for row in rows[:10]:
+        print("  ", row)
+
+if __name__ == '__main__':
+    conn, i = connect_to_replica(REPLICA_CONFIGS, MAX_REPLICA_LAG_SECONDS)
+    name, config = (f'replica{i}', REPLICA_CONFIGS[i]) if conn else ('primary', DB_CONFIG)
+    conn = conn or mysql.connector.connect(**DB_CONFIG)
+    print(f"Running reports on {name} ({config.get('host')}:{config.get('port', 3306)})")
+    cursor = conn.cursor()
+    try:
+        for path in sys.argv[1:] or DEFAULT_REPORTS:
+            for i, sql in enumerate(read_statements(path), 1):
+                run_query(cursor, f"{os.path.basename(path)} #{i}", sql)
+        if len(sys.argv) == 1:
+            for view in VIEW_REPORTS:
+                run_query(cursor, view, f"SELECT * FROM {view}")
+    finally:
+        conn.close()
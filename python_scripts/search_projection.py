@@ -0,0 +1,71 @@
+import mysql.connector
+
+# --- EntrySearch projection maintenance ---
+# EntrySearch (see Schema.sql) is derived data: one denormalized row per Entry used by
+# /api/search. The ETL rebuilds it in bulk; the web write routes refresh the touched
+# entry inside their own transaction. Deletes cascade from Entry.
+
+# (projection column, junction table, id column)
+PACKED_ID_SETS = [
+    ('genre_ids', 'EntryGenre', 'genre_id'),
+    ('theme_ids', 'EntryTheme', 'theme_id'),
+    ('demographic_ids', 'EntryDemographic', 'demographic_id'),
+    ('studio_ids', 'EntryStudio', 'studio_id'),
+    ('producer_ids', 'EntryProducer', 'producer_id'),
+    ('licensor_ids', 'EntryLicensor', 'licensor_id'),
+    ('author_ids', 'EntryAuthor', 'author_id'),
+    ('serialization_ids', 'EntrySerialization', 'serialization_id')
+]
+
+REFRESH_SQL = """
+    REPLACE INTO EntrySearch (
+        entry_id, title_name, score, ranked, popularity, item_type_id, type_name, medium_type,
+        status_id, status_name, source_id, age_rating_id, age_rating,
+        premier_date_season, premier_date_year, episodes, volumes,
+        {packed_cols}
+    )
+    SELECT e.entry_id, e.title_name, e.score, e.ranked, e.popularity, e.item_type_id, it.type_name, m.name,
+           st.status_id, st.status_name, ad.source_id, ad.age_rating_id, ar.code,
+           ad.premier_date_season, ad.premier_date_year, ad.episodes, md.volumes,
+           {packed_selects}
+    FROM Entry e
+    LEFT JOIN ItemType it ON e.item_type_id = it.item_type_id
+    LEFT JOIN Medium m ON it.medium_id = m.medium_id
+    LEFT JOIN AnimeDetails ad ON e.entry_id = ad.entry_id
+    LEFT JOIN MangaDetails md ON e.entry_id = md.entry_id
+    LEFT JOIN StatusType st ON st.status_id = COALESCE(ad.status_id, md.status_id)
+    LEFT JOIN AgeRating ar ON ad.age_rating_id = ar.age_rating_id
+""".format(
+    packed_cols=', '.join(col for col, _, _ in PACKED_ID_SETS),
+    packed_selects=',\n           '.join(
+        f"COALESCE((SELECT JSON_ARRAYAGG(j.{id_col}) FROM {tbl} j WHERE j.entry_id = e.entry_id), JSON_ARRAY())"
+        for _, tbl, id_col in PACKED_ID_SETS)
+)
+
+def refresh_entry_search(cursor, entry_ids=None, chunk_size=5000):
+    """Rebuild EntrySearch rows for entry_ids (or every entry when None).
+
+    Runs on the caller's cursor and does not commit, so web routes keep the projection
+    in the same transaction as the write; the full rebuild works in entry_id ranges.
+    """
+    if entry_ids is not None:
+        entry_ids = list(entry_ids)
+        for i in range(0, len(entry_ids), chunk_size):
+            chunk = entry_ids[i:i + chunk_size]
+            cursor.execute(REFRESH_SQL + f" WHERE e.entry_id IN ({', '.join(['%s'] * len(chunk))})", chunk)
+        return
+
+    cursor.execute("SELECT COALESCE(MIN(entry_id), 0), COALESCE(MAX(entry_id), 0) FROM Entry")
+    lo, hi = cursor.fetchone()
+    print(f"Rebuilding EntrySearch for entry_id {lo}..{hi}...")
+    for start in range(lo, hi + 1, chunk_size):
+        cursor.execute(REFRESH_SQL + " WHERE e.entry_id BETWEEN %s AND %s", (start, start + chunk_size - 1))
+
+if __name__ == '__main__':
+    # Full rebuild, e.g. after upgrading an existing database to the projection
+    from complete_etl import DB_CONFIG
+    conn = mysql.connector.connect(**DB_CONFIG)
+    refresh_entry_search(conn.cursor())
+    conn.commit()
+    conn.close()
+    print("Done.")
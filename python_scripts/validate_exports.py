@@ -0,0 +1,129 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# --- Integrity checks for the csv_exports/ directory (export_csv_etl.py) ---
+# Every id column is loaded as an int64 array; foreign keys are checked with np.isin
+# (sort-based, O(n log n)), uniqueness with np.unique over packed composite keys.
+# Runs at the end of export_csv_etl.run() and on its own:
+#   python python_scripts/validate_exports.py csv_exports
+
+# table -> primary key column(s)
+PRIMARY_KEYS = {
+    'Entry': ['entry_id'], 'AnimeDetails': ['entry_id'], 'MangaDetails': ['entry_id'],
+    'Genre': ['genre_id'], 'Theme': ['theme_id'], 'Demographic': ['demographic_id'],
+    'Producer': ['producer_id'], 'Studio': ['studio_id'], 'Licensor': ['licensor_id'],
+    'Serialization': ['serialization_id'], 'Source': ['source_id'], 'AgeRating': ['age_rating_id'],
+    'Author': ['author_id'], 'Synonym': ['synonym_id'], 'Language': ['language_id'],
+    'StatusType': ['status_id'], 'ItemType': ['item_type_id'],
+    'LanguageEntry': ['entry_id', 'language_id']
+}
+
+# junction table -> referenced lookup table (PK: entry_id + the lookup's id)
+JUNCTIONS = {
+    'EntryGenre': 'Genre', 'EntryTheme': 'Theme', 'EntryDemographic': 'Demographic',
+    'EntryProducer': 'Producer', 'EntryStudio': 'Studio', 'EntryLicensor': 'Licensor',
+    'EntryAuthor': 'Author', 'EntrySerialization': 'Serialization', 'EntrySynonym': 'Synonym'
+}
+for junction, lookup in JUNCTIONS.items():
+    PRIMARY_KEYS[junction] = ['entry_id', PRIMARY_KEYS[lookup][0]]
+
+# Unique keys besides the primary key
+UNIQUE_KEYS = [('Entry', ['mal_id', 'item_type_id'])]
+
+# (table, column, referenced table); the referenced column is that table's primary key.
+# Empty values (nullable FKs such as AnimeDetails.source_id) are skipped.
+FOREIGN_KEYS = [
+    ('Entry', 'item_type_id', 'ItemType'),
+    ('AnimeDetails', 'entry_id', 'Entry'), ('AnimeDetails', 'status_id', 'StatusType'),
+    ('AnimeDetails', 'source_id', 'Source'), ('AnimeDetails', 'age_rating_id', 'AgeRating'),
+    ('MangaDetails', 'entry_id', 'Entry'), ('MangaDetails', 'status_id', 'StatusType'),
+    ('LanguageEntry', 'entry_id', 'Entry'), ('LanguageEntry', 'language_id', 'Language')
+] + [fk for junction, lookup in JUNCTIONS.items()
+     for fk in ((junction, 'entry_id', 'Entry'), (junction, PRIMARY_KEYS[lookup][0], lookup))]
+
+MAX_EXAMPLES = 5
+
+class ExportTables:
+    """Lazily loads only the id columns each check needs, as int64 arrays (-1 = empty).
+    `source` is the export directory or a {table: DataFrame} mapping."""
+    def __init__(self, source):
+        self.source = source
+        self._columns = {}
+
+    def exists(self, table):
+        if isinstance(self.source, dict): return table in self.source
+        return os.path.exists(os.path.join(self.source, f'{table}.csv'))
+
+    def column(self, table, col):
+        if (table, col) not in self._columns:
+            if isinstance(self.source, dict):
+                df = self.source[table][[col]]
+            else:
+                df = pd.read_csv(os.path.join(self.source, f'{table}.csv'), usecols=[col])
+            self._columns[table, col] = df[col].fillna(-1).to_numpy(dtype=np.int64)
+        return self._columns[table, col]
+
+def packed_key(tables, table, cols):
+    """One int64 per row for a (possibly composite) key, so np.unique can compare rows."""
+    key = tables.column(table, cols[0])
+    for col in cols[1:]:
+        other = tables.column(table, col)
+        width = int(other.max(initial=0)) + 2  # +2: room for -1 (empty)
+        key = key * width + (other + 1)
+    return key
+
+def check_unique(tables, table, cols):
+    key = packed_key(tables, table, cols)
+    values, counts = np.unique(key, return_counts=True)
+    dup = counts > 1
+    if not dup.any(): return None
+    first_rows = [int(np.flatnonzero(key == v)[0]) for v in values[dup][:MAX_EXAMPLES]]
+    examples = [tuple(int(tables.column(table, c)[r]) for c in cols) for r in first_rows]
+    return f"{table}({', '.join(cols)}): {int(dup.sum())} duplicated keys, e.g. {examples}"
+
+def check_foreign_key(tables, table, col, ref):
+    values = tables.column(table, col)
+    values = values[values != -1]
+    missing = values[~np.isin(values, tables.column(ref, PRIMARY_KEYS[ref][0]))]
+    if len(missing) == 0: return None
+    return (f"{table}.{col} -> {ref}: {len(missing)} rows reference missing ids, "
+            f"e.g. {np.unique(missing)[:MAX_EXAMPLES].tolist()}")
+
+def validate_exports(export_dir):
+    """Run every check; prints the problems found and returns True when there are none.
+    export_dir may also be a {table: DataFrame} mapping (e.g. in tests)."""
+    start = time.perf_counter()
+    tables = ExportTables(export_dir)
+    missing_files = [t for t in PRIMARY_KEYS if not tables.exists(t)]
+    if missing_files:
+        print(f"Validation failed: missing files {missing_files}")
+        return False
+
+    problems = []
+    for table, cols in PRIMARY_KEYS.items():
+        problems.append(check_unique(tables, table, cols))
+    for table, cols in UNIQUE_KEYS:
+        problems.append(check_unique(tables, table, cols))
+    for table, col, ref in FOREIGN_KEYS:
+        problems.append(check_foreign_key(tables, table, col, ref))
+    problems = [p for p in problems if p]
+
+    elapsed = time.perf_counter() - start
+    checks = len(PRIMARY_KEYS) + len(UNIQUE_KEYS) + len(FOREIGN_KEYS)
+    if problems:
+        print(f"Validation failed ({len(problems)} of {checks} checks, {elapsed:.2f}s):")
+        for p in problems: print(f"  - {p}")
+        return False
+    where = f"{export_dir}/" if isinstance(export_dir, str) else f"{len(export_dir)} tables"
+    print(f"Validation passed: {checks} checks over {where} in {elapsed:.2f}s")
+    return True
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check keys and foreign keys of a CSV export.')
+    parser.add_argument('export_dir', nargs='?', default='csv_exports')
+    args = parser.parse_args()
+    sys.exit(0 if validate_exports(args.export_dir) else 1)
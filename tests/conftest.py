@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The scripts import their neighbours by module name (they're run from their own
+# directories), so put both directories on the path for the tests.
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+for directory in ('web_interface', 'python_scripts'):
+    sys.path.insert(0, os.path.join(ROOT, directory))
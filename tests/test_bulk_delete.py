@@ -0,0 +1,89 @@
+import json
+import pytest
+from mysql.connector import Error
+from bulk_delete import ENTRY_CHILD_TABLES, delete_entries
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = 0
+
+    def execute(self, sql, params=()):
+        if self.conn.fail_on and self.conn.fail_on in params:
+            raise Error(msg='Lock wait timeout exceeded')
+        self.conn.pending.append((sql, list(params)))
+        self.rowcount = len(params)
+
+class FakeConnection:
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.pending = []
+        self.committed = []
+        self.rollbacks = 0
+        self.closed = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.committed.append(self.pending)
+        self.pending = []
+
+    def rollback(self):
+        self.pending = []
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+def test_chunks_are_sorted_deduplicated_and_committed_one_by_one():
+    conn = FakeConnection()
+    progress = list(delete_entries(conn, [5, 3, 1, 3, 4, 2], chunk_size=2, pause=0))
+    assert [p['processed'] for p in progress] == [2, 4, 5]
+    assert progress[-1]['deleted'] == 5 and progress[-1]['total'] == 5
+    assert [tx[-1] for tx in conn.committed] == [
+        ("DELETE FROM Entry WHERE entry_id IN (%s, %s)", [1, 2]),
+        ("DELETE FROM Entry WHERE entry_id IN (%s, %s)", [3, 4]),
+        ("DELETE FROM Entry WHERE entry_id IN (%s)", [5])]
+    # children first, then the parent, in one transaction per chunk
+    assert [sql.split()[2] for sql, _ in conn.committed[0]] == ENTRY_CHILD_TABLES + ['Entry']
+
+def test_failed_chunk_rolls_back_and_keeps_earlier_chunks():
+    conn = FakeConnection(fail_on=3)
+    progress = []
+    with pytest.raises(Error):
+        for p in delete_entries(conn, [1, 2, 3, 4], chunk_size=2, pause=0):
+            progress.append(p)
+    assert [p['processed'] for p in progress] == [2]
+    assert len(conn.committed) == 1 and conn.rollbacks == 1 and conn.pending == []
+
+def test_no_ids_touch_nothing():
+    conn = FakeConnection()
+    assert list(delete_entries(conn, [])) == []
+    assert conn.committed == []
+
+def test_route_opens_its_connection_only_while_streaming(monkeypatch):
+    import app as app_module
+    opened = []
+    def get_db_connection(read_only=False):
+        opened.append(FakeConnection())
+        return opened[-1]
+    monkeypatch.setattr(app_module, 'get_db_connection', get_db_connection)
+    monkeypatch.setattr(app_module.rank_refresh, 'schedule', lambda entry_ids: None)
+    monkeypatch.setattr(app_module.stats_cube, 'mark_dirty', lambda entry_ids: None)
+
+    request = {'json': {'entry_ids': [1, 2, 3], 'chunk_size': 2}, 'method': 'POST'}
+    with app_module.app.test_request_context('/api/delete/bulk', **request):
+        res = app_module.bulk_delete()
+        res.close()  # the client went away before the body was read
+    assert opened == []
+
+    with app_module.app.test_request_context('/api/delete/bulk', **request):
+        res = app_module.bulk_delete()
+        lines = [json.loads(line) for line in res.response]
+        res.close()
+    assert [p['processed'] for p in lines] == [2, 3]
+    assert len(opened) == 1 and opened[0].closed
+
+    assert app_module.app.test_client().post('/api/delete/bulk', json={'entry_ids': ['x']}).status_code == 400
+    assert len(opened) == 1
@@ -0,0 +1,42 @@
+import re
+import time
+import pytest
+from catalog_snapshot import CatalogSnapshot, SnapshotFile, SnapshotMissing, _encode, fold_title
+
+TITLES = ['Naruto', 'Naruto: Shippuuden', 'Boruto: Naruto Next Generations', 'Pokémon', '100% Pascal-sensei',
+          'One Piece', 'a_b', None]
+
+def snapshot(titles):
+    """A SnapshotFile with just the arrays title_matches() reads."""
+    snap = SnapshotFile.__new__(SnapshotFile)
+    encoded, _ = _encode('str', [fold_title(t) if t is not None else None for t in titles])
+    prefix = b'header'  # the heap starts at an offset inside the mapping
+    snap.mm = prefix + encoded['heap'].tobytes()
+    snap.rows = len(titles)
+    snap.heap_offsets = {'search.title_folded': len(prefix)}
+    snap.arrays = {'search.title_folded.heap': encoded['heap'], 'search.title_folded.offsets': encoded['offsets'],
+                   'entry.title_name.null': encoded['null']}
+    return snap
+
+def like(title, text):
+    """Reference LIKE '%text%' under a case/accent-insensitive collation."""
+    pattern = ''.join('.*' if c == '%' else '.' if c == '_' else re.escape(c) for c in fold_title(text))
+    return title is not None and re.search(pattern, fold_title(title), re.S) is not None
+
+@pytest.mark.parametrize('text', ['naruto', 'NARUTO', 'pokemon', 'n%to', 'bo_uto%next', '%', '100%',
+                                  'a_b', 'a%b', 'piece%one', '_', 'e%e%e', 'shippuuden'])
+def test_title_matches_like_semantics(text):
+    snap = snapshot(TITLES)
+    assert snap.title_matches(text).tolist() == [like(t, text) for t in TITLES]
+
+def test_wildcard_heavy_input_stays_fast():
+    snap = snapshot(['a' * 200] * 2000)
+    start = time.perf_counter()
+    assert not snap.title_matches('%a' * 30 + '%b').any()
+    assert snap.title_matches('_' * 50 + '%a').all()
+    assert time.perf_counter() - start < 2
+
+def test_missing_file_raises_snapshot_missing(tmp_path):
+    catalog = CatalogSnapshot(str(tmp_path / 'catalog.snap'))
+    with pytest.raises(SnapshotMissing):
+        catalog.metadata()
@@ -0,0 +1,55 @@
+import gzip
+import json
+from datetime import date
+from decimal import Decimal
+from flask import Flask, request
+import compact_json
+from compact_json import COLUMNAR_MIME, compact, compress_response, json_response
+
+app = Flask(__name__)
+
+ROWS = [{'entry_id': i, 'score': Decimal('8.50'), 'status_name': 'Finished Airing' if i % 4 else 'Airing'}
+        for i in range(40)]
+
+def decode_columnar(obj):
+    """Python twin of decodeColumnar() in static/script.js."""
+    if isinstance(obj, list): return [decode_columnar(v) for v in obj]
+    if not isinstance(obj, dict): return obj
+    if obj.get('$columnar') == 1:
+        cols = [[obj['dicts'][str(i)][n] for n in col] if str(i) in obj['dicts'] else col
+                for i, col in enumerate(obj['values'])]
+        return [dict(zip(obj['columns'], values)) for values in zip(*cols)]
+    return {k: decode_columnar(v) for k, v in obj.items()}
+
+def test_columnar_round_trip_dictionary_encodes_repeated_strings():
+    block = compact(ROWS)
+    assert block['columns'] == ['entry_id', 'score', 'status_name']
+    assert block['dicts'] == {'2': ['Airing', 'Finished Airing']}
+    nested = compact({'Genre': ROWS[:2], 'count': 2})
+    assert nested['count'] == 2 and nested['Genre']['length'] == 2
+    assert compact([]) == []
+
+def test_both_formats_decode_to_the_same_rows(monkeypatch):
+    for serializer in (compact_json.orjson, None):  # orjson when installed, and the json fallback
+        monkeypatch.setattr(compact_json, 'orjson', serializer)
+        data = ROWS + [{'entry_id': 99, 'score': None, 'status_name': None}]
+        with app.test_request_context(headers={'Accept': 'application/json'}):
+            plain = json.loads(json_response(data, request).get_data())
+        with app.test_request_context(headers={'Accept': COLUMNAR_MIME}):
+            response = json_response(data, request)
+            assert response.mimetype == COLUMNAR_MIME
+            assert 'Accept' in response.vary
+        assert decode_columnar(json.loads(response.get_data())) == plain
+        assert plain[0]['score'] == '8.50'  # Decimal as a string, like jsonify
+        assert compact_json.dumps(date(2020, 1, 2)) == b'"Thu, 02 Jan 2020 00:00:00 GMT"'
+
+def test_compression_is_negotiated_and_skips_errors(monkeypatch):
+    monkeypatch.setattr(compact_json, 'brotli', None)
+    with app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+        response = compress_response(json_response(ROWS, request), request)
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert json.loads(gzip.decompress(response.get_data()))[0]['entry_id'] == 0
+        error = compress_response(json_response(ROWS, request, status=500), request)
+        assert 'Content-Encoding' not in error.headers
+    with app.test_request_context():
+        assert 'Content-Encoding' not in compress_response(json_response(ROWS, request), request).headers
@@ -0,0 +1,43 @@
+import time
+from db_router import DBRouter
+
+PRIMARY = {'host': 'primary.invalid'}
+REPLICA = {'host': 'replica.invalid'}
+
+def router(**kwargs):
+    r = DBRouter(PRIMARY, [REPLICA, REPLICA], **kwargs)
+    r.start_lag_monitor = lambda: None  # the tests set the lag by hand
+    return r
+
+def test_replicas_are_unused_until_the_monitor_checked_them():
+    r = router()
+    assert r._pick_replica() is None
+    r.replicas[1].lag, r.replicas[1].healthy = 0, True
+    assert r._pick_replica() is r.replicas[1]
+
+def test_lag_check_disabled_trusts_replicas():
+    r = router(max_lag_seconds=None)
+    assert r._pick_replica() in r.replicas
+
+def test_least_connections_prefers_idle_replica():
+    r = router()
+    for replica in r.replicas:
+        replica.healthy = True
+    r.replicas[0].active = 3
+    assert r._pick_replica() is r.replicas[1]
+
+def test_status_reports_last_check_without_connecting():
+    r = router()
+    r.replicas[0].lag, r.replicas[0].checked_at = 2, time.monotonic()
+    rows = r.status()
+    assert [row['node'] for row in rows] == ['primary', 'replica0', 'replica1']
+    assert rows[1]['lag_seconds'] == 2 and rows[2]['checked_seconds_ago'] is None
+
+def test_malformed_pin_cookie_is_not_pinned():
+    from app import app, is_pinned
+    with app.test_request_context('/', headers={'Cookie': 'rw_pin=garbage'}):
+        assert is_pinned() is False
+    with app.test_request_context('/', headers={'Cookie': f'rw_pin={time.time() + 60}'}):
+        assert is_pinned() is True
+    with app.test_request_context('/', headers={'X-Consistency': 'primary'}):
+        assert is_pinned() is True
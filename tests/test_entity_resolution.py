@@ -0,0 +1,48 @@
+import json
+from entity_resolution import normalize_name, resolve_names, resolve_csvs, split_author_name
+
+def merged(a, b, person=False):
+    mapping, _ = resolve_names([a, a, b], person=person)
+    return mapping[a] == mapping[b]
+
+def test_variants_that_should_merge():
+    assert merged('Kyoto Animation', 'Kyōto Animation')
+    assert merged('Kyoto Animation', 'Kyoto Animation Co., Ltd.')
+    assert merged('Kyoto Animation', 'Ｋｙｏｔｏ　Ａｎｉｍａｔｉｏｎ')
+    assert merged('Kyoto Animation', 'Kyoto Animaton')  # typo in a long word
+    assert merged('Production I.G', 'Production IG')
+    assert merged('Oda, Eiichirou', 'Eiichiro Oda', person=True)
+
+def test_false_merges_stay_apart():
+    assert not merged('Sol', 'Soul')
+    assert not merged('Love Live', 'Live Love')
+    assert not merged('Sato, Masaki', 'Saito, Masaki', person=True)
+    assert not merged('Takahashi, Rumiko', 'Takahashi, Rumika', person=True)
+    assert not merged('Studio 3', 'Studio 4')
+
+def test_long_vowels_fold_only_in_romanized_tokens():
+    assert normalize_name('Shippuuden') == normalize_name('Shippuden')
+    assert normalize_name('Soul') == 'soul'
+    assert normalize_name('Live Love') == 'live love'  # order kept
+
+def test_canonical_is_most_frequent_spelling():
+    mapping, clusters = resolve_names(['Kyōto Animation', 'Kyoto Animation', 'Kyoto Animation'])
+    assert mapping['Kyōto Animation'] == 'Kyoto Animation'
+    assert clusters == [('Kyoto Animation', {'Kyoto Animation': 2, 'Kyōto Animation': 1})]
+    assert split_author_name('Oda, Eiichiro') == ('Eiichiro', 'Oda')
+
+def test_mapping_is_shared_across_csvs_and_reused(tmp_path):
+    anime, manga = tmp_path / 'anime.csv', tmp_path / 'manga.csv'
+    anime.write_text('id,studios\n1,"[\'Kyoto Animation\']"\n2,"[\'Kyoto Animation\']"\n', encoding='utf-8')
+    manga.write_text('id,authors\n1,"[\'Oda, Eiichirou\']"\n2,"[\'Eiichiro Oda\']"\n', encoding='utf-8')
+    parse = lambda v: json.loads(v.replace("'", '"'))
+    map_path = tmp_path / 'map.json'
+    mapping = resolve_csvs([anime, manga], parse, mapping_path=str(map_path))
+    assert mapping['Author']['Oda, Eiichirou'] == mapping['Author']['Eiichiro Oda']
+    # a hand edit is kept while the CSVs are unchanged
+    saved = json.loads(map_path.read_text(encoding='utf-8'))
+    saved['mapping']['Studio']['Kyoto Animation'] = 'KyoAni'
+    map_path.write_text(json.dumps(saved), encoding='utf-8')
+    assert resolve_csvs([anime, manga], parse, mapping_path=str(map_path))['Studio']['Kyoto Animation'] == 'KyoAni'
+    anime.write_text('id,studios\n1,"[\'Madhouse\']"\n', encoding='utf-8')
+    assert 'Kyoto Animation' not in resolve_csvs([anime, manga], parse, mapping_path=str(map_path))['Studio']
@@ -0,0 +1,138 @@
+import pytest
+from etl_checkpoint import (EtlCheckpoint, run_batches, write_dead_letter, take_dead_letters,
+                            finish_dead_letters)
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rows = []
+
+    def execute(self, sql, params=()):
+        if 'information_schema.columns' in sql:
+            self.rows = [(int(self.conn.has_digest),)]
+        elif sql.lstrip().startswith('ALTER'):
+            self.conn.has_digest = True
+            self.conn.altered.append(sql)
+        elif sql.lstrip().startswith('SELECT'):
+            self.rows = [(stage, batch_no, digest) for (key, stage, batch_no), digest
+                         in self.conn.checkpoints.items() if key == params[0]]
+        elif sql.lstrip().startswith('INSERT'):
+            key, stage, batch_no, digest = params[:4]
+            self.conn.pending[(key, stage, batch_no)] = digest
+        elif sql.lstrip().startswith('DELETE'):
+            for k in [k for k in self.conn.checkpoints if k[0] == params[0]]:
+                del self.conn.checkpoints[k]
+
+    def fetchall(self):
+        return self.rows
+
+    def fetchone(self):
+        return self.rows[0]
+
+class FakeConn:
+    """EtlCheckpoint table in a dict; INSERTs become visible on commit()."""
+    def __init__(self, has_digest=True):
+        self.checkpoints = {}
+        self.pending = {}
+        self.commits = 0
+        self.has_digest = has_digest
+        self.altered = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.checkpoints.update(self.pending)
+        self.pending = {}
+        self.commits += 1
+
+    def rollback(self):
+        self.pending = {}
+
+def loader(loaded, fail_on=None):
+    def load(batch):
+        if fail_on in batch: raise ConnectionError('lost connection')
+        loaded.extend(batch)
+    return load
+
+def test_rerun_resumes_at_the_failed_batch():
+    conn = FakeConn()
+    loaded = []
+    with pytest.raises(ConnectionError):
+        run_batches(conn, EtlCheckpoint(conn, 'k'), 'stage', list(range(10)), 3, loader(loaded, fail_on=7))
+    assert loaded == [0, 1, 2, 3, 4, 5]
+
+    loaded.clear()
+    checkpoint = EtlCheckpoint(conn, 'k')
+    assert checkpoint.committed_before == 2
+    run_batches(conn, checkpoint, 'stage', list(range(10)), 3, loader(loaded))
+    assert loaded == [6, 7, 8, 9]
+    assert (checkpoint.skipped, checkpoint.recorded) == (2, 2)
+
+def test_batch_with_different_rows_is_loaded_again():
+    conn = FakeConn()
+    run_batches(conn, EtlCheckpoint(conn, 'k'), 'stage', [1, 2, 3, 4], 2, loader([]))
+    loaded = []
+    checkpoint = EtlCheckpoint(conn, 'k')
+    run_batches(conn, checkpoint, 'stage', [1, 2, 3, 5], 2, loader(loaded))
+    assert loaded == [3, 5] and checkpoint.skipped == 1
+
+def test_content_function_feeds_the_digest():
+    conn = FakeConn()
+    items = [{'id': 1, 'text': 'a' * 100}]
+    run_batches(conn, EtlCheckpoint(conn, 'k'), 'stage', items, 1, loader([]), content=lambda d: d['text'])
+    loaded = []
+    run_batches(conn, EtlCheckpoint(conn, 'k'), 'stage', [{'id': 2, 'text': 'a' * 100}], 1, loader(loaded),
+                content=lambda d: d['text'])
+    assert loaded == []
+
+def test_reset_and_other_run_keys_load_everything():
+    conn = FakeConn()
+    run_batches(conn, EtlCheckpoint(conn, 'k'), 'stage', [1, 2], 1, loader([]))
+    loaded = []
+    run_batches(conn, EtlCheckpoint(conn, 'other'), 'stage', [1, 2], 1, loader(loaded))
+    assert loaded == [1, 2]
+    checkpoint = EtlCheckpoint(conn, 'k')
+    checkpoint.reset()
+    loaded.clear()
+    run_batches(conn, checkpoint, 'stage', [1, 2], 1, loader(loaded))
+    assert loaded == [1, 2] and checkpoint.committed_before == 0
+
+def test_without_checkpoint_every_batch_runs():
+    conn = FakeConn()
+    loaded = []
+    run_batches(conn, None, 'stage', [1, 2, 3], 2, loader(loaded))
+    assert loaded == [1, 2, 3] and conn.commits == 2 and conn.checkpoints == {}
+
+def test_old_table_gets_the_digest_column():
+    conn = FakeConn(has_digest=False)
+    EtlCheckpoint(conn, 'k')
+    EtlCheckpoint(conn, 'k')
+    assert len(conn.altered) == 1 and 'ADD COLUMN digest' in conn.altered[0]
+
+def test_failures_are_reported_only_for_committed_batches():
+    conn = FakeConn()
+    reported = []
+    def load(batch):
+        if 'lost' in batch: raise ConnectionError('lost connection')
+        return [(row, ValueError('bad date')) for row in batch if row.startswith('bad')]
+    items = ['ok1', 'bad1', 'bad2', 'lost']
+    with pytest.raises(ConnectionError):
+        run_batches(conn, EtlCheckpoint(conn, 'k'), 'stage', items, 2, load, on_failed=reported.extend)
+    assert [row for row, _ in reported] == ['bad1']  # bad2's batch rolled back: not reported
+
+    items[3] = 'ok2'  # the connection is back
+    run_batches(conn, EtlCheckpoint(conn, 'k'), 'stage', items, 2, load, on_failed=reported.extend)
+    assert [row for row, _ in reported] == ['bad1', 'bad2']  # once each
+
+def test_dead_letters_round_trip(tmp_path):
+    path = str(tmp_path / 'dead.jsonl')
+    write_dead_letter(path, 'anime', {'id': 1, 'title_name': 'A'}, ValueError('bad date'))
+    write_dead_letter(path, 'manga', {'id': 2, 'title_name': 'B'}, ValueError('bad date'))
+    assert take_dead_letters(path) == {'anime': [{'id': 1, 'title_name': 'A'}],
+                                       'manga': [{'id': 2, 'title_name': 'B'}]}
+    # The retry dies before finishing: rows that failed meanwhile are kept with the old set
+    write_dead_letter(path, 'anime', {'id': 3, 'title_name': 'C'}, ValueError('again'))
+    assert [r['id'] for r in take_dead_letters(path)['anime']] == [1, 3]
+    finish_dead_letters(path)
+    assert take_dead_letters(path) == {}
@@ -0,0 +1,55 @@
+import json
+from mysql.connector import Error
+from index_advisor import DB_CONFIG, advise, create_if_missing_proc, is_live_database, write_migration
+
+def test_refuses_the_configured_primary():
+    assert is_live_database(dict(DB_CONFIG))
+    assert is_live_database(dict(DB_CONFIG, host='127.0.0.1', port=3306))
+    assert not is_live_database(dict(DB_CONFIG, host='127.0.0.1', port=3307))
+    assert not is_live_database(dict(DB_CONFIG, database='myanimelist_copy'))
+
+def test_migration_embeds_the_helper_from_sql_indexes(tmp_path):
+    out = tmp_path / 'index_migration.sql'
+    write_migration(str(out), [('EntryGenre', ('genre_id', 'entry_id'), 'idx_x', 0.02, 0.01)], 'workload.json')
+    sql = out.read_text(encoding='utf-8')
+    assert create_if_missing_proc() in sql
+    assert sql.count('CREATE PROCEDURE CreateIndexIfMissing') == 1
+    assert "CALL CreateIndexIfMissing('EntryGenre', 'idx_x', 'genre_id, entry_id');" in sql
+
+class AdviseCursor:
+    """EXPLAIN fails for samples mentioning `Missing`; every plan is a cheap const lookup."""
+    def __init__(self, executed):
+        self.executed = executed
+        self.rows = []
+
+    def execute(self, sql):
+        self.executed.append(sql)
+        if sql.startswith('EXPLAIN') and 'Missing' in sql:
+            raise Error(msg="Table 'Missing' doesn't exist")
+        self.rows = [(json.dumps({'query_block': {}}),)] if sql.startswith('EXPLAIN') else []
+
+    def fetchone(self):
+        return self.rows[0]
+
+    def fetchall(self):
+        return self.rows
+
+class AdviseConnection:
+    def __init__(self):
+        self.executed = []
+
+    def cursor(self):
+        return AdviseCursor(self.executed)
+
+def test_advise_skips_queries_that_fail_to_explain(tmp_path):
+    workload = tmp_path / 'workload.json'
+    workload.write_text(json.dumps([
+        {'digest': 'a', 'normalized': 'SELECT * FROM Missing', 'sample': 'SELECT * FROM Missing',
+         'count': 5, 'total_seconds': 2.0, 'rows_examined': 1},
+        {'digest': 'b', 'normalized': 'SELECT * FROM Entry', 'sample': 'SELECT * FROM Entry',
+         'count': 5, 'total_seconds': 1.0, 'rows_examined': 1}]), encoding='utf-8')
+    conn = AdviseConnection()
+    advise(conn, str(workload), str(tmp_path / 'index_migration.sql'), show_analyze=False)
+    assert 'SELECT * FROM Entry' in conn.executed            # still timed
+    assert 'SELECT * FROM Missing' not in conn.executed      # dropped from the workload
+    assert (tmp_path / 'index_migration.sql').exists()
@@ -0,0 +1,126 @@
+import pytest
+import mysql.connector
+from mysql.connector import Error
+import prepared
+from config import DB_CONFIG
+from db_router import DBRouter
+
+class FakeCursor:
+    def __init__(self, session):
+        self.session = session
+        self.closed = False
+
+    def execute(self, sql, params):
+        self.session.executed.append(sql)
+
+    def fetchall(self):
+        return [(self.session.connection_id,)]
+
+    def close(self):
+        self.closed = True
+
+class FakeSession:
+    def __init__(self):
+        self.connection_id = 1
+        self.executed = []
+        self.cursors = []
+
+    def cursor(self, prepared, dictionary):
+        self.cursors.append(FakeCursor(self))
+        return self.cursors[-1]
+
+def test_statement_is_prepared_once_per_session():
+    session = FakeSession()
+    for _ in range(3):
+        prepared.execute(session, "SELECT 1")
+    assert len(session.cursors) == 1 and len(session.executed) == 3
+
+def test_reconnect_starts_the_cache_over():
+    session = FakeSession()
+    prepared.execute(session, "SELECT 1")
+    session.connection_id = 2  # reconnect(): new server session, old handles are gone
+    prepared.execute(session, "SELECT 1")
+    assert len(session.cursors) == 2
+    assert prepared.stats(session)['prepared'] == 1
+
+def test_forget_drops_handles():
+    session = FakeSession()
+    prepared.execute(session, "SELECT 1")
+    prepared.forget(session)
+    prepared.execute(session, "SELECT 1")
+    assert len(session.cursors) == 2
+
+def test_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(prepared, 'MAX_STATEMENTS_PER_CONNECTION', 2)
+    session = FakeSession()
+    for n in range(3):
+        prepared.execute(session, f"SELECT {n}")
+    assert session.cursors[0].closed and prepared.stats(session)['prepared'] == 2
+
+def test_web_junction_inserts_use_one_text_executemany():
+    from app import insert_m2m
+    calls = []
+    class Cursor:
+        def executemany(self, sql, rows): calls.append((sql, rows))
+    class Connection:
+        def cursor(self, prepared=False):
+            assert not prepared
+            return Cursor()
+    insert_m2m(Connection(), 7, 'EntryGenre', [1, 2])
+    insert_m2m(Connection(), 7, 'EntryGenre', 3)
+    assert calls == [("INSERT INTO EntryGenre (entry_id, genre_id) VALUES (%s, %s)", [(7, 1), (7, 2)]),
+                     ("INSERT INTO EntryGenre (entry_id, genre_id) VALUES (%s, %s)", [(7, 3)])]
+
+# --- Against MySQL (config.DB_CONFIG); skipped when no server is reachable ---
+
+@pytest.fixture
+def mysql_config():
+    try:
+        mysql.connector.connect(**DB_CONFIG).close()
+    except Error as e:
+        pytest.skip(f"MySQL not reachable: {e}")
+    return DB_CONFIG
+
+def prepared_count(conn):
+    cursor = conn.cursor()
+    cursor.execute("SHOW SESSION STATUS LIKE 'Com_stmt_prepare'")
+    return int(cursor.fetchone()[1])
+
+def test_mysql_repeated_execute_prepares_once(mysql_config):
+    conn = mysql.connector.connect(**mysql_config)
+    try:
+        before = prepared_count(conn)
+        for n in range(5):
+            assert prepared.fetchone(conn, "SELECT %s + 1", (n,))[0] == n + 1
+        assert prepared_count(conn) - before == 1
+    finally:
+        conn.close()
+
+def test_mysql_pool_resets_session_between_requests(mysql_config):
+    router = DBRouter(mysql_config, pool_size=1)
+    conn = router.connection()
+    cursor = conn.cursor()
+    cursor.execute("SET @leaked = 1")
+    prepared.fetchone(conn, "SELECT %s", (1,))
+    conn.close()
+
+    conn = router.connection()  # the same pooled connection, reset
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT @leaked")
+        assert cursor.fetchone()[0] is None
+        assert prepared.stats(conn)['prepared'] == 0
+        assert prepared.fetchone(conn, "SELECT %s", (2,))[0] == 2
+    finally:
+        conn.close()
+
+def test_mysql_prepared_statements_survive_reconnect(mysql_config):
+    conn = mysql.connector.connect(**mysql_config)
+    try:
+        assert prepared.fetchone(conn, "SELECT %s", (1,))[0] == 1
+        conn.reconnect()
+        assert prepared.fetchone(conn, "SELECT %s", (2,))[0] == 2
+        conn.cmd_reset_connection()  # same connection id, handles dropped server-side
+        assert prepared.fetchone(conn, "SELECT %s", (3,))[0] == 3
+    finally:
+        conn.close()
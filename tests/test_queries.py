@@ -0,0 +1,23 @@
+from queries import M2M_FILTERS, build_search_filters, build_search_query
+
+def test_m2m_filters_use_member_of_with_params():
+    query, params = build_search_filters({'genre_id': '3', 'producer_id': '7', 'serialization_id': '9'})
+    assert query == (" AND CAST(%s AS UNSIGNED) MEMBER OF (es.genre_ids)"
+                     " AND CAST(%s AS UNSIGNED) MEMBER OF (es.producer_ids)"
+                     " AND CAST(%s AS UNSIGNED) MEMBER OF (es.serialization_ids)")
+    assert params == ['3', '7', '9']
+
+def test_every_m2m_filter_has_a_multi_valued_index():
+    import os
+    schema = open(os.path.join(os.path.dirname(__file__), '..', 'Schema.sql'), encoding='utf-8').read()
+    for _, col in M2M_FILTERS:
+        assert f"(CAST({col} AS UNSIGNED ARRAY))" in schema
+
+def test_values_are_passed_as_params_not_sql():
+    query, params = build_search_filters({'title': "x' OR 1=1", 'medium': 'all', 'studio_id': '1 OR 1=1'})
+    assert "OR 1=1" not in query and 'medium_type' not in query
+    assert params == ["%x' OR 1=1%", '1 OR 1=1']
+
+def test_search_query_ends_with_limit_param():
+    query, params = build_search_query({'genre_id': '3', 'limit': '10'})
+    assert 'MEMBER OF (es.genre_ids)' in query and params[-1] == 10
@@ -0,0 +1,38 @@
+import numpy as np
+from recompute_ranks import dense_rank_desc, compute_ranks
+
+def naive_dense_rank_desc(values, groups, valid):
+    ranks = [0] * len(values)
+    for i in range(len(values)):
+        if valid[i]:
+            higher = {values[j] for j in range(len(values))
+                      if valid[j] and groups[j] == groups[i] and values[j] > values[i]}
+            ranks[i] = len(higher) + 1
+    return ranks
+
+def test_ties_share_a_rank_and_groups_restart():
+    values = np.array([9.0, 8.5, 9.0, 7.0, 8.0, 8.0])
+    groups = np.array([1, 1, 1, 1, 2, 2])
+    valid = np.ones(6, dtype=bool)
+    assert dense_rank_desc(values, groups, valid).tolist() == [1, 2, 1, 3, 1, 1]
+
+def test_invalid_rows_get_zero_and_do_not_take_a_rank():
+    values = np.array([9.0, 10.0, 8.0])
+    groups = np.zeros(3)
+    assert dense_rank_desc(values, groups, np.array([True, False, True])).tolist() == [1, 0, 2]
+    assert dense_rank_desc(values, groups, np.zeros(3, dtype=bool)).tolist() == [0, 0, 0]
+
+def test_matches_naive_ranking():
+    rng = np.random.default_rng(0)
+    values = rng.integers(0, 20, 300).astype(np.float64)
+    groups = rng.integers(0, 3, 300).astype(np.float64)
+    valid = rng.random(300) > 0.2
+    assert dense_rank_desc(values, groups, valid).tolist() == naive_dense_rank_desc(values, groups, valid)
+
+def test_compute_ranks_skips_unscored_entries():
+    score = np.array([8.0, np.nan, 7.0])
+    scored_by = np.array([10.0, 10.0, 0.0])
+    members = np.array([100.0, 300.0, np.nan])
+    ranked, popularity = compute_ranks(np.zeros(3), score, scored_by, members)
+    assert ranked.tolist() == [1, 0, 0]  # NaN score / below MIN_SCORED_BY
+    assert popularity.tolist() == [2, 1, 0]
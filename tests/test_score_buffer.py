@@ -0,0 +1,105 @@
+import json
+import os
+import threading
+import pytest
+import score_buffer
+from score_buffer import ScoreWriteBuffer, _lock
+
+class FakeCursor:
+    def __init__(self, log): self.log = log
+    def execute(self, sql, params=()): self.log.append((sql, list(params)))
+    def fetchall(self): return []
+
+class FakeConnection:
+    def __init__(self, log): self.log = log
+    def cursor(self, *args, **kwargs): return FakeCursor(self.log)
+    def commit(self): pass
+    def rollback(self): pass
+    def close(self): pass
+
+def make_buffer(tmp_path, log):
+    return ScoreWriteBuffer(lambda: FakeConnection(log), str(tmp_path / 'score_updates.journal'),
+                            flush_interval=3600)
+
+def write_journal(path, *records, torn=False):
+    with open(path, 'w', encoding='utf-8') as f:
+        for entry_id, score in records:
+            f.write(json.dumps({'entry_id': entry_id, 'score': score}) + '\n')
+        if torn: f.write('{"entry_id": 9, "sco')
+
+def test_start_adopts_journal_of_dead_process(tmp_path):
+    orphan = tmp_path / 'score_updates.journal.999999'
+    write_journal(orphan, (1, '7.5'), (2, '8.0'), (1, '7.9'), torn=True)
+    (tmp_path / 'score_updates.journal.999999.lock').touch()  # lock file, nobody holds it
+    buffer = make_buffer(tmp_path, [])
+    buffer.start()
+    try:
+        assert buffer.pending == {1: '7.9', 2: '8.0'}  # latest wins, torn tail dropped
+        assert not orphan.exists()
+        with open(buffer.journal_path, encoding='utf-8') as f:
+            assert [json.loads(line)['entry_id'] for line in f] == [1, 2]
+    finally:
+        buffer.close()
+
+def test_journal_of_running_process_is_left_alone(tmp_path):
+    other = tmp_path / 'score_updates.journal.999998'
+    write_journal(other, (3, '6.0'))
+    held = _lock(str(other) + '.lock')  # the other worker is alive
+    buffer = make_buffer(tmp_path, [])
+    try:
+        assert not buffer.has_orphaned_journals()
+        buffer.start()
+        assert buffer.pending == {}
+        assert other.exists()
+    finally:
+        buffer.close()
+        held.close()
+    assert buffer.has_orphaned_journals()  # its lock is free now
+
+def test_flush_applies_and_clean_close_removes_journal(tmp_path):
+    log = []
+    buffer = make_buffer(tmp_path, log)
+    buffer.submit(5, '9.1')
+    buffer.submit(5, '9.2')
+    assert buffer.flush() == 1
+    update = next(params for sql, params in log if sql.startswith('UPDATE Entry'))
+    assert update == [5, '9.2', 5]
+    buffer.close()
+    assert not os.path.exists(buffer.journal_path)
+    assert not os.path.exists(buffer.journal_path + '.lock')
+
+def test_adopted_journals_replay_oldest_first(tmp_path):
+    newer = tmp_path / 'score_updates.journal.999996'
+    older = tmp_path / 'score_updates.journal.999997'
+    write_journal(newer, (1, '9.0'))
+    write_journal(older, (1, '5.0'), (2, '6.0'))
+    os.utime(older, (1000, 1000))
+    os.utime(newer, (2000, 2000))
+    for path in (newer, older):
+        (tmp_path / (path.name + '.lock')).touch()
+    buffer = make_buffer(tmp_path, [])
+    buffer.start()
+    try:
+        assert buffer.pending == {1: '9.0', 2: '6.0'}
+    finally:
+        buffer.close()
+
+def test_probe_waits_for_the_adoption_lock(tmp_path):
+    buffer = make_buffer(tmp_path, [])
+    adopt = _lock(buffer.base_path + '.lock')  # another process is starting up
+    probe = threading.Thread(target=buffer.has_orphaned_journals)
+    probe.start()
+    probe.join(0.2)
+    assert probe.is_alive()
+    adopt.close()
+    probe.join(5)
+    assert not probe.is_alive()
+
+def test_start_fails_without_own_lock(tmp_path, monkeypatch):
+    buffer = make_buffer(tmp_path, [])
+    real_lock = score_buffer._lock
+    monkeypatch.setattr(score_buffer, '_lock',
+                        lambda path, blocking=False: None if path == buffer.journal_path + '.lock'
+                        else real_lock(path, blocking))
+    with pytest.raises(RuntimeError):
+        buffer.start()
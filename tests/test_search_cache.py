@@ -0,0 +1,55 @@
+from search_cache import SearchCache, canonical_key
+
+def test_key_ignores_order_defaults_and_case():
+    assert canonical_key({'genre_id': '1', 'medium': 'all'}) == canonical_key({'genre_id': '1'})
+    assert canonical_key({'medium': 'Anime', 'limit': '50'}) == canonical_key({'medium': 'anime'})
+    assert canonical_key({'title': 'Naruto'}) == canonical_key({'title': 'naruto'})
+    assert canonical_key({'limit': ' 10'}) == canonical_key({'limit': '10'})
+
+def test_key_keeps_whitespace_that_changes_the_query():
+    # build_search_query uses the raw title in LIKE '%title%'
+    assert canonical_key({'title': 'a '}) != canonical_key({'title': 'a'})
+
+def test_all_is_only_ignored_for_medium():
+    assert canonical_key({'title': 'all'}) != canonical_key({})
+    assert canonical_key({'studio_id': 'all'}) != canonical_key({})
+    assert canonical_key({'medium': 'ALL'}) != canonical_key({})  # the SQL filters on 'ALL'
+
+def test_get_put_and_invalidate():
+    cache = SearchCache(ttl_seconds=60)
+    cache.put(('k',), [{'entry_id': 1}])
+    assert cache.get(('k',)) == [{'entry_id': 1}]
+    cache.invalidate()
+    assert cache.get(('k',)) is None
+
+def test_put_from_before_an_invalidation_is_dropped():
+    cache = SearchCache(ttl_seconds=60)
+    generation = cache.generation   # request starts reading
+    cache.invalidate()              # a write commits meanwhile
+    cache.put(('k',), [{'entry_id': 1, 'score': 7}], generation)
+    assert cache.get(('k',)) is None
+    assert cache.stats()['stale_puts_skipped'] == 1
+    cache.put(('k',), [{'entry_id': 1, 'score': 8}], cache.generation)
+    assert cache.get(('k',)) == [{'entry_id': 1, 'score': 8}]
+
+def test_byte_bound_evicts_least_recently_used():
+    cache = SearchCache(max_bytes=60, ttl_seconds=60)
+    cache.put(('a',), ['x' * 20])
+    cache.put(('b',), ['y' * 20])
+    cache.get(('a',))
+    cache.put(('c',), ['z' * 20])
+    assert cache.get(('b',)) is None
+    assert cache.get(('a',)) is not None and cache.get(('c',)) is not None
+
+def test_expired_entries_miss():
+    cache = SearchCache(ttl_seconds=-1)
+    cache.put(('k',), [1])
+    assert cache.get(('k',)) is None
+
+def test_invalidated_within():
+    cache = SearchCache()
+    assert not cache.invalidated_within(30)
+    cache.invalidate()
+    assert cache.invalidated_within(30)
+    cache.invalidated_at -= 31
+    assert not cache.invalidated_within(30)
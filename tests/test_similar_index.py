@@ -0,0 +1,90 @@
+import numpy as np
+from scipy import sparse
+from build_similar_index import build_features, top_k_neighbours, write_index
+from similar_index import SimilarIndex
+
+def build(path):
+    write_index(str(path),
+                entry_ids=np.array([1, 2, 3], dtype=np.uint32),
+                neighbours=np.array([[2, 3], [1, 3], [1, 2]], dtype=np.uint32),
+                similarity=np.array([[0.9, 0.5], [0.9, 0.4], [0.5, 0.4]], dtype=np.float16))
+
+def test_missing_file_is_unavailable(tmp_path):
+    index = SimilarIndex(str(tmp_path / 'similar_index.npz'))
+    assert not index.available()
+    assert index.lookup(1) is None
+
+def test_write_replaces_without_leftovers(tmp_path):
+    path = tmp_path / 'similar_index.npz'
+    build(path)
+    build(path)
+    assert [p.name for p in tmp_path.iterdir()] == ['similar_index.npz']
+
+def test_lookup_and_limits(tmp_path):
+    path = tmp_path / 'similar_index.npz'
+    build(path)
+    index = SimilarIndex(str(path))
+    assert [eid for eid, _ in index.lookup(2)] == [1, 3]
+    assert [eid for eid, _ in index.lookup(2, 1)] == [1]
+    assert index.lookup(2, -1) == []
+    assert index.lookup(4) is None
+
+def test_lookup_skips_padding(tmp_path):
+    path = tmp_path / 'similar_index.npz'
+    write_index(str(path),
+                entry_ids=np.array([1, 2], dtype=np.uint32),
+                neighbours=np.array([[2, 0], [0, 0]], dtype=np.uint32),
+                similarity=np.array([[0.5, 0.0], [0.0, 0.0]], dtype=np.float16))
+    index = SimilarIndex(str(path))
+    assert [eid for eid, _ in index.lookup(1)] == [2]
+    assert index.lookup(2) == []
+
+def brute_force_top_k(X, k):
+    dense = X.toarray().astype(np.float64)
+    norms = np.linalg.norm(dense, axis=1)
+    S = dense @ dense.T / np.maximum(np.outer(norms, norms), 1e-12)
+    np.fill_diagonal(S, -np.inf)
+    return np.argsort(-S, axis=1, kind='stable')[:, :k], np.sort(S, axis=1)[:, ::-1][:, :k]
+
+def test_top_k_matches_brute_force():
+    rng = np.random.default_rng(0)
+    dense = rng.random((40, 12)) * (rng.random((40, 12)) < 0.4)
+    dense[:, 0] += 0.01  # every row shares a feature, so every slot has a neighbour
+    X = sparse.csr_matrix(dense / np.linalg.norm(dense, axis=1, keepdims=True), dtype=np.float32)
+    expected_ids, expected_sims = brute_force_top_k(X, 5)
+    for block_size in (None, 7):
+        neighbours, sims = top_k_neighbours(X, 5, block_size)
+        np.testing.assert_allclose(sims, expected_sims, rtol=1e-5)
+        # ties may come back in either order; the similarities of the chosen rows must match
+        dense_sims = (X @ X.T).toarray()
+        np.testing.assert_allclose(np.take_along_axis(dense_sims, neighbours, axis=1), expected_sims, rtol=1e-5)
+
+def test_zero_rows_get_no_neighbours():
+    X = sparse.csr_matrix(np.array([[1, 0], [0, 0], [1, 0], [0, 1]], dtype=np.float32))
+    neighbours, sims = top_k_neighbours(X, 2)
+    assert neighbours[0].tolist() == [2, -1] and sims[0].tolist() == [1.0, 0.0]
+    assert neighbours[1].tolist() == [-1, -1]
+    assert neighbours[3].tolist() == [-1, -1]
+
+class FeatureCursor:
+    ROWS = {
+        'Entry': [(1, 8.0, 1), (2, 7.0, 2), (3, None, None)],
+        'EntryGenre': [(1, 10), (2, 10), (2, 11), (99, 10)],  # 99: not an entry; other junctions empty
+    }
+
+    def execute(self, sql, params=None):
+        table = sql.split('FROM ')[1].split()[0]
+        self.rows = self.ROWS.get(table, [])
+
+    def fetchall(self):
+        return self.rows
+
+def test_build_features():
+    entry_ids, X = build_features(FeatureCursor())
+    assert entry_ids.tolist() == [1, 2, 3]
+    # one column per distinct genre plus score and popularity; unit rows unless empty
+    assert X.shape == (3, 2 + 2)
+    norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+    np.testing.assert_allclose(norms, [1, 1, 0], atol=1e-6)
+    genre_cols = X[:, :2].toarray()
+    assert genre_cols[0, 1] == 0 and genre_cols[1, 1] > genre_cols[1, 0] > 0  # rarer genre weighs more
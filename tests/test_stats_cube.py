@@ -0,0 +1,131 @@
+import itertools
+import re
+import pytest
+from stats_cube import StatsCube, FACETS, MEASURES, AGGREGATES
+
+class FakeDB:
+    """Answers the queries StatsCube issues from in-memory rows."""
+    def __init__(self):
+        # entry_id -> (medium, year, season, month, score, members)
+        self.entries = {}
+        self.junctions = {junction: [] for junction, _, _, _ in FACETS.values()}
+
+    def connection(self):
+        return FakeConnection(self)
+
+class FakeConnection:
+    def __init__(self, db): self.db = db
+    def cursor(self): return FakeCursor(self.db)
+    def close(self): pass
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.rows = []
+
+    def execute(self, sql, params=()):
+        ids = set(params) if ' IN (' in sql else None
+        if 'FROM Entry e' in sql:
+            self.rows = [(eid,) + tuple(r) for eid, r in self.db.entries.items() if ids is None or eid in ids]
+            return
+        table = re.search(r'FROM (\w+)', sql).group(1)
+        if table in self.db.junctions:
+            self.rows = [p for p in self.db.junctions[table] if ids is None or p[0] in ids]
+        else:
+            self.rows = [(i, f'{table} {i}') for i in range(1, 4)]
+
+    def fetchall(self):
+        return self.rows
+
+def make_db():
+    db = FakeDB()
+    db.entries = {
+        1: ('anime', 2020, 'fall', None, 8.0, 1000),
+        2: ('anime', 2020, 'Fall', None, 6.0, 500),
+        3: ('anime', 2021, None, 4, 7.5, None),
+        4: ('manga', 2020, None, 1, None, 300),
+        5: ('manga', None, None, None, 9.0, 50),
+    }
+    db.junctions['EntryGenre'] = [(1, 1), (1, 2), (2, 1), (3, 2), (4, 1), (5, 3)]
+    db.junctions['EntryStudio'] = [(1, 1), (2, 1), (3, 2)]
+    return db
+
+def all_answers(cube):
+    out = {}
+    for facet, measure, agg in itertools.product(['none', 'genre', 'studio'], MEASURES, AGGREGATES):
+        for by in (['year'], ['medium', 'season', 'facet'], []):
+            out[facet, measure, agg, tuple(by)] = cube.query(facet, measure, agg, by)
+    return out
+
+def test_rollups():
+    cube = StatsCube(make_db().connection)
+    assert cube.query('none', 'score', 'avg', ['medium']) == [
+        {'medium': 'anime', 'value': 7.1667, 'count': 3}, {'medium': 'manga', 'value': 9.0, 'count': 2}]
+    fall = cube.query('genre', 'members', 'max', ['season', 'facet'], seasons=['Fall'])
+    assert fall == [{'season': 'Fall', 'genre_id': 1, 'genre': 'Genre 1', 'value': 1000.0, 'count': 2},
+                    {'season': 'Fall', 'genre_id': 2, 'genre': 'Genre 2', 'value': 1000.0, 'count': 1}]
+
+@pytest.mark.parametrize('agg', ['min', 'max'])
+def test_empty_slices_return_no_cells(agg):
+    cube = StatsCube(make_db().connection)
+    assert cube.query('none', 'score', agg, [], seasons=['Foo']) == []
+    assert cube.query('genre', 'score', agg, ['year'], facet_ids=[999]) == []
+    assert cube.query('none', 'members', agg, ['year'], medium=['manga'], year_from=2021) == []
+    # a cell whose entries have no value for the measure reports null, not +-inf
+    assert cube.query('none', 'score', agg, [], medium=['manga'], year_from=2020, year_to=2020) == \
+        [{'value': None, 'count': 1}]
+
+def test_empty_database():
+    cube = StatsCube(FakeDB().connection)
+    for agg in AGGREGATES:
+        assert cube.query('genre', 'score', agg, ['year', 'facet']) == []
+        assert cube.query('none', 'score', agg, []) == []
+
+def test_medium_filter_ignores_case():
+    cube = StatsCube(make_db().connection)
+    assert cube.query('none', 'score', 'count', [], medium=['Anime']) == \
+        cube.query('none', 'score', 'count', [], medium=['anime'])
+
+def test_incremental_update_patches_built_cubes():
+    db = make_db()
+    cube = StatsCube(db.connection)
+    all_answers(cube)
+    built = {f: {k: v.copy() for k, v in c.items()} for f, c in cube._cubes.items()}
+    held = dict(cube._cubes)  # what queries running during the refresh are reading
+    db.entries[1] = ('anime', 2020, 'Fall', None, 5.0, 2000)  # old max score, new min
+    db.junctions['EntryGenre'] = [p for p in db.junctions['EntryGenre'] if p != (1, 2)]
+    del db.entries[4]                                            # deleted entry
+    cube.mark_dirty([1, 4])
+    cube._build = None  # patched, not rebuilt
+    assert all_answers(cube) == all_answers(StatsCube(db.connection))
+    for facet, arrays in held.items():  # the patch swapped in copies
+        assert all((arrays[k] == built[facet][k]).all() for k in arrays)
+
+def test_mostly_dirty_reloads_everything():
+    db = make_db()
+    cube = StatsCube(db.connection)
+    cube.query('genre', 'score', 'avg', ['year'])
+    cube.mark_dirty([1, 2, 3])  # 3 of 5 entries: more than FULL_RELOAD_FRACTION
+    cube._patch = None
+    db.entries[2] = ('anime', 2020, 'Fall', None, 7.0, 500)
+    assert cube.query('none', 'score', 'avg', []) == StatsCube(db.connection).query('none', 'score', 'avg', [])
+    assert cube.stats()['full_reload_pending'] is False
+
+def test_etl_invalidation_passes_entry_ids(monkeypatch):
+    import app as app_module
+    marked = []
+    monkeypatch.setattr(app_module.stats_cube, 'mark_dirty', marked.append)
+    client = app_module.app.test_client()
+    client.post('/api/cache/invalidate', json={'entry_ids': [3, 4]})
+    client.post('/api/cache/invalidate')
+    assert marked == [[3, 4], None]
+
+def test_new_axis_value_rebuilds_the_cube():
+    db = make_db()
+    cube = StatsCube(db.connection)
+    cube.query('genre', 'score', 'avg', ['year'])
+    db.entries[6] = ('anime', 1999, 'Spring', None, 7.0, 10)
+    db.junctions['EntryGenre'].append((6, 3))
+    cube.mark_dirty([6])
+    assert cube.query('genre', 'score', 'avg', ['year'])[0] == {'year': None, 'value': 9.0, 'count': 1}
+    assert {'year': 1999, 'value': 7.0, 'count': 1} in cube.query('genre', 'score', 'avg', ['year'])
@@ -0,0 +1,48 @@
+import pandas as pd
+from validate_exports import FOREIGN_KEYS, JUNCTIONS, PRIMARY_KEYS, validate_exports
+
+def clean_export():
+    """One row per table, every key and foreign key pointing at id 1."""
+    tables = {table: pd.DataFrame({col: [1] for col in cols}) for table, cols in PRIMARY_KEYS.items()}
+    tables['Entry'] = pd.DataFrame({'entry_id': [1, 2], 'mal_id': [10, 10], 'item_type_id': [1, 2]})
+    tables['ItemType'] = pd.DataFrame({'item_type_id': [1, 2]})
+    for table, col, _ in FOREIGN_KEYS:
+        if col not in tables[table]:
+            tables[table][col] = 1
+    # a nullable FK left empty is not dangling
+    tables['AnimeDetails']['source_id'] = [None]
+    return tables
+
+def test_clean_export_passes():
+    assert validate_exports(clean_export()) is True
+
+def test_dangling_foreign_key_fails(capsys):
+    tables = clean_export()
+    tables['EntryGenre'] = pd.DataFrame({'entry_id': [1, 3], 'genre_id': [1, 1]})
+    assert validate_exports(tables) is False
+    assert 'EntryGenre.entry_id -> Entry: 1 rows reference missing ids, e.g. [3]' in capsys.readouterr().out
+
+def test_duplicate_primary_key_fails(capsys):
+    tables = clean_export()
+    tables['Genre'] = pd.DataFrame({'genre_id': [1, 1]})
+    tables['EntryTheme'] = pd.DataFrame({'entry_id': [1, 1], 'theme_id': [1, 1]})
+    assert validate_exports(tables) is False
+    out = capsys.readouterr().out
+    assert 'Genre(genre_id): 1 duplicated keys, e.g. [(1,)]' in out
+    assert 'EntryTheme(entry_id, theme_id): 1 duplicated keys' in out
+
+def test_duplicate_unique_key_fails(capsys):
+    tables = clean_export()
+    tables['Entry']['item_type_id'] = [1, 1]
+    assert validate_exports(tables) is False
+    assert 'Entry(mal_id, item_type_id)' in capsys.readouterr().out
+
+def test_missing_table_fails():
+    tables = clean_export()
+    del tables[next(iter(JUNCTIONS))]
+    assert validate_exports(tables) is False
+
+def test_reads_csv_directory(tmp_path):
+    for table, df in clean_export().items():
+        df.to_csv(tmp_path / f'{table}.csv', index=False)
+    assert validate_exports(str(tmp_path)) is True
@@ -1,27 +1,123 @@
-from flask import Flask, render_template, request, jsonify
-import mysql.connector
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
 from mysql.connector import Error
 import json
+from decimal import Decimal, InvalidOperation
+import os
+import sys
+import time
+from search_cache import SearchCache, canonical_key
+from similar_index import SimilarIndex
+from compact_json import json_response, compress_response
+from stats_cube import StatsCube, FACETS, MEASURES, AGGREGATES, DIMENSIONS
+
+# Shared SQL and DB helpers live next to the ETL scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'python_scripts'))
+from queries import (LOOKUP_TABLES, ITEM_TYPE_QUERY, AUTHOR_QUERY, ENTRY_QUERY,
+                     COMMON_JUNCTIONS, ANIME_JUNCTIONS, MANGA_JUNCTIONS, DETAILS_QUERIES,
+                     JUNCTION_IDS_QUERIES, JUNCTION_INSERTS, JUNCTION_DELETES, build_search_query,
+                     build_search_ids_query)
+from db_router import DBRouter
+from search_projection import refresh_entry_search
+from recompute_ranks import DebouncedRankRefresh
+from bulk_delete import delete_entries
+from catalog_snapshot import CatalogSnapshot, SnapshotMissing
+from score_buffer import ScoreWriteBuffer  # needs search_projection from python_scripts
 
 app = Flask(__name__)
 
-# --- Database Config ---
-DB_CONFIG = {
-    'host': 'localhost',
-    'database': 'myanimelist_db_v2',
-    'user': 'root',
-    'password': '', # Configure your local password here
-    'raise_on_warnings': False
-}
+# --- Database Config (web_interface/config.py) ---
+from config import DB_CONFIG
+
+# --- Replica Routing Config ---
+# DB_CONFIG is the primary. GET routes read from these replicas (same keys as DB_CONFIG);
+# leave empty to send everything to the primary.
+REPLICA_CONFIGS = [
+    # {'host': 'localhost', 'port': 3307, 'database': 'myanimelist_db_v2', 'user': 'root', 'password': ''},
+]
+REPLICA_POLICY = 'least_connections'  # or 'round_robin'
+MAX_REPLICA_LAG_SECONDS = 30          # replicas further behind are skipped (None = don't check)
+READ_YOUR_WRITES_SECONDS = 60         # reads stay on the primary this long after a client writes
+
+db_router = DBRouter(DB_CONFIG, REPLICA_CONFIGS, policy=REPLICA_POLICY,
+                     max_lag_seconds=MAX_REPLICA_LAG_SECONDS)
+
+# --- Search Cache Config ---
+SEARCH_CACHE_ENABLED = True
+search_cache = SearchCache(max_bytes=64 * 1024 * 1024, ttl_seconds=300)
+
+# --- Similar Titles Config ---
+# Built offline by python_scripts/build_similar_index.py (path relative to the working dir)
+similar_index = SimilarIndex('similar_index.npz')
+
+# --- Score Write-Behind Config ---
+# When enabled, /api/update_score journals the update, answers 202 and lets a background
+# flusher apply coalesced scores in batches (see score_buffer.py).
+SCORE_WRITE_BEHIND = False
+# --- Rank Maintenance Config ---
+# Writes schedule a re-rank of the affected medium; bursts are coalesced into one run.
+RANK_REFRESH_DELAY_SECONDS = 5.0
+rank_refresh = DebouncedRankRefresh(lambda: db_router.connection(), delay=RANK_REFRESH_DELAY_SECONDS,
+                                    on_done=lambda entry_ids: search_cache.invalidate())
+
+# --- Read-Only Mirror Config ---
+# Path to a catalog snapshot (python_scripts/catalog_snapshot.py). When set, /api/search,
+# /api/entry/<id> and /api/metadata are served from the mmap'd file without MySQL, and
+# every write route answers 403.
+SNAPSHOT_PATH = None
+catalog = CatalogSnapshot(SNAPSHOT_PATH) if SNAPSHOT_PATH else None
+
+# --- Trend Cube Config ---
+# Built from the DB on the first /api/stats/cube request; writes mark their entries dirty
+stats_cube = StatsCube(lambda: db_router.connection(read_only=True))
+
+def on_scores_flushed(entry_ids):
+    search_cache.invalidate()
+    stats_cube.mark_dirty(entry_ids)
+    rank_refresh.schedule(entry_ids)
+
+score_buffer = ScoreWriteBuffer(lambda: db_router.connection(), 'score_updates.journal',
+                                max_pending=500, flush_interval=2.0, on_flush=on_scores_flushed)
+# Replay at start-up, not on the first update: journals left by a crashed worker are
+# applied even if write-behind has been switched off since
+if SCORE_WRITE_BEHIND or score_buffer.has_orphaned_journals():
+    score_buffer.start()
+
+def is_pinned():
+    """Clients that just wrote (cookie) or ask for it explicitly (header) read from the primary."""
+    if request.headers.get('X-Consistency') == 'primary': return True
+    try:
+        return float(request.cookies.get('rw_pin', 0) or 0) > time.time()
+    except ValueError:
+        return False  # malformed cookie: not pinned
 
-def get_db_connection():
+def get_db_connection(read_only=False):
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        return conn
+        return db_router.connection(read_only=read_only and not is_pinned())
     except Error as e:
         print(f"Error connecting: {e}")
         return None
 
+@app.before_request
+def reject_writes_on_mirror():
+    if catalog and request.method != 'GET' and request.path.startswith('/api/'):
+        return jsonify({'error': 'Read-only mirror'}), 403
+
+@app.errorhandler(SnapshotMissing)
+def snapshot_missing(e):
+    # Mirror configured but the snapshot hasn't been copied over yet
+    return jsonify({'error': str(e)}), 503
+
+@app.after_request
+def pin_writers_to_primary(response):
+    if request.method != 'GET' and request.path.startswith('/api/') and response.status_code < 400:
+        until = time.time() + READ_YOUR_WRITES_SECONDS
+        response.set_cookie('rw_pin', str(until), max_age=READ_YOUR_WRITES_SECONDS)
+    return response
+
+@app.after_request
+def compress(response):
+    return compress_response(response, request)
+
 # --- Routes ---
 
 @app.route('/')
@@ -39,152 +135,121 @@ def insert_manga_page():
 @app.route('/api/metadata')
 def get_metadata():
     """Fetch options for dropdowns (Genres, Studios, etc.)"""
-    conn = get_db_connection()
+    if catalog: return json_response(catalog.metadata(), request)
+    conn = get_db_connection(read_only=True)
     if not conn: return jsonify({'error': 'DB Connection Failed'}), 500
     cursor = conn.cursor(dictionary=True)
     
     data = {}
     
     # Comprehensive Lookups
-    tables = {
-        'Genre': 'name', 
-        'Theme': 'name', 
-        'Demographic': 'name', 
-        'Source': 'source_name', 
-        'Medium': 'name', 
-        'Studio': 'name', 
-        'Licensor': 'name',
-        'Producer': 'name',
-        'StatusType': 'status_name',
-        'AgeRating': 'code',
-        'Serialization': 'name'
-    }
-    
-    for tbl, col in tables.items():
+    for tbl, col in LOOKUP_TABLES.items():
         cursor.execute(f"SELECT * FROM {tbl} ORDER BY {col}")
         data[tbl] = cursor.fetchall()
 
     # ItemType with Medium Join for Frontend Compatibility
-    cursor.execute("""
-        SELECT it.item_type_id, it.type_name, m.name as medium_type 
-        FROM ItemType it 
-        JOIN Medium m ON it.medium_id = m.medium_id 
-        ORDER BY it.type_name
-    """)
+    cursor.execute(ITEM_TYPE_QUERY)
     data['ItemType'] = cursor.fetchall()
     
     # Author (special case for display_name)
-    cursor.execute("SELECT author_id, CONCAT_WS(', ', last_name, first_name) as display_name FROM Author ORDER BY last_name")
+    cursor.execute(AUTHOR_QUERY)
     data['Author'] = cursor.fetchall()
 
     conn.close()
-    return jsonify(data)
+    return json_response(data, request)
 
 @app.route('/api/search')
 def search():
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
-    # Expanded Select for "All Attributes"
-    query = """
-        SELECT DISTINCT e.entry_id, e.title_name, e.score, m.name as medium_type, it.type_name, 
-               ad.episodes, md.volumes, e.ranked, e.popularity,
-               st.status_name, ar.code as age_rating,
-               ad.premier_date_season, ad.premier_date_year
-        FROM Entry e
-        LEFT JOIN ItemType it ON e.item_type_id = it.item_type_id
-        LEFT JOIN Medium m ON it.medium_id = m.medium_id
-        LEFT JOIN AnimeDetails ad ON e.entry_id = ad.entry_id
-        LEFT JOIN MangaDetails md ON e.entry_id = md.entry_id
-        LEFT JOIN StatusType st ON (ad.status_id = st.status_id OR md.status_id = st.status_id)
-        LEFT JOIN AgeRating ar ON ad.age_rating_id = ar.age_rating_id
-        WHERE 1=1
-    """
-    params = []
-    
-    # 1. Standard Filters
-    if request.args.get('title'):
-        query += " AND e.title_name LIKE %s"
-        params.append(f"%{request.args.get('title')}%")
-        
-    if request.args.get('score_min'):
-        query += " AND e.score >= %s"
-        params.append(request.args.get('score_min'))
-        
-    medium = request.args.get('medium')
-    if medium and medium != 'all':
-        query += " AND m.name = %s"
-        params.append(medium)
-
-    if request.args.get('item_type_id'):
-        query += " AND e.item_type_id = %s"
-        params.append(request.args.get('item_type_id'))
-
-    if request.args.get('year'):
-        query += " AND ad.premier_date_year = %s"
-        params.append(request.args.get('year'))
-
-    if request.args.get('season'):
-        query += " AND ad.premier_date_season = %s"
-        params.append(request.args.get('season'))
-
-    if request.args.get('status_id'):
-        query += " AND (ad.status_id = %s OR md.status_id = %s)"
-        params.append(request.args.get('status_id'))
-        params.append(request.args.get('status_id'))
-
-    if request.args.get('source_id'):
-        query += " AND ad.source_id = %s"
-        params.append(request.args.get('source_id'))
-
-    if request.args.get('age_rating_id'):
-        query += " AND ad.age_rating_id = %s"
-        params.append(request.args.get('age_rating_id'))
-
-    # 2. M2M Filters using Subqueries (Cleaner than JOINs for filtering)
-    def add_m2m_filter(param_name, table, col_id):
-        val = request.args.get(param_name)
-        if val:
-            return f" AND e.entry_id IN (SELECT entry_id FROM {table} WHERE {col_id} = %s)", val
-        return None, None
-
-    m2m_filters = [
-        ('genre_id', 'EntryGenre', 'genre_id'),
-        ('theme_id', 'EntryTheme', 'theme_id'),
-        ('demographic_id', 'EntryDemographic', 'demographic_id'),
-        ('studio_id', 'EntryStudio', 'studio_id'),
-        ('producer_id', 'EntryProducer', 'producer_id'),
-        ('licensor_id', 'EntryLicensor', 'licensor_id'),
-        ('author_id', 'EntryAuthor', 'author_id'),
-        ('serialization_id', 'EntrySerialization', 'serialization_id')
-    ]
-
-    for param, table, col in m2m_filters:
-        sql, val = add_m2m_filter(param, table, col)
-        if sql:
-            query += sql
-            params.append(val)
-
-    # Limit Logic
+    if catalog:
+        try:
+            return json_response(catalog.search(request.args), request)
+        except ValueError:
+            return jsonify({'error': 'Invalid numeric filter'}), 400
+
+    # Pinned clients must see their own writes: neither served from nor stored in the cache
+    use_cache = SEARCH_CACHE_ENABLED and not is_pinned()
+    key = canonical_key(request.args)
+    generation = search_cache.generation  # taken before the read, checked by put()
+    if use_cache:
+        cached = search_cache.get(key)
+        if cached is not None: return json_response(cached, request)
+
+    conn = get_db_connection(read_only=True)
+    if not conn: return jsonify({'error': 'DB Connection Failed'}), 500
+    query, params = build_search_query(request.args)
     try:
-        limit = int(request.args.get('limit', 50))
-    except (ValueError, TypeError):
-        limit = 50
-        
-    query += " ORDER BY e.popularity ASC LIMIT %s"
-    params.append(limit)
-    
-    cursor.execute(query, params)
-    results = cursor.fetchall()
-    conn.close()
-    return jsonify(results)
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(query, params)
+        results = cursor.fetchall()
+    finally:
+        conn.close()
+    # A replica may not have applied the write behind a recent invalidation yet
+    from_replica = conn.node is not db_router.primary
+    lag_window = MAX_REPLICA_LAG_SECONDS if MAX_REPLICA_LAG_SECONDS is not None else READ_YOUR_WRITES_SECONDS
+    if use_cache and not (from_replica and search_cache.invalidated_within(lag_window)):
+        search_cache.put(key, results, generation)
+    return json_response(results, request)
+
+@app.route('/api/cache/stats')
+def cache_stats():
+    return jsonify(search_cache.stats())
+
+@app.route('/api/db/status')
+def db_status():
+    """Primary / replica routing state (lag as last seen by the monitor thread)."""
+    return jsonify(db_router.status())
+
+@app.route('/api/cache/invalidate', methods=['POST'])
+def invalidate_cache():
+    """Called by the ETL once a load has been committed; {"entry_ids": [...]} names the
+    loaded entries (without it the trend cube reloads everything)."""
+    search_cache.invalidate()
+    entry_ids = (request.get_json(silent=True) or {}).get('entry_ids')
+    stats_cube.mark_dirty(entry_ids if isinstance(entry_ids, list) else None)
+    return jsonify({'message': 'Cache invalidated'})
+
+@app.route('/api/stats/cube')
+def stats_cube_query():
+    """Roll-up / slice of the trend cube, e.g.
+    /api/stats/cube?facet=genre&measure=score&agg=avg&by=year,facet&medium=anime&year_from=2000"""
+    args = request.args
+    facet = args.get('facet', 'none')
+    measure = args.get('measure', 'score')
+    agg = args.get('agg', 'avg')
+    by = [d for d in args.get('by', 'year').split(',') if d]
+    if facet != 'none' and facet not in FACETS or measure not in MEASURES or agg not in AGGREGATES \
+            or any(d not in DIMENSIONS for d in by):
+        return jsonify({'error': 'Invalid facet, measure, agg or by',
+                        'facets': ['none'] + list(FACETS), 'measures': MEASURES,
+                        'aggs': AGGREGATES, 'dimensions': DIMENSIONS}), 400
+    try:
+        year_from = int(args['year_from']) if args.get('year_from') else None
+        year_to = int(args['year_to']) if args.get('year_to') else None
+        facet_ids = [int(x) for x in args['facet_id'].split(',')] if args.get('facet_id') else None
+    except ValueError:
+        return jsonify({'error': 'year_from, year_to and facet_id must be integers'}), 400
+    seasons = [s.capitalize() for s in args['season'].split(',')] if args.get('season') else None
+    medium = args['medium'].split(',') if args.get('medium') and args['medium'] != 'all' else None
+
+    start = time.perf_counter()
+    try:
+        cells = stats_cube.query(facet, measure, agg, by, medium=medium, year_from=year_from,
+                                 year_to=year_to, seasons=seasons, facet_ids=facet_ids)
+    except Error as e:
+        return jsonify({'error': str(e)}), 500
+    return json_response({'facet': facet, 'measure': measure, 'agg': agg, 'by': by, 'cells': cells,
+                          'elapsed_ms': round((time.perf_counter() - start) * 1000, 2)}, request)
+
+@app.route('/api/stats/cube/status')
+def stats_cube_status():
+    return jsonify(stats_cube.stats())
 
-def insert_m2m(cursor, entry_id, table, col_id, id_list):
+def insert_m2m(conn, entry_id, table, id_list):
     if not id_list: return
     # Ensure id_list is a list
     if not isinstance(id_list, list): id_list = [id_list]
-    for x_id in id_list:
-        cursor.execute(f"INSERT INTO {table} (entry_id, {col_id}) VALUES (%s, %s)", (entry_id, x_id))
+    # executemany sends the rows as one multi-row INSERT
+    conn.cursor().executemany(JUNCTION_INSERTS[table], [(entry_id, x_id) for x_id in id_list])
 
 @app.route('/api/insert/anime', methods=['POST'])
 def insert_anime():
@@ -216,14 +281,20 @@ def insert_anime():
         # (Entry_Duration logic removed - duration now in AnimeDetails)
 
         # 3. M2M Relationships
-        insert_m2m(cursor, entry_id, 'EntryGenre', 'genre_id', data.get('genres'))
-        insert_m2m(cursor, entry_id, 'EntryTheme', 'theme_id', data.get('themes'))
-        insert_m2m(cursor, entry_id, 'EntryDemographic', 'demographic_id', data.get('demographics'))
-        insert_m2m(cursor, entry_id, 'EntryStudio', 'studio_id', data.get('studios'))
-        insert_m2m(cursor, entry_id, 'EntryProducer', 'producer_id', data.get('producers'))
-        insert_m2m(cursor, entry_id, 'EntryLicensor', 'licensor_id', data.get('licensors'))
+        insert_m2m(conn, entry_id, 'EntryGenre', data.get('genres'))
+        insert_m2m(conn, entry_id, 'EntryTheme', data.get('themes'))
+        insert_m2m(conn, entry_id, 'EntryDemographic', data.get('demographics'))
+        insert_m2m(conn, entry_id, 'EntryStudio', data.get('studios'))
+        insert_m2m(conn, entry_id, 'EntryProducer', data.get('producers'))
+        insert_m2m(conn, entry_id, 'EntryLicensor', data.get('licensors'))
+
+        # 4. Keep the search projection in the same transaction
+        refresh_entry_search(cursor, [entry_id])
 
         conn.commit()
+        search_cache.invalidate()
+        rank_refresh.schedule([entry_id])
+        stats_cube.mark_dirty([entry_id])
         return jsonify({'message': 'Anime Added', 'entry_id': entry_id})
     except Error as e:
         print("SQL Error:", e)
@@ -251,13 +322,19 @@ def insert_manga():
         """, (entry_id, data.get('volumes'), data.get('chapters'), data.get('status_id')))
 
         # 3. M2M Relationships
-        insert_m2m(cursor, entry_id, 'EntryGenre', 'genre_id', data.get('genres'))
-        insert_m2m(cursor, entry_id, 'EntryTheme', 'theme_id', data.get('themes'))
-        insert_m2m(cursor, entry_id, 'EntryDemographic', 'demographic_id', data.get('demographics'))
-        insert_m2m(cursor, entry_id, 'EntryAuthor', 'author_id', data.get('authors'))
-        insert_m2m(cursor, entry_id, 'EntrySerialization', 'serialization_id', data.get('serializations'))
+        insert_m2m(conn, entry_id, 'EntryGenre', data.get('genres'))
+        insert_m2m(conn, entry_id, 'EntryTheme', data.get('themes'))
+        insert_m2m(conn, entry_id, 'EntryDemographic', data.get('demographics'))
+        insert_m2m(conn, entry_id, 'EntryAuthor', data.get('authors'))
+        insert_m2m(conn, entry_id, 'EntrySerialization', data.get('serializations'))
+
+        # 4. Keep the search projection in the same transaction
+        refresh_entry_search(cursor, [entry_id])
 
         conn.commit()
+        search_cache.invalidate()
+        rank_refresh.schedule([entry_id])
+        stats_cube.mark_dirty([entry_id])
         return jsonify({'message': 'Manga Added', 'entry_id': entry_id})
     except Error as e:
         print("SQL Error:", e)
@@ -274,26 +351,99 @@ def delete_entry(entry_id):
         if cursor.rowcount == 0:
             return jsonify({'error': 'Entry not found'}), 404
         conn.commit()
+        search_cache.invalidate()
+        rank_refresh.schedule(None)
+        stats_cube.mark_dirty([entry_id])
         return jsonify({'message': 'Deleted successfully'})
     except Error as e:
         return jsonify({'error': str(e)}), 400
     finally:
         conn.close()
 
+@app.route('/api/delete/bulk', methods=['POST'])
+def bulk_delete():
+    """Delete many entries: {"entry_ids": [...]} or {"filters": {<same keys as /api/search>}}.
+    Streams one JSON progress line per committed chunk (application/x-ndjson)."""
+    body = request.json or {}
+    if body.get('entry_ids') is not None:
+        try:
+            entry_ids = [int(x) for x in body['entry_ids']]
+        except (ValueError, TypeError):
+            return jsonify({'error': 'entry_ids must be integers'}), 400
+    else:
+        query, params = build_search_ids_query(body.get('filters') or {})
+        if not query:
+            return jsonify({'error': 'Give entry_ids or at least one filter'}), 400
+        conn = get_db_connection()
+        if not conn: return jsonify({'error': 'DB Connection Failed'}), 500
+        try:
+            cursor = conn.cursor()
+            cursor.execute(query, params)  # on the primary: the ids must not lag behind
+            entry_ids = [row[0] for row in cursor.fetchall()]
+        finally:
+            conn.close()
+    try:
+        chunk_size = max(1, min(int(body.get('chunk_size', 500)), 5000))
+    except (ValueError, TypeError):
+        chunk_size = 500
+
+    def generate():
+        # The connection is opened here, not in the view: a client that disconnects before
+        # the body is iterated never starts the generator, so its finally would never run
+        conn = get_db_connection()
+        if not conn:
+            yield json.dumps({'error': 'DB Connection Failed'}) + '\n'
+            return
+        try:
+            for progress in delete_entries(conn, entry_ids, chunk_size=chunk_size):
+                yield json.dumps(progress) + '\n'
+        except Error as e:
+            yield json.dumps({'error': str(e)}) + '\n'
+        finally:
+            conn.close()
+            # Chunks committed before an error are gone too
+            search_cache.invalidate()
+            if entry_ids: rank_refresh.schedule(None)
+            stats_cube.mark_dirty(entry_ids)
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @app.route('/api/update_score/<int:entry_id>', methods=['POST'])
 def update_score(entry_id):
     data = request.json
     new_score = data.get('score')
+
+    if SCORE_WRITE_BEHIND:
+        # Validate now: a bad value would otherwise fail the whole batch at flush time
+        try:
+            score = Decimal(str(new_score)).quantize(Decimal('0.01'))
+            valid = Decimal(0) <= score <= Decimal(10)
+        except (InvalidOperation, ValueError):
+            valid = False
+        if not valid:
+            return jsonify({'error': 'Invalid score'}), 400
+        score_buffer.submit(entry_id, str(score))
+        return jsonify({'message': 'Score queued'}), 202
+
     conn = get_db_connection()
     cursor = conn.cursor()
     try:
         cursor.execute("UPDATE Entry SET score = %s WHERE entry_id = %s", (new_score, entry_id))
+        refresh_entry_search(cursor, [entry_id])
         conn.commit()
+        search_cache.invalidate()
+        rank_refresh.schedule([entry_id])
+        stats_cube.mark_dirty([entry_id])
         return jsonify({'message': 'Score updated'})
     except Error as e:
         return jsonify({'error': str(e)}), 400
     finally:
         conn.close()
+
+@app.route('/api/update_score/stats')
+def score_buffer_stats():
+    return jsonify(dict(score_buffer.stats(), enabled=SCORE_WRITE_BEHIND))
+
 @app.route('/update/<int:entry_id>')
 def update_page(entry_id):
     # Just render the template; the JS will fetch details
@@ -301,27 +451,21 @@ def update_page(entry_id):
 
 @app.route('/api/entry/<int:entry_id>', methods=['GET'])
 def get_entry_details(entry_id):
-    conn = get_db_connection()
+    if catalog:
+        entry = catalog.entry(entry_id)
+        return jsonify(entry) if entry else (jsonify({'error': 'Not Found'}), 404)
+    conn = get_db_connection(read_only=True)
     cursor = conn.cursor(dictionary=True)
     try:
         # 1. Main Entry Info + Medium from ItemType -> Medium
-        cursor.execute("""
-            SELECT e.*, m.name as medium_type
-            FROM Entry e 
-            JOIN ItemType it ON e.item_type_id = it.item_type_id
-            JOIN Medium m ON it.medium_id = m.medium_id
-            WHERE e.entry_id = %s
-        """, (entry_id,))
+        cursor.execute(ENTRY_QUERY, (entry_id,))
         entry = cursor.fetchone()
         if not entry: return jsonify({'error': 'Not Found'}), 404
 
         # 2. Subtype Details
-        if entry['medium_type'] == 'anime':
-            cursor.execute("SELECT * FROM AnimeDetails WHERE entry_id=%s", (entry_id,))
-            details = cursor.fetchone()
-        else:
-            cursor.execute("SELECT * FROM MangaDetails WHERE entry_id=%s", (entry_id,))
-            details = cursor.fetchone()
+        medium = 'anime' if entry['medium_type'] == 'anime' else 'manga'
+        cursor.execute(DETAILS_QUERIES[medium], (entry_id,))
+        details = cursor.fetchone()
         
         # Merge details into entry
         if details:
@@ -329,26 +473,32 @@ def get_entry_details(entry_id):
 
         # 3. Junctions (Get Lists of IDs)
         def get_ids(tbl, col):
-            cursor.execute(f"SELECT {col} FROM {tbl} WHERE entry_id=%s", (entry_id,))
+            cursor.execute(JUNCTION_IDS_QUERIES[tbl], (entry_id,))
             return [x[col] for x in cursor.fetchall()]
 
-        entry['genres'] = get_ids('EntryGenre', 'genre_id')
-        entry['themes'] = get_ids('EntryTheme', 'theme_id')
-        entry['demographics'] = get_ids('EntryDemographic', 'demographic_id')
-        
-        if entry['medium_type'] == 'anime':
-            entry['studios'] = get_ids('EntryStudio', 'studio_id')
-            entry['producers'] = get_ids('EntryProducer', 'producer_id')
-            entry['licensors'] = get_ids('EntryLicensor', 'licensor_id')
-        else:
-            entry['authors'] = get_ids('EntryAuthor', 'author_id')
-            entry['serializations'] = get_ids('EntrySerialization', 'serialization_id')
+        junctions = COMMON_JUNCTIONS + (ANIME_JUNCTIONS if entry['medium_type'] == 'anime' else MANGA_JUNCTIONS)
+        for key, tbl, col in junctions:
+            entry[key] = get_ids(tbl, col)
 
         # Fix JSON serialization for Decimal/Date
         return jsonify(json.loads(json.dumps(entry, default=str)))
     finally:
         conn.close()
 
+@app.route('/api/entry/<int:entry_id>/similar', methods=['GET'])
+def get_similar_entries(entry_id):
+    """Precomputed "more like this" neighbours; no database access."""
+    try:
+        limit = int(request.args.get('limit', 10))
+    except (ValueError, TypeError):
+        limit = 10
+    if not similar_index.available():
+        return jsonify({'error': 'Similar-titles index not built yet '
+                                 '(run python_scripts/build_similar_index.py)'}), 503
+    neighbours = similar_index.lookup(entry_id, limit)
+    if neighbours is None: return jsonify({'error': 'Not Found'}), 404
+    return jsonify([{'entry_id': eid, 'similarity': sim} for eid, sim in neighbours])
+
 @app.route('/api/update/<int:entry_id>', methods=['POST'])
 def update_full_entry(entry_id):
     data = request.json
@@ -383,24 +533,30 @@ def update_full_entry(entry_id):
             """, (data.get('volumes'), data.get('chapters'), data.get('status_id'), entry_id))
             
         # 3. M2M Sync (Delete All -> Insert New)
-        def sync_m2m(tbl, col, val_list):
-            cursor.execute(f"DELETE FROM {tbl} WHERE entry_id=%s", (entry_id,))
+        def sync_m2m(tbl, val_list):
+            cursor.execute(JUNCTION_DELETES[tbl], (entry_id,))
             if val_list:
-                insert_m2m(cursor, entry_id, tbl, col, val_list)
+                insert_m2m(conn, entry_id, tbl, val_list)
 
-        sync_m2m('EntryGenre', 'genre_id', data.get('genres'))
-        sync_m2m('EntryTheme', 'theme_id', data.get('themes'))
-        sync_m2m('EntryDemographic', 'demographic_id', data.get('demographics'))
+        sync_m2m('EntryGenre', data.get('genres'))
+        sync_m2m('EntryTheme', data.get('themes'))
+        sync_m2m('EntryDemographic', data.get('demographics'))
         
         if medium == 'anime':
-            sync_m2m('EntryStudio', 'studio_id', data.get('studios'))
-            sync_m2m('EntryProducer', 'producer_id', data.get('producers'))
-            sync_m2m('EntryLicensor', 'licensor_id', data.get('licensors'))
+            sync_m2m('EntryStudio', data.get('studios'))
+            sync_m2m('EntryProducer', data.get('producers'))
+            sync_m2m('EntryLicensor', data.get('licensors'))
         else:
-            sync_m2m('EntryAuthor', 'author_id', data.get('authors'))
-            sync_m2m('EntrySerialization', 'serialization_id', data.get('serializations'))
+            sync_m2m('EntryAuthor', data.get('authors'))
+            sync_m2m('EntrySerialization', data.get('serializations'))
+
+        # 4. Keep the search projection in the same transaction
+        refresh_entry_search(cursor, [entry_id])
 
         conn.commit()
+        search_cache.invalidate()
+        rank_refresh.schedule([entry_id])
+        stats_cube.mark_dirty([entry_id])
         return jsonify({'message': 'Update Successful'})
     except Error as e:
         print(e)
@@ -0,0 +1,111 @@
+import asyncio
+import json
+import os
+import sys
+from quart import Quart, request, jsonify
+import aiomysql
+from config import DB_CONFIG
+
+# Shared SQL lives next to the ETL scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'python_scripts'))
+from queries import (LOOKUP_TABLES, ITEM_TYPE_QUERY, AUTHOR_QUERY, ENTRY_QUERY,
+                     COMMON_JUNCTIONS, ANIME_JUNCTIONS, MANGA_JUNCTIONS, build_search_query)
+
+# Async (ASGI) serving mode for the read-only API.
+# Serves /api/search, /api/metadata and /api/entry/<id> from an aiomysql pool so a
+# worker is never blocked on MySQL I/O. Run with an ASGI server, e.g.:
+#   cd web_interface && hypercorn async_app:app --bind 127.0.0.1:5001
+app = Quart(__name__)
+
+# --- Pool Config ---
+POOL_CONFIG = {
+    'minsize': 1,
+    'maxsize': 20,   # Upper bound on concurrent MySQL connections per worker
+    'pool_recycle': 3600
+}
+
+pool = None
+
+@app.before_serving
+async def create_pool():
+    global pool
+    pool = await aiomysql.create_pool(
+        host=DB_CONFIG['host'], port=DB_CONFIG.get('port', 3306),
+        user=DB_CONFIG['user'], password=DB_CONFIG['password'], db=DB_CONFIG['database'],
+        charset='utf8mb4', autocommit=True, **POOL_CONFIG
+    )
+
+@app.after_serving
+async def close_pool():
+    pool.close()
+    await pool.wait_closed()
+
+# A request's independent queries run concurrently with asyncio.gather, each on its own
+# pooled connection that is released as soon as that query is done. A task never holds one
+# connection while waiting for another, so a busy pool makes requests queue, not deadlock.
+# The junction lookups of an entry are still one UNION ALL query (one connection, not ~7).
+
+async def fetch_all(query, params=None):
+    async with pool.acquire() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(query, params)
+            return await cursor.fetchall()
+
+async def fetch_one(query, params=None):
+    rows = await fetch_all(query, params)
+    return rows[0] if rows else None
+
+def junction_ids_query(junctions):
+    """All junction ids of one entry in one round trip: rows of (json key, id)."""
+    return " UNION ALL ".join(f"SELECT '{key}' AS k, {col} AS id FROM {tbl} WHERE entry_id=%s"
+                              for key, tbl, col in junctions)
+
+ENTRY_JUNCTIONS = {
+    'anime': COMMON_JUNCTIONS + ANIME_JUNCTIONS,
+    'manga': COMMON_JUNCTIONS + MANGA_JUNCTIONS
+}
+JUNCTION_IDS_QUERY = {medium: junction_ids_query(j) for medium, j in ENTRY_JUNCTIONS.items()}
+
+# --- Routes ---
+
+@app.route('/api/metadata')
+async def get_metadata():
+    """Fetch options for dropdowns (Genres, Studios, etc.)"""
+    queries = {tbl: f"SELECT * FROM {tbl} ORDER BY {col}" for tbl, col in LOOKUP_TABLES.items()}
+    queries['ItemType'] = ITEM_TYPE_QUERY
+    queries['Author'] = AUTHOR_QUERY
+    results = await asyncio.gather(*(fetch_all(q) for q in queries.values()))
+    return jsonify(dict(zip(queries, results)))
+
+@app.route('/api/search')
+async def search():
+    query, params = build_search_query(request.args)
+    return jsonify(await fetch_all(query, params))
+
+@app.route('/api/entry/<int:entry_id>', methods=['GET'])
+async def get_entry_details(entry_id):
+    # 1. Main Entry Info (medium decides which subtype / junctions to load)
+    entry = await fetch_one(ENTRY_QUERY, (entry_id,))
+    if not entry: return jsonify({'error': 'Not Found'}), 404
+    medium = 'anime' if entry['medium_type'] == 'anime' else 'manga'
+    details_table = 'AnimeDetails' if medium == 'anime' else 'MangaDetails'
+
+    # 2. Subtype Details + 3. Junctions (one UNION ALL query), concurrently
+    junctions = ENTRY_JUNCTIONS[medium]
+    details, junction_rows = await asyncio.gather(
+        fetch_one(f"SELECT * FROM {details_table} WHERE entry_id=%s", (entry_id,)),
+        fetch_all(JUNCTION_IDS_QUERY[medium], (entry_id,) * len(junctions)))
+
+    # Merge details into entry
+    if details:
+        entry.update(details)
+    for key, _, _ in junctions:
+        entry[key] = []
+    for row in junction_rows:
+        entry[row['k']].append(row['id'])
+
+    # Fix JSON serialization for Decimal/Date
+    return jsonify(json.loads(json.dumps(entry, default=str)))
+
+if __name__ == '__main__':
+    app.run(debug=True, port=5001)
@@ -0,0 +1,95 @@
+import gzip
+import json
+from datetime import date
+from decimal import Decimal
+from flask import Response
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# --- Compact JSON responses ---
+# Clients that send `Accept: application/vnd.mal.columnar+json` get every list of row
+# dicts as one columnar block:
+#   {"$columnar": 1, "columns": ["entry_id", "status_name", ...], "length": 2,
+#    "values": [[1, 2], [0, 0]], "dicts": {"1": ["Finished Airing"]}}
+# Column i holds the values of columns[i]; when dicts has key i the column holds indexes
+# into that list instead (repeated strings such as status_name / age_rating are sent once).
+# Everyone else gets the usual array of objects. Both are gzip/brotli compressed above
+# COMPRESS_MIN_BYTES. orjson is used for serialization when installed.
+
+COLUMNAR_MIME = 'application/vnd.mal.columnar+json'
+COMPRESS_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+DICT_MAX_RATIO = 0.5  # dictionary-encode a string column when distinct / rows <= this
+
+def _default(o):
+    # Same conversions as Flask's jsonify, so both formats decode to identical rows
+    if isinstance(o, Decimal): return str(o)
+    if isinstance(o, date): return http_date(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+def dumps(obj):
+    if orjson:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+    return json.dumps(obj, default=_default, separators=(',', ':')).encode('utf-8')
+
+def to_columnar(rows):
+    columns = list(rows[0])
+    values, dicts = [], {}
+    for i, col in enumerate(columns):
+        column = [r.get(col) for r in rows]
+        if len(rows) > 1 and all(isinstance(v, str) or v is None for v in column) \
+                and len(set(column)) <= len(rows) * DICT_MAX_RATIO:
+            lookup = {v: n for n, v in enumerate(dict.fromkeys(column))}
+            dicts[str(i)] = list(lookup)
+            column = [lookup[v] for v in column]
+        values.append(column)
+    return {'$columnar': 1, 'columns': columns, 'length': len(rows), 'values': values, 'dicts': dicts}
+
+def compact(obj):
+    """Recursively replace every non-empty list of dicts with a columnar block."""
+    if isinstance(obj, list) and obj and all(isinstance(r, dict) for r in obj):
+        return to_columnar(obj)
+    if isinstance(obj, dict):
+        return {k: compact(v) for k, v in obj.items()}
+    return obj
+
+def wants_columnar(request):
+    return request.accept_mimetypes[COLUMNAR_MIME] > request.accept_mimetypes['application/json']
+
+def json_response(data, request, status=200):
+    """Serialize `data` in the format the client negotiated (see module comment)."""
+    if wants_columnar(request):
+        response = Response(dumps(compact(data)), status=status, mimetype=COLUMNAR_MIME)
+    else:
+        response = Response(dumps(data), status=status, mimetype='application/json')
+    response.vary.add('Accept')
+    return response
+
+def compress_response(response, request):
+    """after_request hook: compress JSON bodies above COMPRESS_MIN_BYTES (brotli preferred)."""
+    if response.direct_passthrough or response.status_code < 200 or response.status_code >= 300 \
+            or 'Content-Encoding' in response.headers \
+            or response.mimetype not in ('application/json', COLUMNAR_MIME):
+        return response
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_BYTES: return response
+    accepted = request.accept_encodings
+    if brotli and accepted['br']:
+        response.set_data(brotli.compress(body, quality=BROTLI_QUALITY))
+        response.headers['Content-Encoding'] = 'br'
+    elif accepted['gzip']:
+        response.set_data(gzip.compress(body, compresslevel=GZIP_LEVEL))
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        return response
+    response.vary.add('Accept-Encoding')
+    return response
@@ -0,0 +1,10 @@
+# --- Database Config ---
+# Shared by the Flask app (app.py) and the async read API (async_app.py), so neither has to
+# import the other (importing app.py starts its pools, score buffer and snapshot loading).
+DB_CONFIG = {
+    'host': 'localhost',
+    'database': 'myanimelist_db_v2',
+    'user': 'root',
+    'password': '', # Configure your local password here
+    'raise_on_warnings': False
+}
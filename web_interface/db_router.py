@@ -0,0 +1,146 @@
+import itertools
+import threading
+import time
+import mysql.connector
+from mysql.connector import Error, pooling
+from mysql.connector.errors import PoolError
+import prepared  # python_scripts/, on sys.path via app.py
+from replication import replication_lag
+
+# --- Primary / Replica Routing ---
+# Writes (and read-your-writes reads) go to the primary; other reads are balanced
+# across replicas whose replication lag is within MAX lag. With no replicas
+# configured (or none healthy) every connection falls back to the primary.
+# Lag is polled by a background thread (started with the first replica read), so
+# requests only read the last result; replicas count as unhealthy until first checked.
+
+class RoutedConnection:
+    """Pooled connection that tells the router when it is released."""
+    def __init__(self, conn, node, router):
+        self._conn = conn
+        self.node = node
+        self._router = router
+        self._closed = False
+
+    def close(self):
+        if self._closed: return
+        self._closed = True
+        self._router._release(self.node)
+        prepared.forget(self._conn)  # the pool resets the session, dropping its statement handles
+        self._conn.close()  # returns pooled connections to their pool
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+class Node:
+    def __init__(self, name, config, pool_size):
+        self.name = name
+        self.config = config
+        self.pool_size = pool_size
+        self._pool = None
+        self.active = 0
+        self.lag = None
+        self.healthy = True
+        self.checked_at = 0.0
+        self._lag_conn = None  # monitor thread only
+
+    @property
+    def pool(self):
+        # Created on first use so importing the app doesn't require a reachable server.
+        # The pool resets each session on release (open transactions, session variables,
+        # temporary tables and prepared statements don't leak into the next request).
+        if self._pool is None:
+            self._pool = pooling.MySQLConnectionPool(pool_name=self.name, pool_size=self.pool_size,
+                                                     **self.config)
+        return self._pool
+
+    def get_connection(self):
+        try:
+            return self.pool.get_connection()
+        except PoolError:
+            # Pool exhausted: don't fail the request, open an unpooled connection instead
+            return mysql.connector.connect(**self.config)
+
+class DBRouter:
+    def __init__(self, primary_config, replica_configs=(), policy='least_connections',
+                 max_lag_seconds=30, lag_check_interval=5, pool_size=10):
+        if policy not in ('least_connections', 'round_robin'):
+            raise ValueError(f"Unknown routing policy: {policy}")
+        self.policy = policy
+        self.max_lag = max_lag_seconds  # None disables the lag check
+        self.lag_check_interval = lag_check_interval
+        self.primary = Node('primary', primary_config, pool_size)
+        self.replicas = [Node(f'replica{i}', cfg, pool_size) for i, cfg in enumerate(replica_configs)]
+        for r in self.replicas:
+            r.healthy = self.max_lag is None
+        self._rr = itertools.count()
+        self._lock = threading.Lock()
+        self._monitor = None
+
+    def connection(self, read_only=False):
+        node = self._pick_replica() if read_only else None
+        node = node or self.primary
+        try:
+            conn = node.get_connection()
+        except Error as e:
+            if node is self.primary: raise
+            print(f"Replica {node.name} unavailable ({e}), using primary")
+            node.healthy = False
+            node, conn = self.primary, self.primary.get_connection()
+        with self._lock:
+            node.active += 1
+        return RoutedConnection(conn, node, self)
+
+    def _release(self, node):
+        with self._lock:
+            node.active -= 1
+
+    def _pick_replica(self):
+        if not self.replicas: return None
+        self.start_lag_monitor()
+        candidates = [r for r in self.replicas if r.healthy]
+        if not candidates: return None
+        if self.policy == 'round_robin':
+            return candidates[next(self._rr) % len(candidates)]
+        with self._lock:
+            return min(candidates, key=lambda r: r.active)
+
+    def start_lag_monitor(self):
+        if self.max_lag is None or not self.replicas or self._monitor is not None: return
+        with self._lock:
+            if self._monitor is not None: return
+            self._monitor = threading.Thread(target=self._monitor_lag, name='replica-lag-monitor', daemon=True)
+            self._monitor.start()
+
+    def _monitor_lag(self):
+        while True:
+            for r in self.replicas:
+                self._check_lag(r)
+            time.sleep(self.lag_check_interval)
+
+    def _check_lag(self, node):
+        # One long-lived connection per replica, reopened after errors
+        try:
+            if node._lag_conn is None:
+                node._lag_conn = mysql.connector.connect(**node.config)
+            node.lag = replication_lag(node._lag_conn)
+        except Error as e:
+            print(f"Lag check failed on {node.name}: {e}")
+            node.lag = None
+            try:
+                if node._lag_conn: node._lag_conn.close()
+            except Error:
+                pass
+            node._lag_conn = None
+        node.checked_at = time.monotonic()
+        # Unknown lag (replication stopped / not configured) counts as too far behind
+        node.healthy = node.lag is not None and node.lag <= self.max_lag
+
+    def status(self):
+        """Last result of the lag monitor for every node."""
+        self.start_lag_monitor()
+        now = time.monotonic()
+        return [{'node': n.name, 'host': n.config.get('host'), 'port': n.config.get('port', 3306),
+                 'active': n.active, 'lag_seconds': n.lag, 'healthy': n.healthy,
+                 'checked_seconds_ago': round(now - n.checked_at, 1) if n.checked_at else None}
+                for n in [self.primary] + self.replicas]
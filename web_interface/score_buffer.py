@@ -0,0 +1,217 @@
+import atexit
+import glob
+import json
+import os
+import threading
+from search_projection import refresh_entry_search
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# --- Write-behind buffer for score updates ---
+# update_score requests are journaled (fsync) and acknowledged, then coalesced per
+# entry_id in memory and applied as one multi-row UPDATE ... CASE per chunk when the
+# buffer reaches max_pending or every flush_interval seconds. The journal is replayed
+# on start-up, so an acknowledged update survives a crash; close() flushes on exit.
+#
+# Every process (e.g. each server worker) journals to its own '<journal_path>.<pid>' and
+# holds an exclusive lock on '<journal_path>.<pid>.lock' while it runs. start() adopts the
+# journals whose lock is free, i.e. whose process died, so workers never rewrite each
+# other's records and a crashed worker's updates are applied by the next one to start.
+# Probing another process's lock briefly takes it, so probes and a process taking its own
+# lock are serialized by the adoption lock '<journal_path>.lock'. Adopted journals are
+# replayed oldest first (by mtime), so a later update to an entry wins.
+
+def _lock(path, blocking=False):
+    """Open `path` and lock it exclusively; None if another process holds the lock."""
+    f = open(path, 'a+')
+    try:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except FileNotFoundError:
+        return 0.0
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+class ScoreWriteBuffer:
+    def __init__(self, get_connection, journal_path, max_pending=500, flush_interval=2.0,
+                 chunk_size=1000, on_flush=None):
+        self.get_connection = get_connection
+        self.base_path = journal_path
+        self.journal_path = f'{journal_path}.{os.getpid()}'
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self.chunk_size = chunk_size
+        self.on_flush = on_flush  # called with the flushed entry ids after commit
+        self.pending = {}         # entry_id -> score string (latest wins)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._journal = None
+        self._journal_lock = None
+        self._thread = None
+        self.submitted = self.flushed_rows = self.flushes = 0
+
+    def start(self):
+        """Take over journals of dead processes and start the background flusher."""
+        with self._lock:
+            if self._thread: return
+            adopt = _lock(self.base_path + '.lock', blocking=True)  # one adopter at a time
+            try:
+                self._journal_lock = _lock(self.journal_path + '.lock', blocking=True)
+                if self._journal_lock is None:
+                    # Without it our live journal would look orphaned to other workers
+                    raise RuntimeError(f"Cannot lock {self.journal_path}.lock")
+                orphans = self._orphaned_journals()
+                for path in sorted([self.journal_path] + orphans, key=_mtime):
+                    self._replay_journal(path)
+                if self.pending:
+                    print(f"Replayed {len(self.pending)} journaled score updates")
+                # Our journal now holds the adopted records (and no torn tail), so the
+                # orphans can go; records are only dropped after they are durable here
+                self._rewrite_journal()
+                for path in orphans:
+                    _remove(path)
+                    _remove(path + '.tmp')
+                    if path != self.base_path:  # base_path + '.lock' is the adoption lock
+                        _remove(path + '.lock')
+            finally:
+                adopt.close()
+            self._thread = threading.Thread(target=self._run, name='score-flusher', daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+
+    def has_orphaned_journals(self):
+        """Journals left by processes that are no longer running."""
+        adopt = _lock(self.base_path + '.lock', blocking=True)  # see the header comment
+        try:
+            return bool(self._orphaned_journals())
+        finally:
+            adopt.close()
+
+    def submit(self, entry_id, score):
+        """Durably record one update; returns once it is on disk (not yet in MySQL)."""
+        if not self._thread: self.start()
+        with self._lock:
+            self._journal.write(json.dumps({'entry_id': entry_id, 'score': score}) + '\n')
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self.pending[entry_id] = score
+            self.submitted += 1
+            full = len(self.pending) >= self.max_pending
+        if full: self._wake.set()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                batch, self.pending = self.pending, {}
+            if not batch: return 0
+            try:
+                self._apply(batch)
+            except Exception as e:
+                print(f"Score flush failed, will retry: {e}")
+                with self._lock:
+                    for k, v in batch.items():
+                        self.pending.setdefault(k, v)  # keep newer updates that arrived meanwhile
+                return 0
+            with self._lock:
+                self._rewrite_journal()
+                self.flushed_rows += len(batch)
+                self.flushes += 1
+            if self.on_flush: self.on_flush(list(batch))
+            return len(batch)
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread: self._thread.join(timeout=30)
+        self.flush()
+        if self._journal: self._journal.close()
+        if self._journal_lock:
+            if not self.pending:  # clean shutdown: nothing left to replay
+                _remove(self.journal_path)
+                _remove(self.journal_path + '.lock')
+            self._journal_lock.close()
+
+    def stats(self):
+        with self._lock:
+            return {'pending': len(self.pending), 'submitted': self.submitted,
+                    'flushed_rows': self.flushed_rows, 'flushes': self.flushes}
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def _apply(self, batch):
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            items = sorted(batch.items())  # stable lock order on idx_entry_score / PK
+            for i in range(0, len(items), self.chunk_size):
+                chunk = items[i:i + self.chunk_size]
+                cases = ' '.join(['WHEN %s THEN %s'] * len(chunk))
+                ids = ', '.join(['%s'] * len(chunk))
+                params = [x for pair in chunk for x in pair] + [eid for eid, _ in chunk]
+                cursor.execute(f"UPDATE Entry SET score = CASE entry_id {cases} END WHERE entry_id IN ({ids})", params)
+            refresh_entry_search(cursor, [eid for eid, _ in items])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _orphaned_journals(self):
+        """Journal paths of other processes whose lock is free; caller holds the adoption
+        lock. Running processes take their lock under it, so a free lock means a dead process."""
+        paths = [self.base_path] if os.path.exists(self.base_path) else []  # older single journal
+        for lock_path in glob.glob(glob.escape(self.base_path) + '.*.lock'):
+            path = lock_path[:-len('.lock')]
+            if path == self.journal_path or not path.rsplit('.', 1)[1].isdigit(): continue
+            lock = _lock(lock_path)
+            if lock is None: continue  # its process is alive
+            lock.close()
+            paths.append(path)
+        return paths
+
+    def _replay_journal(self, path):
+        if not os.path.exists(path): return
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # torn last line from a crash mid-write (never acknowledged)
+                self.pending[rec['entry_id']] = rec['score']
+
+    def _rewrite_journal(self):
+        # Caller holds self._lock: keep only what is still pending
+        tmp = self.journal_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for eid, score in self.pending.items():
+                f.write(json.dumps({'entry_id': eid, 'score': score}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        if self._journal: self._journal.close()
+        os.replace(tmp, self.journal_path)
+        self._journal = open(self.journal_path, 'a', encoding='utf-8')
@@ -0,0 +1,109 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+# --- /api/search result cache ---
+# LRU + TTL cache bounded by (approximate) payload bytes. Keys are the canonical
+# filter set, so '?genre_id=1&medium=all' and '?genre_id=1' share one slot.
+# Only normalizations the SQL itself ignores are applied (case under the _ci collation,
+# the integer value of limit); e.g. 'a ' and 'a' stay apart since LIKE '%a %' differs.
+#
+# Each invalidate() starts a new generation. A request takes `generation` before it reads
+# the database and passes it to put(), so rows read before a write committed are never
+# stored after that write's invalidation. invalidated_within() lets the caller also skip
+# results read from a replica that may still lag behind the last invalidation.
+
+# Args that do not change the result when empty; 'all' only means "no filter" for medium
+# (build_search_query turns e.g. title=all into LIKE '%all%')
+IGNORED_VALUES = ('', None)
+
+def canonical_key(args):
+    """Normalize a request.args-like mapping into a hashable, order-independent key."""
+    items = []
+    for k in sorted(args.keys()):
+        v = args.get(k)
+        if v in IGNORED_VALUES or (k == 'medium' and v == 'all'): continue
+        v = str(v)
+        if k == 'title':
+            v = v.lower()  # LIKE is case-insensitive under utf8mb4_unicode_ci
+        elif k == 'limit':
+            try: v = str(int(v))  # int() as in build_search_query
+            except ValueError: continue  # falls back to the default limit
+        elif k == 'medium':
+            v = v.lower()
+        items.append((k, v))
+    if ('limit', '50') in items:
+        items.remove(('limit', '50'))  # default limit
+    return tuple(items)
+
+class SearchCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttl_seconds=300):
+        self.max_bytes = max_bytes
+        self.ttl = ttl_seconds
+        self._data = OrderedDict()  # key -> (expires_at, size, results)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.invalidated_at = None  # time.monotonic() of the last invalidate()
+        self.hits = self.misses = self.evictions = self.invalidations = self.stale_puts = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[2]
+
+    def put(self, key, results, generation=None):
+        """Store results; skipped if the cache was invalidated since `generation` was taken."""
+        size = len(json.dumps(results, default=str))
+        if size > self.max_bytes: return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                self.stale_puts += 1
+                return
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (time.monotonic() + self.ttl, size, results)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._data)))
+                self.evictions += 1
+
+    def invalidate(self):
+        """Drop every cached result (called after any write to the catalog)."""
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+            self.generation += 1
+            self.invalidated_at = time.monotonic()
+            self.invalidations += 1
+
+    def invalidated_within(self, seconds):
+        at = self.invalidated_at
+        return at is not None and time.monotonic() - at < seconds
+
+    def _drop(self, key):
+        self._bytes -= self._data.pop(key)[1]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._data),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'stale_puts_skipped': self.stale_puts
+            }
@@ -0,0 +1,44 @@
+import os
+import threading
+import numpy as np
+
+# --- Similar-titles index (built by python_scripts/build_similar_index.py) ---
+# Held fully in memory (N x K ids + float16 scores); a lookup is one binary search.
+# Rows are best first; trailing slots with similarity 0 are padding (no shared features).
+# The file is re-read when the offline job replaces it.
+
+class SimilarIndex:
+    def __init__(self, path):
+        self.path = path
+        self._mtime = None
+        self._lock = threading.Lock()
+        self._arrays = None  # (entry_ids, neighbours, similarity), swapped as one
+
+    def _maybe_reload(self):
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return False
+        if mtime != self._mtime:
+            with self._lock:
+                if mtime != self._mtime:
+                    with np.load(self.path) as data:
+                        self._arrays = (data['entry_ids'], data['neighbours'], data['similarity'])
+                    self._mtime = mtime
+        return True
+
+    def available(self):
+        """True once the index file exists (loading it if it changed)."""
+        return self._maybe_reload() and self._arrays is not None
+
+    def lookup(self, entry_id, limit=None):
+        """[(entry_id, similarity), ...] best first, or None if entry_id isn't indexed."""
+        if not self.available(): return None
+        entry_ids, neighbours, similarity = self._arrays
+        i = np.searchsorted(entry_ids, entry_id)
+        if i >= len(entry_ids) or entry_ids[i] != entry_id: return None
+        end = int(np.count_nonzero(similarity[i] > 0))
+        if limit is not None:
+            end = min(max(limit, 0), end)
+        ids, sims = neighbours[i, :end], similarity[i, :end]
+        return [(eid, round(sim, 4)) for eid, sim in zip(ids.tolist(), sims.tolist())]
@@ -1,5 +1,39 @@
 // Basic Fetch Logic
 
+// Columnar responses (see web_interface/compact_json.py): fewer bytes for large lists
+const COLUMNAR_MIME = 'application/vnd.mal.columnar+json';
+
+function decodeColumnar(obj) {
+    if (Array.isArray(obj)) return obj.map(decodeColumnar);
+    if (!obj || typeof obj !== 'object') return obj;
+    if (obj['$columnar'] === 1) {
+        const cols = obj.values.map((col, i) => {
+            const dict = obj.dicts[i];
+            return dict ? col.map(n => dict[n]) : col;
+        });
+        const rows = new Array(obj.length);
+        for (let r = 0; r < obj.length; r++) {
+            const row = {};
+            obj.columns.forEach((name, i) => { row[name] = cols[i][r]; });
+            rows[r] = row;
+        }
+        return rows;
+    }
+    const out = {};
+    for (const [k, v] of Object.entries(obj)) out[k] = decodeColumnar(v);
+    return out;
+}
+
+async function fetchCompact(url) {
+    const res = await fetch(url, { headers: { 'Accept': COLUMNAR_MIME } });
+    if (!res.ok) {
+        // API errors are {"error": ...}; a proxy or crash page may not be JSON at all
+        const body = await res.json().catch(() => ({}));
+        throw new Error(body.error || `${res.status} ${res.statusText}`);
+    }
+    return decodeColumnar(await res.json());
+}
+
 async function doSearch() {
     // Gather all filter values
     const filters = {
@@ -24,11 +58,13 @@ async function doSearch() {
     }
 
     try {
-        const response = await fetch(`/api/search?${params.toString()}`);
-        const data = await response.json();
+        const data = await fetchCompact(`/api/search?${params.toString()}`);
         renderResults(data);
     } catch (e) {
         console.error("Search failed", e);
+        const container = document.getElementById('results');
+        container.innerHTML = '<div style="grid-column: 1/-1; text-align: center;"></div>';
+        container.firstChild.textContent = `Search failed: ${e.message}`;
     }
 }
 
@@ -153,8 +189,7 @@ function updateDropdown(id, list, valKey, textKey, filterFn) {
 // Load metadata
 async function loadMetadata() {
     try {
-        const res = await fetch('/api/metadata');
-        metaDataStore = await res.json();
+        metaDataStore = await fetchCompact('/api/metadata');
 
         // 1. Populate Insert Pages (Static)
         // Anime Insert
@@ -0,0 +1,291 @@
+import threading
+import numpy as np
+
+# --- In-memory trend cube for /api/stats/cube ---
+# Dimensions: medium x year x season x facet (genre | theme | studio | demographic | none).
+# Each cell holds the entry count plus, per measure, the number of non-null values, their
+# sum, min and max; any roll-up (sum/min/max over axes) or slice is then a NumPy reduction.
+#
+# Year/season come from premier_date_year/_season for anime and fall back to the airing
+# or publishing start date (Winter = Jan-Mar, ..., Fall = Oct-Dec), so manga get seasons too.
+#
+# The per-entry facts stay in memory. mark_dirty(ids) after a write makes the next query
+# reload just those entries and patch the built cubes: their old rows are subtracted and the
+# new ones added, and min/max are recomputed only for cells that lost an extreme value.
+# A cube is rebuilt only when a reloaded entry brings a medium, year or facet id it has no
+# slot for. The ETL passes the ids of the entries it loaded; when they are more than
+# FULL_RELOAD_FRACTION of all entries (a full load), everything is reloaded instead.
+# mark_dirty(None) reloads everything too.
+#
+# Built cubes are never modified in place: a patch works on a copy and swaps it in under
+# the lock, so a query that took a cube before a refresh keeps reading consistent arrays.
+
+SEASONS = ['Winter', 'Spring', 'Summer', 'Fall', None]
+MEASURES = ['score', 'members']
+AGGREGATES = ['count', 'avg', 'sum', 'min', 'max']
+FULL_RELOAD_FRACTION = 0.5
+DIMENSIONS = ['medium', 'year', 'season', 'facet']
+
+# facet -> (junction table, id column, lookup table, name column)
+FACETS = {
+    'genre': ('EntryGenre', 'genre_id', 'Genre', 'name'),
+    'theme': ('EntryTheme', 'theme_id', 'Theme', 'name'),
+    'studio': ('EntryStudio', 'studio_id', 'Studio', 'name'),
+    'demographic': ('EntryDemographic', 'demographic_id', 'Demographic', 'name'),
+}
+
+FACTS_QUERY = """
+    SELECT e.entry_id, m.name,
+           COALESCE(ad.premier_date_year, YEAR(ad.from_airing_date), YEAR(md.from_publishing_date)),
+           ad.premier_date_season,
+           MONTH(COALESCE(ad.from_airing_date, md.from_publishing_date)),
+           e.score, e.members
+    FROM Entry e
+    JOIN ItemType it ON e.item_type_id = it.item_type_id
+    JOIN Medium m ON it.medium_id = m.medium_id
+    LEFT JOIN AnimeDetails ad ON e.entry_id = ad.entry_id
+    LEFT JOIN MangaDetails md ON e.entry_id = md.entry_id
+"""
+
+def _season_index(season, month):
+    if season and season.capitalize() in SEASONS:
+        return SEASONS.index(season.capitalize())
+    if month:
+        return (int(month) - 1) // 3
+    return len(SEASONS) - 1
+
+def _cells(cube, facet, facts, members):
+    """Flat cell index and fact row of every (entry, facet id) pair in facts (sorted by
+    entry_id); the index is -1 where an axis of cube has no slot for the value."""
+    n = len(facts['entry_id'])
+    if facet == 'none':
+        rows, fids = np.arange(n), np.zeros(n, dtype=np.int64)
+    else:
+        eids, fids = members[facet]
+        # Junction row -> fact row; rows of entries without facts (deleted) drop out
+        pos = np.minimum(np.searchsorted(facts['entry_id'], eids), max(n - 1, 0))
+        valid = facts['entry_id'][pos] == eids if n else np.zeros(len(eids), bool)
+        rows, fids = pos[valid], fids[valid]
+    coords, ok = [], np.ones(len(rows), bool)
+    for axis, values in ((cube['mediums'], facts['medium'][rows].astype(str)),
+                         (cube['years'], facts['year'][rows]),
+                         (np.arange(len(SEASONS)), facts['season'][rows]),
+                         (cube['facet_ids'], fids)):
+        i = np.minimum(np.searchsorted(axis, values), max(len(axis) - 1, 0))
+        ok &= axis[i] == values if len(axis) else False
+        coords.append(i)
+    shape = cube['count'].shape
+    flat = np.full(len(rows), -1, dtype=np.int64)
+    flat[ok] = np.ravel_multi_index(tuple(c[ok] for c in coords), shape)
+    return flat, rows
+
+def _in_clause(entry_ids):
+    return f" WHERE {{col}} IN ({', '.join(['%s'] * len(entry_ids))})" if entry_ids is not None else ""
+
+class StatsCube:
+    def __init__(self, get_connection):
+        self.get_connection = get_connection
+        self._lock = threading.Lock()
+        self._facts = None        # column arrays, sorted by entry_id
+        self._members = {}        # facet -> (entry_ids, facet_ids)
+        self._names = {}          # facet -> {facet_id: name}
+        self._cubes = {}          # facet -> aggregated arrays (built on first use)
+        self._dirty = set()
+        self._full_reload = True
+
+    def mark_dirty(self, entry_ids):
+        """Entries whose facts changed (None = everything, e.g. after an ETL run)."""
+        with self._lock:
+            if entry_ids is None: self._full_reload = True
+            else: self._dirty.update(int(x) for x in entry_ids)
+
+    # --- Loading ---
+
+    def _load(self, cursor, entry_ids):
+        where = _in_clause(entry_ids)
+        params = list(entry_ids) if entry_ids is not None else []
+        cursor.execute(FACTS_QUERY + where.format(col='e.entry_id'), params)
+        rows = cursor.fetchall()
+        facts = {
+            'entry_id': np.array([r[0] for r in rows], dtype=np.int64),
+            'medium': np.array([r[1] for r in rows], dtype=object),
+            'year': np.array([r[2] or 0 for r in rows], dtype=np.int64),
+            'season': np.array([_season_index(r[3], r[4]) for r in rows], dtype=np.int64),
+            'score': np.array([r[5] for r in rows], dtype=np.float64).reshape(-1),
+            'members': np.array([r[6] for r in rows], dtype=np.float64).reshape(-1),
+        }
+        order = np.argsort(facts['entry_id'], kind='stable')
+        facts = {k: v[order] for k, v in facts.items()}
+        members = {}
+        for facet, (junction, id_col, _, _) in FACETS.items():
+            cursor.execute(f"SELECT entry_id, {id_col} FROM {junction}" + where.format(col='entry_id'), params)
+            pairs = np.array(cursor.fetchall(), dtype=np.int64).reshape(-1, 2)
+            members[facet] = (pairs[:, 0], pairs[:, 1])
+        return facts, members
+
+    def _refresh(self):
+        # Caller holds self._lock
+        if not self._full_reload and not self._dirty: return
+        known = 0 if self._facts is None else len(self._facts['entry_id'])
+        if len(self._dirty) > FULL_RELOAD_FRACTION * known:
+            self._full_reload = True  # patching most entries costs more than a rebuild
+        ids = None if self._full_reload else sorted(self._dirty)
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            facts, members = self._load(cursor, ids)
+            for facet, (_, id_col, lookup, name_col) in FACETS.items():
+                cursor.execute(f"SELECT {id_col}, {name_col} FROM {lookup}")
+                self._names[facet] = dict(cursor.fetchall())
+        finally:
+            conn.close()
+
+        if ids is None or self._facts is None:
+            self._facts, self._members, self._cubes = facts, members, {}
+        else:
+            # Drop the old rows of the reloaded entries (deleted entries simply don't come back)
+            keep = ~np.isin(self._facts['entry_id'], ids)
+            old_facts = {k: v[~keep] for k, v in self._facts.items()}
+            merged = {k: np.concatenate([v[keep], facts[k]]) for k, v in self._facts.items()}
+            old_members, merged_members = {}, {}
+            for facet, (eids, fids) in self._members.items():
+                keep_m = ~np.isin(eids, ids)
+                old_members[facet] = (eids[~keep_m], fids[~keep_m])
+                merged_members[facet] = (np.concatenate([eids[keep_m], members[facet][0]]),
+                                         np.concatenate([fids[keep_m], members[facet][1]]))
+            order = np.argsort(merged['entry_id'], kind='stable')
+            self._facts = {k: v[order] for k, v in merged.items()}
+            self._members = merged_members
+            for facet in list(self._cubes):
+                patched = self._patch(facet, old_facts, old_members, facts, members)
+                if patched is None:
+                    del self._cubes[facet]  # new axis value: rebuilt on next use
+                else:
+                    self._cubes[facet] = patched
+        self._dirty, self._full_reload = set(), False
+
+    def _patch(self, facet, old_facts, old_members, new_facts, new_members):
+        """Copy of a built cube with the reloaded entries' contributions swapped; None if it
+        needs a rebuild."""
+        cube = self._cubes[facet]
+        old_flat, old_rows = _cells(cube, facet, old_facts, old_members)
+        new_flat, new_rows = _cells(cube, facet, new_facts, new_members)
+        if (new_flat < 0).any(): return None
+        cube = {k: v.copy() for k, v in cube.items()}  # readers may still hold the old arrays
+        np.subtract.at(cube['count'].reshape(-1), old_flat, 1)
+        np.add.at(cube['count'].reshape(-1), new_flat, 1)
+        stale = np.zeros(cube['count'].size, bool)
+        for m in MEASURES:
+            lo, hi = cube[m + '_min'].reshape(-1), cube[m + '_max'].reshape(-1)
+            old_vals, new_vals = old_facts[m][old_rows], new_facts[m][new_rows]
+            o, n = ~np.isnan(old_vals), ~np.isnan(new_vals)
+            np.subtract.at(cube[m + '_n'].reshape(-1), old_flat[o], 1)
+            np.add.at(cube[m + '_n'].reshape(-1), new_flat[n], 1)
+            np.subtract.at(cube[m + '_sum'].reshape(-1), old_flat[o], old_vals[o])
+            np.add.at(cube[m + '_sum'].reshape(-1), new_flat[n], new_vals[n])
+            # A cell that lost its min or max must be recomputed from all of its rows
+            cells, vals = old_flat[o], old_vals[o]
+            stale[cells[(vals <= lo[cells]) | (vals >= hi[cells])]] = True
+            np.minimum.at(lo, new_flat[n], new_vals[n])
+            np.maximum.at(hi, new_flat[n], new_vals[n])
+        if stale.any():
+            flat, rows = _cells(cube, facet, self._facts, self._members)
+            in_stale = (flat >= 0) & stale[flat]
+            for m in MEASURES:
+                lo, hi = cube[m + '_min'].reshape(-1), cube[m + '_max'].reshape(-1)
+                lo[stale], hi[stale] = np.inf, -np.inf
+                vals = self._facts[m][rows]
+                sel = in_stale & ~np.isnan(vals)
+                np.minimum.at(lo, flat[sel], vals[sel])
+                np.maximum.at(hi, flat[sel], vals[sel])
+        return cube
+
+    # --- Aggregation ---
+
+    def _build(self, facet):
+        f = self._facts
+        mediums, years = np.unique(f['medium'].astype(str)), np.unique(f['year'])
+        facet_ids = np.array([0]) if facet == 'none' else np.unique(self._members[facet][1])
+        shape = (len(mediums), len(years), len(SEASONS), len(facet_ids))
+        cube = {'mediums': mediums, 'years': years, 'facet_ids': facet_ids,
+                'count': np.zeros(shape, dtype=np.int64)}  # _cells() reads the shape
+        flat, rows = _cells(cube, facet, f, self._members)
+        size = cube['count'].size
+        cube['count'] = np.bincount(flat, minlength=size).reshape(shape)
+        for m in MEASURES:
+            vals = f[m][rows]
+            ok = ~np.isnan(vals)
+            cube[m + '_n'] = np.bincount(flat[ok], minlength=size).reshape(shape)
+            cube[m + '_sum'] = np.bincount(flat[ok], weights=vals[ok], minlength=size).reshape(shape)
+            lo, hi = np.full(size, np.inf), np.full(size, -np.inf)
+            np.minimum.at(lo, flat[ok], vals[ok])
+            np.maximum.at(hi, flat[ok], vals[ok])
+            cube[m + '_min'], cube[m + '_max'] = lo.reshape(shape), hi.reshape(shape)
+        return cube
+
+    def _cube(self, facet):
+        with self._lock:
+            self._refresh()
+            if facet not in self._cubes:
+                self._cubes[facet] = self._build(facet)
+            return self._cubes[facet], self._names.get(facet, {})
+
+    # --- Queries ---
+
+    def query(self, facet='none', measure='score', agg='avg', by=('year',), medium=None,
+              year_from=None, year_to=None, seasons=None, facet_ids=None):
+        """Roll up to the `by` dimensions after slicing; returns the non-empty cells."""
+        cube, names = self._cube(facet)  # a snapshot: refreshes swap in new arrays
+        axes = [
+            np.ones(len(cube['mediums']), bool) if not medium
+            else np.isin(np.char.lower(cube['mediums'].astype(str)), [m.lower() for m in medium]),
+            (cube['years'] >= (year_from or -1)) & (cube['years'] <= (year_to or 10 ** 6)),
+            np.ones(len(SEASONS), bool) if not seasons else np.isin(SEASONS, seasons),
+            np.ones(len(cube['facet_ids']), bool) if not facet_ids else np.isin(cube['facet_ids'], facet_ids),
+        ]
+        index = np.ix_(*axes)
+        reduce_axes = tuple(i for i, d in enumerate(DIMENSIONS) if d not in by)
+
+        count = cube['count'][index].sum(axis=reduce_axes)
+        if agg == 'count':
+            value = count.astype(np.float64)
+        elif agg in ('sum', 'avg'):
+            total = cube[measure + '_sum'][index].sum(axis=reduce_axes)
+            n = cube[measure + '_n'][index].sum(axis=reduce_axes)
+            value = total if agg == 'sum' else np.divide(total, n, out=np.full(total.shape, np.nan), where=n > 0)
+        else:
+            # initial= keeps empty slices (unknown season / facet id, empty DB) from raising;
+            # the resulting +-inf is reported as null below
+            arr = cube[f'{measure}_{agg}'][index]
+            value = arr.min(axis=reduce_axes, initial=np.inf) if agg == 'min' \
+                else arr.max(axis=reduce_axes, initial=-np.inf)
+
+        labels = {
+            'medium': cube['mediums'][axes[0]].tolist(),
+            'year': [int(y) or None for y in cube['years'][axes[1]]],
+            'season': [s for s, keep in zip(SEASONS, axes[2]) if keep],
+            'facet': cube['facet_ids'][axes[3]].tolist(),
+        }
+        kept = [d for d in DIMENSIONS if d in by]
+        if not kept:  # grand total
+            count, value = count.reshape(1), value.reshape(1)
+        cells = []
+        for pos in zip(*np.nonzero(count)):
+            cell = {}
+            for d, i in zip(kept, pos):
+                if d == 'facet' and facet != 'none':
+                    cell[f'{facet}_id'] = labels[d][i]
+                    cell[facet] = names.get(labels[d][i])
+                elif d != 'facet':
+                    cell[d] = labels[d][i]
+            v = value[pos]
+            cell['value'] = None if not np.isfinite(v) else round(float(v), 4)
+            cell['count'] = int(count[pos])
+            cells.append(cell)
+        return cells
+
+    def stats(self):
+        with self._lock:
+            n = 0 if self._facts is None else len(self._facts['entry_id'])
+            return {'entries': n, 'cubes_built': sorted(self._cubes), 'dirty': len(self._dirty),
+                    'full_reload_pending': self._full_reload}